@@ -0,0 +1,65 @@
+"""Recall/latency evaluation of the IVF index against exact search.
+
+By default the corpus is every card in the cards table (DATABASE_URL must point
+at a loaded database). --synthetic N uses N clustered random vectors instead,
+so the harness also runs without a database.
+
+For each nprobe value, prints recall@k and p50/p99 single-query latency of the
+index next to exact search.
+
+Run with:
+    PYTHONPATH=src python benchmarks/bench_ann.py --nprobe 1 4 8 16
+    PYTHONPATH=src python benchmarks/bench_ann.py --synthetic 100000
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from app.config.logging_config import setup_logging
+from app.services.ann_index import DEFAULT_NPROBE, IVFIndex, evaluate_index
+from app.services.vector_service import DEFAULT_TOP_K, FEATURE_SCHEMA, SimilaritySearch
+
+
+def synthetic_corpus(n: int, dim: int = FEATURE_SCHEMA.dim, clusters: int = 1000, seed: int = 0) -> SimilaritySearch:
+    """Clustered random vectors standing in for card vectors."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    noise = rng.normal(scale=1.5, size=(n, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + noise
+    return SimilaritySearch([str(i) for i in range(n)], vectors)
+
+
+def main() -> None:
+    """Build the index once and evaluate it for each nprobe."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic vectors instead of the cards table")
+    parser.add_argument("--nlist", type=int, default=None, help="number of IVF lists (default sqrt(N))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[DEFAULT_NPROBE], help="probes to evaluate")
+    parser.add_argument("--queries", type=int, default=500, help="number of query cards")
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="neighbours per query")
+    args = parser.parse_args()
+    setup_logging(log_level=logging.INFO)
+
+    exact = synthetic_corpus(args.synthetic) if args.synthetic else SimilaritySearch.from_database()
+
+    start = time.perf_counter()
+    index = IVFIndex(nlist=args.nlist).build(exact.ids, exact.vectors)
+    print(f"corpus: {len(exact):,} vectors, nlist={index.nlist}, build {time.perf_counter() - start:.2f}s")
+
+    rng = np.random.default_rng(1)
+    queries = exact.vectors[rng.choice(len(exact), size=min(args.queries, len(exact)), replace=False)]
+    print(f"{'nprobe':>6} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p99 ms':>8} {'exact p50':>10} {'exact p99':>10}")
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        result = evaluate_index(index, exact, queries, args.k)
+        print(
+            f"{nprobe:>6} {result.recall:>10.3f} {result.p50_ms:>8.3f} {result.p99_ms:>8.3f} "
+            f"{result.exact_p50_ms:>10.3f} {result.exact_p99_ms:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
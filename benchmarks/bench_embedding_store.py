@@ -0,0 +1,68 @@
+"""Size, open time and recall of float32/float16/int8 embedding store files.
+
+Writes the corpus in each dtype, then reports file size, time to open the
+memory-mapped file, batched search throughput and recall@k against exact
+float32 search. Uses the cards table by default, or --synthetic N clustered
+random vectors.
+
+Run with:
+    PYTHONPATH=src python benchmarks/bench_embedding_store.py --synthetic 100000
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from bench_ann import synthetic_corpus
+
+from app.config.logging_config import setup_logging
+from app.services.embedding_store import DTYPES, EmbeddingStore, write_embedding_store
+from app.services.vector_service import DEFAULT_TOP_K, SimilaritySearch
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    """Mean overlap between two (queries, k) index arrays."""
+    k = expected.shape[1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, expected)]))
+
+
+def main() -> None:
+    """Write, open and query a store file for each dtype."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic vectors instead of the cards table")
+    parser.add_argument("--queries", type=int, default=500, help="number of query cards")
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="neighbours per query")
+    args = parser.parse_args()
+    setup_logging(log_level=logging.WARNING)
+
+    exact = synthetic_corpus(args.synthetic) if args.synthetic else SimilaritySearch.from_database()
+    rng = np.random.default_rng(1)
+    queries = exact.vectors[rng.choice(len(exact), size=min(args.queries, len(exact)), replace=False)]
+    expected, _ = exact.search(queries, args.k)
+
+    print(f"corpus: {len(exact):,} x {exact.vectors.shape[1]}, {len(queries)} queries, k={args.k}")
+    print(f"{'dtype':>8} {'size MB':>8} {'open ms':>8} {'queries/s':>10} {'recall@' + str(args.k):>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for dtype in DTYPES:
+            path = Path(tmp_dir) / f"cards.{dtype}.vec"
+            write_embedding_store(path, exact.ids.tolist(), exact.vectors, dtype=dtype)
+
+            start = time.perf_counter()
+            store = EmbeddingStore.open(path)
+            open_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            found, _ = store.search(queries, args.k)
+            throughput = len(queries) / (time.perf_counter() - start)
+
+            print(
+                f"{dtype:>8} {path.stat().st_size / 1e6:>8.1f} {open_ms:>8.2f} "
+                f"{throughput:>10,.0f} {recall_at_k(found, expected):>10.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
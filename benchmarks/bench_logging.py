@@ -0,0 +1,113 @@
+"""Per-record cost of the logging modes of setup_logging().
+
+Logs --records INFO messages shaped like the per-batch ETL messages and
+reports, for each mode, the time the logging thread spends per record and the
+total time until every record is written (including draining the queue):
+
+- sync: StreamHandler + FileHandler on the calling thread (the default)
+- queue: QueueHandler, formatting and I/O on the listener thread
+- queue_json: queue with JSON lines output
+- queue_sampled: queue keeping every --sample-every th record per message
+
+Console output goes to a null stream and the log file to a temporary
+directory. --flush-latency makes every console flush sleep, standing in for a
+terminal, pipe or log shipper that blocks the writer: the sync mode pays it
+per record on the logging thread, the queue modes once per drained burst on
+the listener thread.
+
+Run with:
+    PYTHONPATH=src python benchmarks/bench_logging.py --records 200000
+    PYTHONPATH=src python benchmarks/bench_logging.py --records 20000 --flush-latency 0.0002
+"""
+
+import argparse
+import io
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.config.logging_config import setup_logging, shutdown_logging
+
+DEFAULT_RECORDS = 100_000
+DEFAULT_SAMPLE_EVERY = 10
+MODES = {
+    "sync": {"use_queue": False},
+    "queue": {"use_queue": True},
+    "queue_json": {"use_queue": True, "json_lines": True},
+    "queue_sampled": {"use_queue": True, "sample_every": DEFAULT_SAMPLE_EVERY},
+}
+
+
+class SlowNullStream(io.StringIO):
+    """Console stand-in that discards output and sleeps on every flush."""
+
+    def __init__(self, flush_latency: float):
+        super().__init__()
+        self.flush_latency = flush_latency
+        self.flushes = 0
+
+    def write(self, s: str) -> int:
+        return len(s)
+
+    def flush(self) -> None:
+        self.flushes += 1
+        if self.flush_latency:
+            time.sleep(self.flush_latency)
+
+
+def run_mode(options: dict, records: int, log_dir: Path, flush_latency: float) -> tuple[float, float, int]:
+    """Log records messages in one mode.
+
+    Returns:
+        (caller seconds, total seconds until written, console flushes)
+    """
+    log_file = log_dir / "bench.log"
+    log_file.unlink(missing_ok=True)
+    console = SlowNullStream(flush_latency)
+    stdout = sys.stdout
+    sys.stdout = console
+    try:
+        setup_logging(**{
+            "log_level": logging.INFO, "log_file": str(log_file), "json_lines": False, "max_bytes": 0, "sample_every": 1,
+            **options,
+        })
+        logger = logging.getLogger("database.etl.cards.cards_retrieval_svc")
+        start = time.perf_counter()
+        for batch in range(records):
+            logger.info("Batch %d: Retrieved %d cards, %d not found", batch, 75, 0)
+        caller = time.perf_counter() - start
+        shutdown_logging()
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+        total = time.perf_counter() - start
+    finally:
+        for handler in logging.getLogger().handlers:
+            handler.close()
+        logging.getLogger().handlers.clear()
+        sys.stdout = stdout
+    return caller, total, console.flushes
+
+
+def main() -> None:
+    """Run every mode and print the per-record cost table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=DEFAULT_RECORDS, help="records logged per mode")
+    parser.add_argument("--sample-every", type=int, default=DEFAULT_SAMPLE_EVERY, help="sampling rate of queue_sampled")
+    parser.add_argument("--flush-latency", type=float, default=0.0, help="seconds each console flush blocks")
+    args = parser.parse_args()
+    MODES["queue_sampled"]["sample_every"] = args.sample_every
+
+    print(f"{args.records:,} records per mode, console flush latency {args.flush_latency * 1e6:.0f}us")
+    print(f"{'mode':<14} {'caller us/rec':>14} {'total us/rec':>13} {'flushes':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode, options in MODES.items():
+            caller, total, flushes = run_mode(options, args.records, Path(tmp_dir), args.flush_latency)
+            print(
+                f"{mode:<14} {caller / args.records * 1e6:>14.2f} {total / args.records * 1e6:>13.2f} {flushes:>9,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
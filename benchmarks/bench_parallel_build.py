@@ -0,0 +1,61 @@
+"""Throughput and scaling of the multi-core corpus vectorization.
+
+Vectorizes the same card rows with transform_parallel() at several pool sizes
+and reports overall cards/sec, speedup over one process and the per-worker
+throughput of each run. Uses the bundled schemas/cards_*.json examples
+replicated to --cards rows, or the cards table with --database.
+
+Run with:
+    PYTHONPATH=src python benchmarks/bench_parallel_build.py --cards 200000 --workers 1 2 4 8 16
+"""
+
+import argparse
+import logging
+import os
+
+import numpy as np
+from bench_validation import load_fixture_cards
+
+from app.config.logging_config import setup_logging
+from app.services.parallel_build import DEFAULT_CHUNK_SIZE, transform_parallel
+from app.services.vector_service import VECTOR_COLUMNS, fetch_card_rows
+from database.etl.schema_validation import CARDS_UPSERT_COLUMNS, validate_cards_batch
+
+DEFAULT_CARDS = 100_000
+
+
+def synthetic_rows(n: int) -> list[dict]:
+    """Replicate the bundled examples as cards table rows with unique ids."""
+    examples = [dict(zip(CARDS_UPSERT_COLUMNS, row)) for row in validate_cards_batch(load_fixture_cards())]
+    return [dict(examples[i % len(examples)], id=f"card-{i}") for i in range(n)]
+
+
+def main() -> None:
+    """Vectorize the corpus at each pool size and print the scaling table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=DEFAULT_CARDS, help="number of synthetic card rows")
+    parser.add_argument("--database", action="store_true", help="vectorize the cards table instead")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="cards per task")
+    args = parser.parse_args()
+    setup_logging(log_level=logging.WARNING)
+
+    cards = fetch_card_rows(VECTOR_COLUMNS) if args.database else synthetic_rows(args.cards)
+    print(f"{len(cards):,} cards, chunk size {args.chunk_size}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'cards/s':>10} {'speedup':>8}  per-worker cards/s")
+
+    baseline = None
+    reference = None
+    for workers in sorted(set(args.workers)):
+        matrix, stats = transform_parallel(cards, workers, args.chunk_size)
+        if reference is None:
+            reference = matrix
+        elif not np.array_equal(matrix, reference):
+            raise RuntimeError(f"{workers} workers produced different vectors")
+        baseline = baseline or stats.cards_per_second
+        per_worker = " ".join(f"{worker.cards_per_second:,.0f}" for worker in stats.workers)
+        print(f"{workers:>8} {stats.cards_per_second:>10,.0f} {stats.cards_per_second / baseline:>7.2f}x  {per_worker}")
+
+
+if __name__ == "__main__":
+    main()
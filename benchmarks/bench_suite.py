@@ -0,0 +1,329 @@
+"""End-to-end benchmark suite over a synthetic corpus, with baseline comparison.
+
+Generates a deterministic corpus (synthetic_cards.py) and times each stage of
+the pipeline on it, best of --repeat runs:
+
+- fetch_sets, fetch_cards: SetsRetrievalService / CardsRetrievalService
+  against the local stub server (stub_scryfall.py), so only the client side
+  (HTTP, JSON decoding, batching) is measured
+- validate: iter_card_rows(), Scryfall dicts to cards rows
+- upsert, upsert_unchanged: load_cards() of the new corpus and of the same
+  rows again (the content-hash skip path); only with --database, and the
+  synthetic cards are deleted afterwards
+- vectorize: CardVectorizer.transform() of the rows
+- query, query_filtered: SimilaritySearch.most_similar() for --queries cards,
+  without and with legality/color identity filters
+
+Results are written as JSON to --output. When the --baseline file exists, each
+stage's throughput is compared with it and the script exits with status 1 if
+any stage is more than --tolerance slower. Baselines are machine specific:
+record one with --save-baseline on the machine that runs the comparison.
+
+Run with:
+    PYTHONPATH=src python benchmarks/bench_suite.py --cards 100000 --save-baseline
+    PYTHONPATH=src python benchmarks/bench_suite.py --cards 100000 --database
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+import numpy as np
+from stub_scryfall import StubScryfall
+from synthetic_cards import DEFAULT_SEED, card_identifiers, generate_corpus
+
+from app.config.logging_config import setup_logging
+from app.services.card_masks import card_masks
+from app.services.vector_service import DEFAULT_TOP_K, CardVectorizer, SimilaritySearch
+from database.db import get_cursor
+from database.etl.cards.cards_etl import CARDS_COLUMNS, iter_card_rows, load_cards
+from database.etl.cards.cards_retrieval_svc import CardsRetrievalService
+from database.etl.sets.sets_retrieval_svc import SetsRetrievalService
+
+T = TypeVar("T")
+
+STAGES = ("fetch_sets", "fetch_cards", "validate", "upsert", "upsert_unchanged", "vectorize", "query", "query_filtered")
+DATABASE_STAGES = ("upsert", "upsert_unchanged")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_CARDS = 100_000
+DEFAULT_FETCH_CARDS = 20_000
+DEFAULT_QUERIES = 1000
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.2
+# The stub has no rate limit; keep the client's limiter out of the measurement
+STUB_REQUESTS_PER_SECOND = 1e6
+
+
+@dataclass
+class StageResult:
+    """Timing of one stage.
+
+    Attributes:
+        items: Units of work per run (cards, sets or queries).
+        unit: Name of the unit.
+        seconds: Best wall time over the repeats.
+    """
+
+    items: int
+    unit: str
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        """Throughput in items per second."""
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON form, including the throughput."""
+        return dict(asdict(self), per_second=self.per_second)
+
+
+@dataclass
+class Comparison:
+    """Throughput of one stage against the baseline.
+
+    Attributes:
+        stage: Stage name.
+        baseline: Baseline items per second.
+        current: Current items per second.
+        regressed: current is more than the tolerance below baseline.
+    """
+
+    stage: str
+    baseline: float
+    current: float
+    regressed: bool
+
+    @property
+    def change(self) -> float:
+        """Relative throughput change, e.g. -0.25 for 25% slower."""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+
+@dataclass
+class SuiteCorpus:
+    """The generated corpus and the intermediate results later stages reuse."""
+
+    cards: list[dict[str, Any]]
+    sets: list[dict[str, Any]]
+    rows: list[tuple] = field(default_factory=list)
+
+    def table_rows(self) -> list[dict[str, Any]]:
+        """Validated rows as cards table dicts, validating first if needed."""
+        if not self.rows:
+            self.rows = list(iter_card_rows(self.cards))
+        return [dict(zip(CARDS_COLUMNS, row)) for row in self.rows]
+
+
+def best_of(repeat: int, func: Callable[[], T]) -> tuple[float, T]:
+    """Run func repeat times; return the fastest wall time and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result  # type: ignore[return-value]
+
+
+def bench_fetch(corpus: SuiteCorpus, args: argparse.Namespace, stages: list[str]) -> dict[str, StageResult]:
+    """Time the retrieval services against the stub server."""
+    results = {}
+    identifiers = card_identifiers(corpus.cards[: args.fetch_cards])
+    with StubScryfall(corpus.cards, corpus.sets, latency=args.latency):
+        if "fetch_sets" in stages:
+            service = SetsRetrievalService()
+            seconds, sets = best_of(args.repeat, service.get_sets)
+            results["fetch_sets"] = StageResult(len(sets), "sets", seconds)
+        if "fetch_cards" in stages:
+            service = CardsRetrievalService(max_workers=args.workers, requests_per_second=STUB_REQUESTS_PER_SECOND)
+            seconds, cards = best_of(args.repeat, lambda: service.get_cards_collection(identifiers))
+            if len(cards) != len(identifiers):
+                raise RuntimeError(f"Fetched {len(cards)} of {len(identifiers)} cards from the stub")
+            results["fetch_cards"] = StageResult(len(cards), "cards", seconds)
+    return results
+
+
+def delete_cards(card_ids: list[str]) -> None:
+    """Remove the synthetic cards (and, by cascade, their prices) from the database."""
+    with get_cursor() as cur:
+        cur.execute("DELETE FROM cards WHERE id = ANY(%s)", (card_ids,))
+
+
+def bench_upsert(corpus: SuiteCorpus, repeat: int) -> dict[str, StageResult]:
+    """Time load_cards() of new rows and of the same rows again."""
+    corpus.table_rows()
+    card_ids = [card["id"] for card in corpus.cards]
+    inserted = unchanged = float("inf")
+    try:
+        for _ in range(max(1, repeat)):
+            delete_cards(card_ids)
+            seconds, _ = best_of(1, lambda: load_cards(corpus.rows, binary=True))
+            inserted = min(inserted, seconds)
+            seconds, _ = best_of(1, lambda: load_cards(corpus.rows, binary=True))
+            unchanged = min(unchanged, seconds)
+    finally:
+        delete_cards(card_ids)
+    return {
+        "upsert": StageResult(len(corpus.rows), "cards", inserted),
+        "upsert_unchanged": StageResult(len(corpus.rows), "cards", unchanged),
+    }
+
+
+def bench_similarity(corpus: SuiteCorpus, args: argparse.Namespace, stages: list[str]) -> dict[str, StageResult]:
+    """Time vectorization and similarity queries."""
+    results = {}
+    table_rows = corpus.table_rows()
+    vectorizer = CardVectorizer()
+    seconds, matrix = best_of(args.repeat, lambda: vectorizer.transform(table_rows))
+    if "vectorize" in stages:
+        results["vectorize"] = StageResult(len(table_rows), "cards", seconds)
+    search = SimilaritySearch([row["id"] for row in table_rows], matrix, card_masks(table_rows))
+
+    rng = np.random.default_rng(args.seed)
+    query_ids = search.ids[rng.choice(len(search), size=min(args.queries, len(search)), replace=False)].tolist()
+    if "query" in stages:
+        seconds, _ = best_of(args.repeat, lambda: search.most_similar(query_ids, DEFAULT_TOP_K))
+        results["query"] = StageResult(len(query_ids), "queries", seconds)
+    if "query_filtered" in stages:
+        seconds, _ = best_of(
+            args.repeat, lambda: search.most_similar(query_ids, DEFAULT_TOP_K, legal_in="commander", color_identity="WUB")
+        )
+        results["query_filtered"] = StageResult(len(query_ids), "queries", seconds)
+    return results
+
+
+def run_suite(corpus: SuiteCorpus, args: argparse.Namespace) -> dict[str, StageResult]:
+    """Run the selected stages in pipeline order."""
+    stages = [stage for stage in args.stages if args.database or stage not in DATABASE_STAGES]
+    results: dict[str, StageResult] = {}
+    if {"fetch_sets", "fetch_cards"} & set(stages):
+        results.update(bench_fetch(corpus, args, stages))
+    if "validate" in stages:
+        seconds, corpus.rows = best_of(args.repeat, lambda: list(iter_card_rows(corpus.cards)))
+        results["validate"] = StageResult(len(corpus.rows), "cards", seconds)
+    if set(DATABASE_STAGES) & set(stages):
+        results.update(bench_upsert(corpus, args.repeat))
+    if {"vectorize", "query", "query_filtered"} & set(stages):
+        results.update(bench_similarity(corpus, args, stages))
+    return {stage: results[stage] for stage in STAGES if stage in results}
+
+
+def compare_results(
+    current: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float = DEFAULT_TOLERANCE
+) -> list[Comparison]:
+    """Compare the throughput of the stages present in both result sets.
+
+    Args:
+        current: "stages" of the current results JSON.
+        baseline: "stages" of the baseline results JSON.
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        One Comparison per common stage, in STAGES order.
+    """
+    return [
+        Comparison(
+            stage,
+            baseline[stage]["per_second"],
+            current[stage]["per_second"],
+            current[stage]["per_second"] < baseline[stage]["per_second"] * (1 - tolerance),
+        )
+        for stage in STAGES
+        if stage in current and stage in baseline
+    ]
+
+
+def suite_meta(args: argparse.Namespace, corpus: SuiteCorpus) -> dict[str, Any]:
+    """Description of the run stored next to the timings."""
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cards": len(corpus.cards),
+        "sets": len(corpus.sets),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "fetch_cards": args.fetch_cards,
+        "workers": args.workers,
+        "latency": args.latency,
+        "queries": args.queries,
+    }
+
+
+def report(document: dict[str, Any], baseline_path: Path, tolerance: float) -> bool:
+    """Print the results, and the comparison with the baseline if there is one.
+
+    Returns:
+        True if any stage regressed beyond the tolerance.
+    """
+    print(f"{'stage':<18} {'items':>9} {'seconds':>9} {'per second':>12}")
+    for stage, result in document["stages"].items():
+        print(f"{stage:<18} {result['items']:>9,} {result['seconds']:>9.3f} {result['per_second']:>12,.0f} {result['unit']}")
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path} to compare with")
+        return False
+
+    baseline = json.loads(baseline_path.read_text())
+    for key in ("cards", "seed", "cpus"):
+        if baseline["meta"].get(key) != document["meta"][key]:
+            print(f"\nWarning: baseline {key} is {baseline['meta'].get(key)}, this run {document['meta'][key]}")
+    print(f"\n{'stage':<18} {'baseline/s':>12} {'current/s':>12} {'change':>8}")
+    comparisons = compare_results(document["stages"], baseline["stages"], tolerance)
+    for comparison in comparisons:
+        flag = "  REGRESSION" if comparison.regressed else ""
+        print(
+            f"{comparison.stage:<18} {comparison.baseline:>12,.0f} {comparison.current:>12,.0f} "
+            f"{comparison.change:>+8.1%}{flag}"
+        )
+    return any(comparison.regressed for comparison in comparisons)
+
+
+def main() -> None:
+    """Run the suite, write the results and compare them with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=DEFAULT_CARDS, help="number of synthetic card printings")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="corpus random seed")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="stages to run")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per stage; the best is kept")
+    parser.add_argument("--fetch-cards", type=int, default=DEFAULT_FETCH_CARDS, help="cards fetched from the stub")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent collection requests")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub seconds per response")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="similarity query cards")
+    parser.add_argument("--database", action="store_true", help="also time loads into DATABASE_URL")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "latest.json", help="results JSON to write")
+    parser.add_argument("--baseline", type=Path, default=RESULTS_DIR / "baseline.json", help="results JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="also store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    args = parser.parse_args()
+    setup_logging(log_level=logging.WARNING)
+
+    start = time.perf_counter()
+    corpus = SuiteCorpus(*generate_corpus(args.cards, args.seed))
+    print(f"Generated {len(corpus.cards):,} cards in {len(corpus.sets):,} sets in {time.perf_counter() - start:.1f}s\n")
+
+    stages = run_suite(corpus, args)
+    document = {"meta": suite_meta(args, corpus), "stages": {stage: result.to_dict() for stage, result in stages.items()}}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(document, indent=2) + "\n")
+
+    regressed = report(document, args.baseline, args.tolerance)
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nSaved baseline to {args.baseline}")
+    elif regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Micro-benchmark for card validation throughput.
+
+Replicates the bundled schemas/cards_*.json examples into a batch and reports
+cards/sec for:
+
+- per_card: CardsValidation.model_validate() + model_dump() per card, then a
+  tuple built from the dict (the straightforward per-item approach).
+- batch: validate_cards_batch(), one TypeAdapter call per batch emitting
+  tuples in upsert column order.
+
+Run with:
+    PYTHONPATH=src python benchmarks/bench_validation.py --cards 100000
+"""
+
+import argparse
+import json
+import time
+from itertools import batched
+from pathlib import Path
+from typing import Any, Callable
+
+from database.etl.schema_validation import CARDS_UPSERT_COLUMNS, CardsValidation, validate_cards_batch
+
+SCHEMAS_DIR = Path(__file__).resolve().parents[1] / "src" / "database" / "schemas"
+DEFAULT_CARDS = 50_000
+DEFAULT_BATCH_SIZE = 1000
+
+
+def load_fixture_cards() -> list[dict[str, Any]]:
+    """Load the bundled Scryfall card examples."""
+    return [json.loads(path.read_text()) for path in sorted(SCHEMAS_DIR.glob("cards_*.json"))]
+
+
+def validate_per_card(cards: list[dict[str, Any]]) -> list[tuple]:
+    """Baseline: validate and dump one card at a time."""
+    rows = []
+    for card in cards:
+        dumped = CardsValidation.model_validate(card).model_dump()
+        rows.append(tuple(dumped[column] for column in CARDS_UPSERT_COLUMNS))
+    return rows
+
+
+def validate_batched(cards: list[dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE) -> list[tuple]:
+    """Batch path used by the cards ETL."""
+    rows = []
+    for batch in batched(cards, batch_size):
+        rows.extend(validate_cards_batch(list(batch)))
+    return rows
+
+
+def measure(func: Callable[[list[dict[str, Any]]], list[tuple]], cards: list[dict[str, Any]]) -> float:
+    """Return cards/sec for one run of func over cards."""
+    start = time.perf_counter()
+    rows = func(cards)
+    elapsed = time.perf_counter() - start
+    if len(rows) != len(cards):
+        raise RuntimeError(f"{func.__name__} produced {len(rows)} rows for {len(cards)} cards")
+    return len(cards) / elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print cards/sec for each approach."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=DEFAULT_CARDS, help="number of cards to validate")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per approach (best is reported)")
+    args = parser.parse_args()
+
+    fixtures = load_fixture_cards()
+    cards = [fixtures[i % len(fixtures)] for i in range(args.cards)]
+
+    results = {}
+    for name, func in (("per_card", validate_per_card), ("batch", validate_batched)):
+        results[name] = max(measure(func, cards) for _ in range(args.repeat))
+        print(f"{name:>8}: {results[name]:>10,.0f} cards/sec")
+    print(f" speedup: {results['batch'] / results['per_card']:.2f}x ({args.cards:,} cards)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Local stand-in for the Scryfall endpoints used by the ETL.
+
+Serves a synthetic corpus (see synthetic_cards.py) over HTTP/1.1 so the
+retrieval services can be benchmarked without the network or Scryfall's rate
+limits:
+
+- GET /sets and GET /sets/<code>
+- POST /cards/collection, answering up to 75 set + collector_number
+  identifiers with data and not_found like Scryfall does
+
+Card JSON is serialized once up front, so the stub's own cost per request is a
+dict lookup and a join. --latency adds a fixed delay per request to model the
+network round trip.
+
+Used in-process by bench_suite.py, or standalone together with
+SCRYFALL_BASE_URL to run the real ETL scripts against it:
+
+    PYTHONPATH=src python benchmarks/stub_scryfall.py --cards 100000 --port 8765
+    SCRYFALL_BASE_URL=http://127.0.0.1:8765 make run-sets-etl
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from synthetic_cards import generate_corpus
+
+from app.config.api_endpoints import APIEndpointsConfig
+from app.config.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Request handler; the corpus lives on the StubScryfall bound to the server."""
+
+    protocol_version = "HTTP/1.1"
+    server: "_StubServer"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """GET /sets and /sets/<code>."""
+        stub = self.server.stub
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/sets":
+            self._respond(200, stub.sets_body)
+        elif path.startswith("/sets/") and path[len("/sets/"):] in stub.set_bodies:
+            self._respond(200, stub.set_bodies[path[len("/sets/"):]])
+        else:
+            self._respond(404, b'{"object": "error", "status": 404}')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """POST /cards/collection."""
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.rstrip("/") != "/cards/collection":
+            self._respond(404, b'{"object": "error", "status": 404}')
+            return
+        self._respond(200, self.server.stub.collection_body(json.loads(body)["identifiers"]))
+
+    def _respond(self, status: int, body: bytes) -> None:
+        stub = self.server.stub
+        stub.record_request()
+        if stub.latency:
+            time.sleep(stub.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep per-request access logs out of benchmark output."""
+
+
+class _StubServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that knows its StubScryfall."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], stub: "StubScryfall"):
+        super().__init__(address, _StubHandler)
+        self.stub = stub
+
+
+class StubScryfall:  # pylint: disable=too-many-instance-attributes
+    """Threaded HTTP server answering Scryfall requests from an in-memory corpus.
+
+    Use as a context manager: entering starts the server on a background thread
+    and points APIEndpointsConfig at it, exiting restores the endpoints and
+    stops the server.
+
+    Args:
+        cards: Card objects to serve, looked up by set and collector number.
+        sets: Set objects to serve.
+        latency: Seconds to wait before each response.
+        host: Interface to bind.
+        port: Port to bind; 0 picks a free one.
+    """
+
+    def __init__(
+        self,
+        cards: list[dict[str, Any]],
+        sets: list[dict[str, Any]],
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.latency = latency
+        self.card_json = {(card["set"], card["collector_number"]): json.dumps(card).encode() for card in cards}
+        self.sets_body = json.dumps({"object": "list", "has_more": False, "data": sets}).encode()
+        self.set_bodies = {set_object["code"]: json.dumps(set_object).encode() for set_object in sets}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _StubServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+        self._saved_endpoints: dict[str, str] = {}
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server, in place of https://api.scryfall.com."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self) -> None:
+        """Count one answered request."""
+        with self._lock:
+            self.requests += 1
+
+    def collection_body(self, identifiers: list[dict[str, str]]) -> bytes:
+        """Response body of POST /cards/collection for identifiers."""
+        found, not_found = [], []
+        for identifier in identifiers:
+            card = self.card_json.get((identifier.get("set"), identifier.get("collector_number")))
+            if card is None:
+                not_found.append(identifier)
+            else:
+                found.append(card)
+        return b"".join((
+            b'{"object": "list", "not_found": ',
+            json.dumps(not_found).encode(),
+            b', "data": [',
+            b", ".join(found),
+            b"]}",
+        ))
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted, without touching APIEndpointsConfig."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def start(self) -> None:
+        """Serve on a background thread and point APIEndpointsConfig at the server."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-scryfall", daemon=True)
+        self._thread.start()
+        for name, path in (("BASE_URL", ""), ("SETS_ENDPOINT", "/sets"), ("CARDS_COLLECTION_ENDPOINT", "/cards/collection")):
+            self._saved_endpoints[name] = getattr(APIEndpointsConfig, name)
+            setattr(APIEndpointsConfig, name, self.url + path)
+
+    def stop(self) -> None:
+        """Restore the Scryfall endpoints and shut the server down."""
+        for name, value in self._saved_endpoints.items():
+            setattr(APIEndpointsConfig, name, value)
+        self._saved_endpoints.clear()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubScryfall":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """Serve a synthetic corpus until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve a synthetic corpus through Scryfall's endpoints")
+    parser.add_argument("--cards", type=int, default=100_000, help="number of card printings to generate")
+    parser.add_argument("--seed", type=int, default=0, help="corpus random seed")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    setup_logging(log_level=logging.INFO)
+
+    cards, sets = generate_corpus(args.cards, args.seed)
+    stub = StubScryfall(cards, sets, args.latency, args.host, args.port)
+    logger.info("Serving %d cards in %d sets at %s", len(cards), len(sets), stub.url)
+    stub.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
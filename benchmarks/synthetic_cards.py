@@ -0,0 +1,213 @@
+"""Deterministic synthetic Scryfall corpus for benchmarks.
+
+Cards are built from the bundled schemas/cards_*.json examples, so every
+generated card has the exact shape of a Scryfall card object and passes
+CardsValidation, but the values vary the way a real dump does:
+
+- oracle cards get their own name, colors, mana cost, keywords, legalities and
+  rules text (lines recombined from the examples), and 1-4 printings each
+- printings get their own id, set, collector number, release date and prices
+- sets (in the shape of schemas/sets.json) are generated to match
+
+The same seed always yields the same corpus, so results of separate runs are
+comparable.
+"""
+
+import json
+import random
+import uuid
+from datetime import date, timedelta
+from typing import Any
+
+from bench_validation import SCHEMAS_DIR, load_fixture_cards
+
+DEFAULT_SEED = 0
+MEAN_PRINTINGS = 2.0
+CARDS_PER_SET = 250
+SET_TYPES = ("expansion", "core", "masters", "commander", "draft_innovation")
+RARITIES = ("common", "uncommon", "rare", "mythic")
+COLORS = "WUBRG"
+KEYWORD_POOL = ("Flying", "Trample", "Haste", "Vigilance", "Deathtouch", "Lifelink", "Reach", "Flash", "Menace", "Ward")
+ADJECTIVES = (
+    "Ashen", "Blazing", "Crimson", "Drowned", "Elder", "Fabled", "Gilded", "Hollow", "Iron", "Jade",
+    "Kindled", "Lost", "Molten", "Nether", "Obsidian", "Pale", "Quiet", "Radiant", "Sunken", "Thorned",
+)
+NOUNS = (
+    "Acolyte", "Bastion", "Colossus", "Drake", "Echo", "Familiar", "Guardian", "Herald", "Idol", "Juggernaut",
+    "Keeper", "Lancer", "Monolith", "Nomad", "Oracle", "Pact", "Quarry", "Revenant", "Sentinel", "Tithe",
+    "Umbra", "Vanguard", "Wurm", "Zealot",
+)
+FIRST_RELEASE = date(1993, 8, 5)
+
+
+def load_fixture_set() -> dict[str, Any]:
+    """Load the bundled Scryfall set example."""
+    return json.loads((SCHEMAS_DIR / "sets.json").read_text())
+
+
+def oracle_name(index: int) -> str:
+    """Unique card name of the index-th oracle card."""
+    name = f"{ADJECTIVES[index % len(ADJECTIVES)]} {NOUNS[index // len(ADJECTIVES) % len(NOUNS)]}"
+    cycle = index // (len(ADJECTIVES) * len(NOUNS))
+    return f"{name} {cycle + 1}" if cycle else name
+
+
+def mana_cost(rng: random.Random, colors: list[str], cmc: int) -> str:
+    """Mana cost with one pip per color and the rest generic, e.g. {2}{G}{U}."""
+    pips = [color for color in COLORS if color in colors][:cmc]
+    generic = cmc - len(pips)
+    cost = f"{{{generic}}}" if generic or not pips else ""
+    return cost + "".join(f"{{{pip}}}" for pip in pips) if cmc or rng.random() < 0.5 else ""
+
+
+class _CorpusBuilder:
+    """Random state and fixture pools shared while one corpus is generated."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.templates = load_fixture_cards()
+        # Legendary cards refer to themselves by their first name ("Ureni enters")
+        names = [template["name"].split()[0] for template in self.templates]
+        self.lines = sorted({
+            line
+            for template in self.templates
+            for line in (template.get("oracle_text") or "").split("\n")
+            if line and not any(name in line for name in names)
+        })
+        self.named_lines = sorted({
+            line.replace(name, "~")
+            for template, name in zip(self.templates, names)
+            for line in (template.get("oracle_text") or "").split("\n")
+            if name in line
+        })
+        self.formats = list(self.templates[0]["legalities"])
+
+    def uuid(self) -> str:
+        """Random but reproducible UUID4 string."""
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def oracle_card(self, index: int) -> dict[str, Any]:
+        """Fields shared by every printing of one oracle card."""
+        rng = self.rng
+        template = self.templates[index % len(self.templates)]
+        name = oracle_name(index)
+        is_land = "Land" in template["type_line"]
+        identity = [] if is_land else sorted(rng.sample(COLORS, rng.choice((0, 1, 1, 1, 2, 2, 3))), key=COLORS.index)
+        cmc = 0 if is_land else rng.randint(0, 7)
+        is_creature = "Creature" in template["type_line"]
+        keywords = sorted(rng.sample(KEYWORD_POOL, rng.randint(0, 3))) if is_creature else []
+
+        lines = rng.sample(self.lines, rng.randint(1, 2)) + rng.sample(self.named_lines, rng.randint(0, 1))
+        if keywords:
+            lines.insert(0, ", ".join(keywords).capitalize())
+        legalities = {
+            fmt: "legal" if rng.random() < 0.6 else ("banned" if rng.random() < 0.02 else "not_legal")
+            for fmt in self.formats
+        }
+        oracle = {
+            "template": template,
+            "oracle_id": self.uuid(),
+            "name": name,
+            "mana_cost": "" if is_land else mana_cost(rng, identity, cmc),
+            "cmc": float(cmc),
+            "oracle_text": "\n".join(line.replace("~", name) for line in lines),
+            "colors": identity,
+            "color_identity": identity,
+            "keywords": keywords,
+            "legalities": legalities,
+            "rarity": rng.choice(RARITIES),
+            "edhrec_rank": rng.randint(1, 30_000),
+            "penny_rank": rng.randint(1, 10_000) if rng.random() < 0.5 else None,
+        }
+        if is_creature:
+            oracle["power"] = str(rng.randint(0, 6))
+            oracle["toughness"] = str(rng.randint(1, 6))
+        return oracle
+
+    def printing(self, oracle: dict[str, Any], set_object: dict[str, Any], collector_number: int) -> dict[str, Any]:
+        """One printing of an oracle card in a set."""
+        rng = self.rng
+        card = dict(oracle["template"])
+        card.update({key: value for key, value in oracle.items() if key != "template"})
+        usd = round(rng.lognormvariate(-1.0, 1.5), 2)
+        card.update({
+            "id": self.uuid(),
+            "set": set_object["code"],
+            "set_name": set_object["name"],
+            "set_type": set_object["set_type"],
+            "released_at": set_object["released_at"],
+            "collector_number": str(collector_number),
+            "promo": rng.random() < 0.05,
+            "reprint": collector_number > 1 and rng.random() < 0.5,
+            "prices": {
+                "usd": f"{usd:.2f}",
+                "usd_foil": f"{usd * 2.5:.2f}" if rng.random() < 0.6 else None,
+                "usd_etched": None,
+                "eur": f"{usd * 0.9:.2f}" if rng.random() < 0.8 else None,
+                "eur_foil": None,
+                "tix": f"{usd * 0.1:.2f}" if rng.random() < 0.5 else None,
+            },
+        })
+        return card
+
+
+def generate_sets(count: int, seed: int = DEFAULT_SEED) -> list[dict[str, Any]]:
+    """Generate count set objects, released in order about a month apart."""
+    rng = random.Random(seed)
+    template = load_fixture_set()
+    sets = []
+    for index in range(count):
+        code = f"x{index:03d}" if index < 1000 else f"x{index}"
+        released = FIRST_RELEASE + timedelta(days=30 * index + rng.randint(0, 20))
+        sets.append(dict(
+            template,
+            id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            code=code,
+            mtgo_code=code,
+            arena_code=None,
+            tcgplayer_id=None,
+            name=f"Synthetic Set {index + 1}",
+            search_uri=f"https://api.scryfall.com/cards/search?order=set&q=e%3A{code}&unique=prints",
+            released_at=released.isoformat(),
+            set_type=SET_TYPES[index % len(SET_TYPES)],
+            card_count=0,
+            icon_svg_uri=f"https://svgs.scryfall.io/sets/{code}.svg",
+        ))
+    return sets
+
+
+def generate_corpus(
+    cards: int, seed: int = DEFAULT_SEED, mean_printings: float = MEAN_PRINTINGS
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Generate a synthetic corpus of card printings and the sets they belong to.
+
+    Args:
+        cards: Number of printings (card objects) to generate.
+        seed: Random seed; the same seed gives the same corpus.
+        mean_printings: Average printings per oracle card.
+
+    Returns:
+        (cards, sets): card objects as returned by /cards/collection and set
+        objects as returned by /sets, with card_count filled in.
+    """
+    builder = _CorpusBuilder(seed)
+    sets = generate_sets(max(1, cards // CARDS_PER_SET), seed)
+    next_number = [1] * len(sets)
+    result: list[dict[str, Any]] = []
+    index = 0
+    max_printings = max(1, round(2 * mean_printings - 1))
+    while len(result) < cards:
+        oracle = builder.oracle_card(index)
+        index += 1
+        for _ in range(min(builder.rng.randint(1, max_printings), cards - len(result))):
+            set_index = builder.rng.randrange(len(sets))
+            result.append(builder.printing(oracle, sets[set_index], next_number[set_index]))
+            next_number[set_index] += 1
+    for set_object, count in zip(sets, next_number):
+        set_object["card_count"] = count - 1
+    return result, sets
+
+
+def card_identifiers(cards: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """/cards/collection identifiers (set + collector number) of cards."""
+    return [{"set": card["set"], "collector_number": card["collector_number"]} for card in cards]
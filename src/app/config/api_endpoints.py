@@ -2,8 +2,12 @@
 Module for Scryfall API endpoint configurations.
 
 Scryfall API docs: https://scryfall.com/docs/api
+
+Set SCRYFALL_BASE_URL to send requests elsewhere, e.g. to the stub server of
+the benchmark suite (benchmarks/stub_scryfall.py).
 """
 
+import os
 from typing import Optional
 
 
@@ -12,7 +16,7 @@ class APIEndpointsConfig:
     Storage class for Scryfall API endpoint URLs and default headers.
     """
 
-    BASE_URL = "https://api.scryfall.com"
+    BASE_URL = os.getenv("SCRYFALL_BASE_URL", "https://api.scryfall.com").rstrip("/")
     SETS_ENDPOINT = f"{BASE_URL}/sets"
     CARDS_COLLECTION_ENDPOINT = f"{BASE_URL}/cards/collection"
 
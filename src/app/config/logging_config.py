@@ -1,15 +1,183 @@
-"""Centralized logging configuration for the application."""
+"""Centralized logging configuration for the application.
 
+By default records are written synchronously to stdout and app.log by the
+thread that logs them. Batch jobs can opt in to extras, via arguments or
+environment variables (so every script's main() picks them up):
+
+- use_queue / LOG_QUEUE=1: the root logger only puts records on an in-memory
+  queue (QueueHandler); a QueueListener thread formats and writes them, so
+  console and disk I/O never block the logging thread. The listener flushes
+  when the queue runs empty rather than after every record.
+- json_lines / LOG_JSON=1: one JSON object per line instead of plain text.
+- max_bytes / LOG_MAX_BYTES: rotate the log file at this size, keeping
+  backup_count old files.
+- sample_every / LOG_SAMPLE_EVERY: keep only every Nth DEBUG/INFO record of
+  each message template (e.g. "Batch %d: Retrieved %d cards"); warnings and
+  errors are always kept.
+
+Call shutdown_logging() (registered with atexit) to flush the queue.
+"""
+
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+
+DEFAULT_BACKUP_COUNT = 5
+
+_listener: Optional[logging.handlers.QueueListener] = None  # pylint: disable=invalid-name
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as single-line JSON objects (time, level, logger, message, exception)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every Nth record per (logger, message template) below WARNING.
+
+    Sampling by template rather than by logger keeps rare INFO messages of a
+    chatty module (e.g. run summaries) next to its per-batch messages. The
+    first occurrence of each template is always kept.
+
+    Args:
+        every: Keep one record in this many; 1 keeps everything.
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        if every < 1:
+            raise ValueError(f"every must be positive, got {every}")
+        self.every = every
+        self._seen: dict[tuple[str, object], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+        return seen % self.every == 0
+
+
+class _MessageQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener's handlers.
+
+    The stock prepare() runs a full Formatter.format() in the logging thread
+    and folds the traceback into the message. Only the message arguments need
+    merging up front (they may be mutated after the call returns); the
+    traceback is rendered to exc_text because traceback objects pin frames.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A __dict__ copy is a fraction of the cost of copy.copy()
+        prepared = logging.LogRecord.__new__(logging.LogRecord)
+        prepared.__dict__.update(record.__dict__)
+        prepared.msg = prepared.message = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
+
+
+class _DeferredFlushMixin:
+    """Handler mixin for the listener side: emit() no longer flushes after every record.
+
+    The listener calls flush_pending() whenever the queue runs empty, so a burst
+    of records becomes a few large writes instead of one write and flush each.
+    """
+
+    def flush(self) -> None:
+        """Skip the per-record flush of StreamHandler.emit()."""
 
+    def flush_pending(self) -> None:
+        """Flush everything written so far."""
+        super().flush()  # type: ignore[misc]
 
-def setup_logging(
+    def close(self) -> None:
+        """Flush, then close."""
+        self.flush_pending()
+        super().close()  # type: ignore[misc]
+
+
+class _QueuedStreamHandler(_DeferredFlushMixin, logging.StreamHandler):
+    """StreamHandler flushed by the queue listener."""
+
+
+class _QueuedFileHandler(_DeferredFlushMixin, logging.FileHandler):
+    """FileHandler flushed by the queue listener."""
+
+
+class _QueuedRotatingFileHandler(_DeferredFlushMixin, logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler flushed by the queue listener."""
+
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers each time the queue is drained."""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            return self.queue.get(block=False)
+        except queue.Empty:
+            for handler in self.handlers:
+                if isinstance(handler, _DeferredFlushMixin):
+                    handler.flush_pending()
+            return self.queue.get(block=block)
+
+
+def _env_flag(name: str) -> bool:
+    """True if an environment variable is set to 1/true/yes."""
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def shutdown_logging() -> None:
+    """Stop the queue listener, writing out every queued record, and close its handlers.
+
+    Safe to call more than once.
+    """
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def setup_logging(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
     log_level: int = logging.INFO, #means "show INFO and above" per default
     log_file: str = "app.log",
     log_to_console: bool = True,
-    log_to_file: bool = True
+    log_to_file: bool = True,
+    use_queue: Optional[bool] = None,
+    json_lines: Optional[bool] = None,
+    max_bytes: Optional[int] = None,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    sample_every: Optional[int] = None,
 ) -> None:
     """
     Configure application-wide logging.
@@ -19,31 +187,46 @@ def setup_logging(
         log_file: Path to the log file
         log_to_console: Whether to output logs to console
         log_to_file: Whether to output logs to file
+        use_queue: Write logs on a background thread (default: LOG_QUEUE env var)
+        json_lines: Emit JSON lines instead of text (default: LOG_JSON env var)
+        max_bytes: Rotate the log file at this size; 0 never rotates (default: LOG_MAX_BYTES env var)
+        backup_count: Number of rotated files kept
+        sample_every: Keep every Nth DEBUG/INFO record per message (default: LOG_SAMPLE_EVERY env var, 1)
 
     Example:
         from src.app.config.logging_config import setup_logging
         setup_logging(log_level=logging.DEBUG)
+        setup_logging(use_queue=True, json_lines=True, max_bytes=50_000_000, sample_every=10)
     """
+    use_queue = _env_flag("LOG_QUEUE") if use_queue is None else use_queue
+    json_lines = _env_flag("LOG_JSON") if json_lines is None else json_lines
+    max_bytes = int(os.getenv("LOG_MAX_BYTES", "0")) if max_bytes is None else max_bytes
+    sample_every = int(os.getenv("LOG_SAMPLE_EVERY", "1")) if sample_every is None else sample_every
+
     # Create root logger
     root_logger = logging.getLogger()
     #other loggers will inherit this configuration when set up with logging.getLogger(__name__) in their respective modules
     root_logger.setLevel(log_level)
 
-    # Remove any existing handlers to avoid duplicates
+    # Remove any existing handlers to avoid duplicates (and flush a previous queue)
+    shutdown_logging()
     root_logger.handlers.clear()
 
     # Define log format
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    formatter: logging.Formatter
+    if json_lines:
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
+    handlers: list[logging.Handler] = []
 
     # Console handler
     if log_to_console:
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(log_level)
-        console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
+        handlers.append(_QueuedStreamHandler(sys.stdout) if use_queue else logging.StreamHandler(sys.stdout))
 
     # File handler
     if log_to_file:
@@ -51,7 +234,31 @@ def setup_logging(
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
 
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(log_level)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        if max_bytes:
+            rotating_class = _QueuedRotatingFileHandler if use_queue else logging.handlers.RotatingFileHandler
+            handlers.append(rotating_class(log_file, maxBytes=max_bytes, backupCount=backup_count))
+        else:
+            handlers.append(_QueuedFileHandler(log_file) if use_queue else logging.FileHandler(log_file))
+
+    for handler in handlers:
+        handler.setLevel(log_level)
+        handler.setFormatter(formatter)
+
+    if use_queue:
+        # The logging thread only copies the record; formatting and I/O happen on the listener thread
+        queue_handler = _MessageQueueHandler(queue.SimpleQueue())
+        handlers_to_attach: list[logging.Handler] = [queue_handler]
+        global _listener  # pylint: disable=global-statement
+        _listener = _FlushingQueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        handlers_to_attach = handlers
+
+    # Drop sampled-out records before they are formatted or queued
+    if sample_every > 1:
+        sampler = SamplingFilter(sample_every)
+        for handler in handlers_to_attach:
+            handler.addFilter(sampler)
+
+    for handler in handlers_to_attach:
+        root_logger.addHandler(handler)
@@ -0,0 +1,296 @@
+"""
+Lightweight in-process metrics: counters, histograms and timing spans.
+
+The ETL records how long each HTTP request, collection batch, validation
+batch and database transaction takes, and how many cards went through each
+step. Recording is off by default; disabled calls return immediately (a span
+is a shared no-op context manager), so instrumented hot paths cost a function
+call and a flag check.
+
+Enable it for a run by setting METRICS_FILE; the metrics are written there at
+interpreter exit, as JSON if the name ends in .json and in the Prometheus text
+exposition format (e.g. for node_exporter's textfile collector) otherwise:
+
+    METRICS_FILE=metrics.prom PYTHONPATH=src python -m database.etl.sets.sets_etl
+
+Or from code:
+
+    from app import metrics
+
+    metrics.enable()
+    with metrics.span("cards_load", source="bulk"):
+        ...
+    metrics.increment("cards_loaded_total", len(rows))
+    metrics.write("metrics.json")
+"""
+
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+METRICS_PREFIX = "mtg_"
+# Upper bounds (seconds) of the histogram buckets; +Inf is implicit
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+_DISABLED_SPAN = nullcontext()
+
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+    """Hashable, ordered form of a label dict; booleans become "true"/"false"."""
+    return tuple(
+        sorted((name, str(value).lower() if isinstance(value, bool) else str(value)) for name, value in labels.items())
+    )
+
+
+def _format_labels(key: LabelKey, extra: Optional[tuple[str, str]] = None) -> str:
+    """Prometheus label set, e.g. {method="POST",le="0.5"}; empty without labels."""
+    pairs = key + ((extra,) if extra else ())
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+@dataclass
+class Histogram:
+    """Distribution of observed values over fixed buckets.
+
+    Attributes:
+        buckets: Ascending bucket upper bounds.
+        counts: Observations per bucket (not cumulative); the last entry is +Inf.
+        total: Sum of all observations.
+        count: Number of observations.
+        minimum: Smallest observation.
+        maximum: Largest observation.
+    """
+
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+    minimum: float = float("inf")
+    maximum: float = float("-inf")
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le, observations <= le) pairs as in Prometheus, ending with +Inf."""
+        running = 0
+        result = []
+        for bound, count in zip([*map(repr, self.buckets), "+Inf"], self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def summary(self) -> dict[str, Any]:
+        """JSON form: count, sum, mean, min, max and cumulative buckets."""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.minimum if self.count else None,
+            "max": self.maximum if self.count else None,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class _Span:
+    """Times a block and records it in a histogram named <name>_seconds.
+
+    A block that raises also increments <name>_errors_total.
+    """
+
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.registry.observe(f"{self.name}_seconds", time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            self.registry.increment(f"{self.name}_errors_total", **self.labels)
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters and histograms, keyed by name and labels.
+
+    Args:
+        buckets: Bucket upper bounds of every histogram.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, LabelKey], float] = {}
+        self._histograms: dict[tuple[str, LabelKey], Histogram] = {}
+
+    def enable(self) -> None:
+        """Start recording."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording; recorded values are kept."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop every recorded value."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def increment(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Add value to a counter (no-op while disabled)."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one value in a histogram (no-op while disabled)."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def span(self, name: str, **labels: Any) -> ContextManager:
+        """Context manager timing its block into the <name>_seconds histogram."""
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, name, labels)
+
+    def timed(self, name: Optional[str] = None, **labels: Any) -> Callable[[F], F]:
+        """Decorator timing every call of a function as a span (default name: the function's)."""
+
+        def decorator(func: F) -> F:
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, span_name, labels):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0.0)
+
+    def histogram(self, name: str, **labels: Any) -> Optional[Histogram]:
+        """Histogram of a name and label set, if anything was observed."""
+        with self._lock:
+            return self._histograms.get((name, _label_key(labels)))
+
+    def to_json(self) -> dict[str, Any]:
+        """Summary of every counter and histogram."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(key), "value": value}
+                for (name, key), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {"name": name, "labels": dict(key), **histogram.summary()}
+                for (name, key), histogram in sorted(self._histograms.items(), key=lambda item: item[0])
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format, names prefixed with METRICS_PREFIX."""
+        lines: list[str] = []
+        with self._lock:
+            seen: set[str] = set()
+            for (name, key), value in sorted(self._counters.items()):
+                metric = METRICS_PREFIX + name
+                if metric not in seen:
+                    seen.add(metric)
+                    lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{_format_labels(key)} {value!r}")
+            for (name, key), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                metric = METRICS_PREFIX + name
+                if metric not in seen:
+                    seen.add(metric)
+                    lines.append(f"# TYPE {metric} histogram")
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{metric}_bucket{_format_labels(key, ('le', bound))} {count}")
+                lines.append(f"{metric}_sum{_format_labels(key)} {histogram.total!r}")
+                lines.append(f"{metric}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | Path) -> None:
+        """Write the metrics to path: JSON for *.json, Prometheus text otherwise.
+
+        The file is replaced atomically, so a collector never reads a partial file.
+        """
+        path = Path(path)
+        if path.suffix == ".json":
+            content = json.dumps(self.to_json(), indent=2) + "\n"
+        else:
+            content = self.to_prometheus()
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        tmp_path.replace(path)
+        logger.info("Wrote metrics to %s", path)
+
+
+REGISTRY = MetricsRegistry()
+
+enable = REGISTRY.enable
+disable = REGISTRY.disable
+reset = REGISTRY.reset
+increment = REGISTRY.increment
+observe = REGISTRY.observe
+span = REGISTRY.span
+timed = REGISTRY.timed
+write = REGISTRY.write
+
+
+def export_on_exit(path: str | Path) -> None:
+    """Enable recording and write the metrics to path when the interpreter exits."""
+    REGISTRY.enable()
+    atexit.register(REGISTRY.write, path)
+
+
+if os.getenv("METRICS_FILE"):
+    export_on_exit(os.environ["METRICS_FILE"])
@@ -0,0 +1,351 @@
+"""
+Approximate nearest-neighbour search over card vectors.
+
+IVFIndex is an inverted-file index in pure NumPy: the corpus is clustered with
+spherical k-means into nlist cells, vectors are stored contiguously per cell,
+and a query is only scored against the nprobe cells whose centroids are
+closest to it. nlist and nprobe are the recall/speed knobs: more probed cells
+means higher recall and slower queries.
+
+upsert() and remove() update a built index without retraining: new and
+changed vectors are assigned to their nearest existing centroid and the
+cells are re-laid out, removed vectors are tombstoned until compact(). The
+centroids drift from the data as sets are added, so call build() again
+after large changes.
+
+evaluate_index() measures recall@k and p50/p99 single-query latency of an
+index against exact search (SimilaritySearch).
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.services.vector_service import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_COMPACT_THRESHOLD,
+    DEFAULT_TOP_K,
+    SimilaritySearch,
+    normalize_rows,
+    top_k,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NPROBE = 8
+DEFAULT_KMEANS_ITERATIONS = 10
+# k-means is trained on at most this many points per cell
+TRAINING_POINTS_PER_LIST = 64
+INDEX_FORMAT_VERSION = 1
+
+
+@dataclass
+class AnnEvaluation:
+    """Quality and latency of an ANN index compared with exact search.
+
+    Attributes:
+        queries: Number of queries evaluated.
+        k: Neighbours per query.
+        recall: Mean fraction of the exact top k found by the index.
+        p50_ms / p99_ms: Single-query latency percentiles of the index.
+        exact_p50_ms / exact_p99_ms: Same percentiles for exact search.
+    """
+
+    queries: int
+    k: int
+    recall: float
+    p50_ms: float
+    p99_ms: float
+    exact_p50_ms: float
+    exact_p99_ms: float
+
+
+def assign_to_centroids(
+    vectors: np.ndarray, centroids: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE * 16
+) -> np.ndarray:
+    """Return the index of the most similar centroid for each vector, in blocks."""
+    assignments = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start:start + block_size]
+        assignments[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, nlist: int, iterations: int = DEFAULT_KMEANS_ITERATIONS, seed: int = 0
+) -> np.ndarray:
+    """Cluster unit vectors by cosine similarity.
+
+    Args:
+        vectors: L2-normalized float32 array of shape (n, dim).
+        nlist: Number of clusters.
+        iterations: Lloyd iterations.
+        seed: Seed for the initial centroids and for reseeding empty clusters.
+
+    Returns:
+        L2-normalized centroids of shape (nlist, dim).
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign_to_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:  # pylint: disable=too-many-instance-attributes
+    """
+    Inverted-file ANN index with cosine similarity.
+
+    Args:
+        nlist: Number of cells; defaults to sqrt(corpus size) when built.
+        nprobe: Cells scanned per query (the recall/speed knob).
+        kmeans_iterations: Lloyd iterations used to train the centroids.
+        seed: Seed for training, so rebuilding gives the same index.
+    """
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+        kmeans_iterations: int = DEFAULT_KMEANS_ITERATIONS,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.ids = np.empty(0, dtype=str)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.intp)
+        self.live = np.ones(0, dtype=bool)
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _layout(self, ids: np.ndarray, vectors: np.ndarray, assignments: np.ndarray) -> None:
+        """Store each cell's vectors contiguously so a probe is a slice, not a gather."""
+        order = np.argsort(assignments, kind="stable")
+        self.vectors = vectors[order]
+        self.ids = ids[order]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=self.nlist))))
+        self.live = np.ones(len(ids), dtype=bool)
+        self._dead = 0
+
+    def _assignments(self) -> np.ndarray:
+        """Cell of every stored vector, recovered from the offsets."""
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    def build(self, ids: Sequence[str], vectors: np.ndarray) -> "IVFIndex":
+        """Train the centroids and fill the inverted lists.
+
+        Args:
+            ids: Card id of each vector row.
+            vectors: Array of shape (len(ids), dim).
+
+        Returns:
+            self, for chaining.
+        """
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        vectors = normalize_rows(np.array(vectors, dtype=np.float32))
+        nlist = min(self.nlist or max(1, int(np.sqrt(len(vectors)))), len(vectors))
+        self.nlist = nlist
+
+        start = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), nlist * TRAINING_POINTS_PER_LIST)
+        sample = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+        self.centroids = spherical_kmeans(sample, nlist, self.kmeans_iterations, self.seed)
+
+        self._layout(np.asarray(ids), vectors, assign_to_centroids(vectors, self.centroids))
+        logger.info(
+            "Built IVF index over %d vectors with %d lists in %.2fs",
+            len(vectors),
+            nlist,
+            time.perf_counter() - start,
+        )
+        return self
+
+    @property
+    def dead(self) -> int:
+        """Number of tombstoned vectors awaiting compaction."""
+        return self._dead
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray) -> "IVFIndex":
+        """Add new vectors and replace existing ones, keeping the trained centroids.
+
+        Tombstoned vectors are dropped in the same re-layout.
+
+        Args:
+            ids: Card ids; ids already in the index are replaced.
+            vectors: Array of shape (len(ids), dim).
+
+        Returns:
+            self, for chaining.
+        """
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        vectors = normalize_rows(np.array(vectors, dtype=np.float32))
+        keep = np.flatnonzero(self.live & ~np.isin(self.ids, np.asarray(ids)))
+        self._layout(
+            np.concatenate([self.ids[keep], np.asarray(ids)]),
+            np.concatenate([self.vectors[keep], vectors]),
+            np.concatenate([self._assignments()[keep], assign_to_centroids(vectors, self.centroids)]),
+        )
+        return self
+
+    def remove(self, ids: Sequence[str], compact_threshold: float = DEFAULT_COMPACT_THRESHOLD) -> int:
+        """Tombstone vectors; ids that are not indexed are ignored.
+
+        Args:
+            ids: Card ids to remove.
+            compact_threshold: compact() once this share of vectors is tombstoned.
+
+        Returns:
+            Number of vectors tombstoned.
+        """
+        hit = self.live & np.isin(self.ids, np.asarray(ids))
+        removed = int(np.count_nonzero(hit))
+        self.live &= ~hit
+        self._dead += removed
+        if self._dead and self._dead >= compact_threshold * len(self):
+            self.compact()
+        return removed
+
+    def compact(self) -> "IVFIndex":
+        """Drop tombstoned vectors from the cells."""
+        keep = np.flatnonzero(self.live)
+        self._layout(self.ids[keep], self.vectors[keep], self._assignments()[keep])
+        return self
+
+    def search(
+        self, queries: np.ndarray, k: int = DEFAULT_TOP_K, nprobe: Optional[int] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find approximately the k most similar vectors for each query.
+
+        Args:
+            queries: Array of shape (queries, dim) or a single (dim,) vector.
+            k: Number of neighbours per query.
+            nprobe: Cells to scan; defaults to the index's nprobe.
+
+        Returns:
+            (indices, scores) arrays of shape (queries, k), best first.
+            Indices refer to self.ids; rows with fewer than k candidates are
+            padded with -1 and -inf.
+        """
+        queries = normalize_rows(np.array(np.atleast_2d(queries), dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, self.nlist or 1)
+        probes, _ = top_k(queries @ self.centroids.T, nprobe)
+
+        indices = np.full((len(queries), k), -1, dtype=np.intp)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, (query, cells) in enumerate(zip(queries, probes)):
+            # Score each probed cell in place (slices are views), no vector copies
+            ranges = [(self.offsets[cell], self.offsets[cell + 1]) for cell in cells]
+            candidates = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+            candidate_scores = np.concatenate([self.vectors[start:stop] @ query for start, stop in ranges])
+            if self._dead:
+                candidate_scores[~self.live[candidates]] = -np.inf
+            found, found_scores = top_k(candidate_scores[np.newaxis, :], k)
+            indices[row, :found.shape[1]] = np.where(np.isneginf(found_scores[0]), -1, candidates[found[0]])
+            scores[row, :found.shape[1]] = found_scores[0]
+        return indices, scores
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to a .npz file (compacting it first)."""
+        if self.dead:
+            self.compact()
+        params = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "kmeans_iterations": self.kmeans_iterations,
+            "seed": self.seed,
+        }
+        with Path(path).open("wb") as f:
+            np.savez(
+                f,
+                ids=self.ids.astype(str),
+                vectors=self.vectors,
+                centroids=self.centroids,
+                offsets=self.offsets,
+                params=np.array(json.dumps(params)),
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "IVFIndex":
+        """Read an index written by save().
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            params = json.loads(str(data["params"]))
+            if params.pop("format_version") != INDEX_FORMAT_VERSION:
+                raise ValueError(f"{path} was written by an incompatible index version")
+            index = cls(**params)
+            index.ids = data["ids"]
+            index.vectors = data["vectors"]
+            index.centroids = data["centroids"]
+            index.offsets = data["offsets"]
+            index.live = np.ones(len(index.ids), dtype=bool)
+        return index
+
+
+def _latencies_ms(search, queries: np.ndarray, k: int) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Run one query at a time, returning per-query latency and result indices."""
+    latencies = np.empty(len(queries))
+    results = []
+    for row, query in enumerate(queries):
+        start = time.perf_counter()
+        indices, _ = search(query, k)
+        latencies[row] = (time.perf_counter() - start) * 1000
+        results.append(indices[0])
+    return latencies, results
+
+
+def evaluate_index(
+    index, exact: SimilaritySearch, queries: np.ndarray, k: int = DEFAULT_TOP_K
+) -> AnnEvaluation:
+    """Compare an ANN index with exact search on the same corpus.
+
+    Args:
+        index: Built ANN index, or anything else with ids and search(query, k),
+            such as a quantized EmbeddingStore.
+        exact: Exact search over the same ids and vectors.
+        queries: Query vectors of shape (queries, dim).
+        k: Neighbours per query.
+
+    Returns:
+        AnnEvaluation with recall@k and latency percentiles.
+    """
+    ann_latencies, ann_results = _latencies_ms(index.search, queries, k)
+    exact_latencies, exact_results = _latencies_ms(exact.search, queries, k)
+
+    hits = 0
+    for ann_indices, exact_indices in zip(ann_results, exact_results):
+        found = set(index.ids[ann_indices[ann_indices >= 0]].tolist())
+        hits += len(found & set(exact.ids[exact_indices].tolist()))
+    return AnnEvaluation(
+        queries=len(queries),
+        k=k,
+        recall=hits / (len(queries) * k),
+        p50_ms=float(np.percentile(ann_latencies, 50)),
+        p99_ms=float(np.percentile(ann_latencies, 99)),
+        exact_p50_ms=float(np.percentile(exact_latencies, 50)),
+        exact_p99_ms=float(np.percentile(exact_latencies, 99)),
+    )
@@ -0,0 +1,96 @@
+"""
+Bitmask encodings of format legality and color identity.
+
+Each card gets two small integers:
+
+- legal_formats: bit i is set if the card is 'legal' in FORMATS[i]
+- color_identity_bits: bit i is set if COLORS[i] is in its color identity
+
+In memory these are NumPy uint32 / uint8 arrays, so a filter such as "legal in
+Commander within color identity WUB" is two vectorized bitwise operations over
+the whole corpus. In Postgres the same values are generated columns of cards
+(see cards.sql); the bit order here must match that file.
+"""
+
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+COLORS = ("W", "U", "B", "R", "G")
+
+# Scryfall legalities keys; append new formats at the end to keep existing bits stable
+FORMATS = (
+    "standard", "future", "historic", "timeless", "gladiator", "pioneer", "modern",
+    "legacy", "pauper", "vintage", "penny", "commander", "oathbreaker", "standardbrawl",
+    "brawl", "alchemy", "paupercommander", "duel", "oldschool", "premodern", "predh",
+)
+
+FORMAT_BITS = {name: 1 << position for position, name in enumerate(FORMATS)}
+COLOR_BITS = {color: 1 << position for position, color in enumerate(COLORS)}
+ALL_COLORS = sum(COLOR_BITS.values())
+
+
+def legality_mask(legalities: Optional[Mapping[str, str]]) -> int:
+    """Bitset of the formats a card is legal in ('restricted' and 'banned' do not count)."""
+    mask = 0
+    for name, status in (legalities or {}).items():
+        if status == "legal" and name in FORMAT_BITS:
+            mask |= FORMAT_BITS[name]
+    return mask
+
+
+def color_mask(colors: Optional[Iterable[str]]) -> int:
+    """Bitset of a list of color letters (unknown letters are ignored)."""
+    mask = 0
+    for color in colors or ():
+        mask |= COLOR_BITS.get(color, 0)
+    return mask
+
+
+def format_bit(format_name: str) -> int:
+    """Bit of a format.
+
+    Raises:
+        ValueError: If the format is not in FORMATS.
+    """
+    try:
+        return FORMAT_BITS[format_name]
+    except KeyError:
+        raise ValueError(f"Unknown format {format_name!r}, expected one of {FORMATS}") from None
+
+
+def card_masks(cards: Sequence[Mapping[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the legality and color identity bitsets of a batch of cards table rows.
+
+    Returns:
+        (legal_formats uint32, color_identity_bits uint8) arrays of len(cards).
+    """
+    legal = np.fromiter((legality_mask(card.get("legalities")) for card in cards), dtype=np.uint32, count=len(cards))
+    colors = np.fromiter((color_mask(card.get("color_identity")) for card in cards), dtype=np.uint8, count=len(cards))
+    return legal, colors
+
+
+def filter_mask(
+    legal_formats: np.ndarray,
+    color_identity_bits: np.ndarray,
+    legal_in: Optional[str] = None,
+    color_identity: Optional[Iterable[str]] = None,
+) -> np.ndarray:
+    """Boolean mask of the cards passing the filters.
+
+    Args:
+        legal_formats: uint32 legality bitsets.
+        color_identity_bits: uint8 color identity bitsets.
+        legal_in: Keep cards legal in this format.
+        color_identity: Keep cards whose color identity is within these colors.
+
+    Returns:
+        Boolean array, True for cards to keep.
+    """
+    keep = np.ones(len(legal_formats), dtype=bool)
+    if legal_in is not None:
+        keep &= (legal_formats & np.uint32(format_bit(legal_in))) != 0
+    if color_identity is not None:
+        outside = np.uint8(ALL_COLORS & ~color_mask(color_identity))
+        keep &= (color_identity_bits & outside) == 0
+    return keep
@@ -0,0 +1,225 @@
+"""
+Memory-mapped on-disk store for card vectors.
+
+A store file holds a fixed header, the vector matrix (float32, float16 or
+int8) and the card id table:
+
+    header   magic, format version, dtype, count, dim, feature-schema fingerprint,
+             and the byte offsets of the sections below
+    scales   float32 per-row scale (int8 only)
+    matrix   count x dim values, row-major, 64-byte aligned
+    ids      UTF-8 card ids separated by newlines
+
+EmbeddingStore.open() maps the file read-only with np.memmap instead of
+reading it, so opening is near-instant and worker processes serving the same
+file share its pages through the OS page cache.
+
+int8 stores use symmetric per-row scalar quantization (value / scale rounded
+to [-127, 127]) at a quarter of the float32 size; the ranking error this
+introduces is measured by benchmarks/bench_embedding_store.py.
+"""
+
+import logging
+import struct
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.services.vector_service import DEFAULT_TOP_K, SimilaritySearch, normalize_rows, top_k
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MTGVEC\x00\x01"
+FORMAT_VERSION = 1
+# magic, version, dtype code, count, dim, fingerprint, scales/matrix/ids offsets, ids length
+HEADER = struct.Struct("<8sHHQI16sQQQQ")
+ALIGNMENT = 64
+
+DTYPES: dict[str, int] = {"float32": 0, "float16": 1, "int8": 2}
+DTYPE_NAMES = {code: name for name, code in DTYPES.items()}
+INT8_MAX = 127
+# Corpus rows dequantized and scored per step of EmbeddingStore.search()
+DEFAULT_SCAN_BLOCK_SIZE = 16_384
+
+
+def _align(offset: int) -> int:
+    """Round offset up to the next ALIGNMENT boundary."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Quantize rows to int8 with one symmetric scale per row.
+
+    Args:
+        vectors: float array of shape (n, dim).
+
+    Returns:
+        (codes, scales) with codes int8 (n, dim) and scales float32 (n,);
+        codes * scales[:, None] approximates vectors.
+    """
+    scales = np.abs(vectors).max(axis=1) / INT8_MAX
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, np.newaxis]).clip(-INT8_MAX, INT8_MAX).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def write_embedding_store(
+    path: str | Path,
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    dtype: str = "float16",
+    fingerprint: str = "",
+) -> None:
+    """Write vectors and their card ids to a store file.
+
+    Args:
+        path: Destination file (overwritten).
+        ids: Card id of each vector row.
+        vectors: Array of shape (len(ids), dim); rows are L2-normalized before storing.
+        dtype: "float32", "float16" or "int8".
+        fingerprint: FeatureSchema fingerprint of the vectors (up to 16 characters).
+
+    Raises:
+        ValueError: On an unknown dtype or mismatched ids/vectors.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype {dtype!r}, expected one of {sorted(DTYPES)}")
+    if len(ids) != len(vectors):
+        raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+
+    vectors = normalize_rows(np.array(vectors, dtype=np.float32))
+    scales = np.empty(0, dtype=np.float32)
+    if dtype == "int8":
+        matrix, scales = quantize_int8(vectors)
+    else:
+        matrix = vectors.astype(dtype)
+    id_blob = "\n".join(ids).encode("utf-8")
+
+    scales_offset = _align(HEADER.size)
+    matrix_offset = _align(scales_offset + scales.nbytes)
+    ids_offset = matrix_offset + matrix.nbytes
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        DTYPES[dtype],
+        len(ids),
+        vectors.shape[1] if vectors.ndim == 2 else 0,
+        fingerprint.encode("ascii")[:16],
+        scales_offset,
+        matrix_offset,
+        ids_offset,
+        len(id_blob),
+    )
+    with Path(path).open("wb") as f:
+        f.write(header)
+        f.seek(scales_offset)
+        f.write(scales.tobytes())
+        f.seek(matrix_offset)
+        f.write(np.ascontiguousarray(matrix).tobytes())
+        f.write(id_blob)
+    logger.info("Wrote %d %s vectors to %s", len(ids), dtype, path)
+
+
+class EmbeddingStore:
+    """
+    Read-only, memory-mapped view of a store file.
+
+    Use EmbeddingStore.open(path); the matrix stays on disk (page cache) and
+    is only dequantized block by block while searching. search() rescans
+    the whole file per call, so it suits batched queries; for low-latency
+    single queries, materialize once with to_similarity_search() (or build an
+    IVFIndex from vectors()).
+    """
+
+    def __init__(self, path: Path, header: tuple):
+        (_, _, dtype_code, count, dim, fingerprint, scales_offset, matrix_offset, ids_offset, ids_length) = header
+        self.path = path
+        self.dtype = DTYPE_NAMES[dtype_code]
+        self.fingerprint = fingerprint.rstrip(b"\x00").decode("ascii")
+        self.scales: Optional[np.ndarray] = None
+        if count == 0:
+            # An empty mapping past the end of the file cannot be created
+            self.matrix = np.empty((0, dim), self.dtype)
+            if self.dtype == "int8":
+                self.scales = np.empty(0, np.float32)
+        else:
+            self.matrix = np.memmap(path, dtype=self.dtype, mode="r", offset=matrix_offset, shape=(count, dim))
+            if self.dtype == "int8":
+                self.scales = np.memmap(path, dtype=np.float32, mode="r", offset=scales_offset, shape=(count,))
+        self._ids_span = (ids_offset, ids_length)
+        self._ids: Optional[np.ndarray] = None
+
+    @classmethod
+    def open(cls, path: str | Path) -> "EmbeddingStore":
+        """Map a store file.
+
+        Raises:
+            ValueError: If the file is not a store or uses another format version.
+        """
+        path = Path(path)
+        with path.open("rb") as f:
+            header = HEADER.unpack(f.read(HEADER.size))
+        if header[0] != MAGIC:
+            raise ValueError(f"{path} is not an embedding store file")
+        if header[1] != FORMAT_VERSION:
+            raise ValueError(f"{path} uses store format {header[1]}, expected {FORMAT_VERSION}")
+        return cls(path, header)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        """Width of the stored vectors."""
+        return self.matrix.shape[1]
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Card ids in row order (decoded on first access)."""
+        if self._ids is None:
+            offset, length = self._ids_span
+            with self.path.open("rb") as f:
+                f.seek(offset)
+                blob = f.read(length).decode("utf-8")
+            self._ids = np.array(blob.split("\n") if blob else [], dtype=object)
+        return self._ids
+
+    def vectors(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Dequantize rows start..stop to float32."""
+        block = np.asarray(self.matrix[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[start:stop, np.newaxis]
+        return block
+
+    def search(
+        self, queries: np.ndarray, k: int = DEFAULT_TOP_K, block_size: int = DEFAULT_SCAN_BLOCK_SIZE
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Exact search over the stored (possibly quantized) vectors.
+
+        The corpus is scanned in blocks of block_size rows, keeping a running
+        top k per query, so only one dequantized block is in memory at a time.
+
+        Args:
+            queries: Array of shape (queries, dim) or a single (dim,) vector.
+            k: Number of neighbours per query.
+            block_size: Corpus rows dequantized and scored per step.
+
+        Returns:
+            (indices, scores) arrays of shape (queries, k), best first.
+        """
+        queries = normalize_rows(np.array(np.atleast_2d(queries), dtype=np.float32))
+        best_indices = np.empty((len(queries), 0), dtype=np.intp)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(self), block_size):
+            block_scores = queries @ self.vectors(start, start + block_size).T
+            block_indices, block_scores = top_k(block_scores, k)
+            merged_indices = np.hstack([best_indices, block_indices + start])
+            merged_scores = np.hstack([best_scores, block_scores])
+            order, best_scores = top_k(merged_scores, k)
+            best_indices = np.take_along_axis(merged_indices, order, axis=1)
+        return best_indices, best_scores
+
+    def to_similarity_search(self) -> SimilaritySearch:
+        """Dequantize the whole store into an in-memory SimilaritySearch."""
+        return SimilaritySearch(self.ids, self.vectors())
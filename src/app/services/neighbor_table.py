@@ -0,0 +1,336 @@
+"""
+Precomputed top-N neighbours of every indexed card.
+
+Most "similar cards" requests ask about the same cards, so the neighbours of
+every card are computed offline and served by lookup. compute_neighbors()
+runs the blocked exact search of a SimilaritySearch (or any subclass, e.g.
+the oracle-level index of OracleSimilaritySearch.search) over the corpus,
+optionally on a process pool. As in parallel_build, workers are started with
+forkserver (never fork, since the database pool's threads are running by
+then): the index vectors, the requested rows and the output arrays live in
+shared memory, and only the rest of the index (ids, bitsets) is pickled,
+once per worker.
+
+NeighborTable holds the result as row-aligned arrays (neighbour rows and
+scores) and is saved as a compact .npz file; database.card_neighbors stores it
+in the card_neighbors table.
+
+update_neighbor_table() brings a table up to date after the index changed
+(see SimilaritySearch.apply_delta()) by recomputing only the rows that can
+have changed:
+
+- rows of new or updated cards
+- rows whose list contains an updated or removed card
+- rows for which an updated card now scores above their current N-th neighbour
+
+Every other list is kept and re-mapped to the new row numbers.
+"""
+
+import copy
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from app.services.parallel_build import pool_context
+from app.services.vector_service import DEFAULT_BLOCK_SIZE, SimilaritySearch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NEIGHBORS = 50
+NEIGHBOR_TABLE_FORMAT_VERSION = 1
+
+# Per-process state of a pool worker, set by _init_worker()
+_pool_state: dict[str, Any] = {}
+
+
+@dataclass
+class NeighborTable:
+    """Top-N neighbours of every row of an index.
+
+    Attributes:
+        ids: Id of each row (card id, or oracle key for an oracle-level index).
+        neighbors: int32 (rows, N) row numbers of the neighbours, best first; -1 pads short lists.
+        scores: float32 (rows, N) similarity of each neighbour; -inf pads short lists.
+        fingerprint: FeatureSchema fingerprint of the vectors the table was computed from.
+    """
+
+    ids: np.ndarray
+    neighbors: np.ndarray
+    scores: np.ndarray
+    fingerprint: str = ""
+    _positions: Optional[dict[str, int]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n(self) -> int:
+        """Neighbours per row."""
+        return self.neighbors.shape[1]
+
+    def row(self, position: int, k: Optional[int] = None) -> list[tuple[str, float]]:
+        """Neighbours of one row as (id, score), best first."""
+        found = self.neighbors[position, :k]
+        valid = found >= 0
+        return list(zip(self.ids[found[valid]].tolist(), self.scores[position, :k][valid].tolist()))
+
+    def lookup(self, card_id: str, k: Optional[int] = None) -> list[tuple[str, float]]:
+        """Precomputed neighbours of a card, best first.
+
+        Raises:
+            KeyError: If the card is not in the table.
+        """
+        if self._positions is None:
+            self._positions = {row_id: position for position, row_id in enumerate(self.ids.tolist())}
+        return self.row(self._positions[card_id], k)
+
+    def save(self, path: str | Path) -> None:
+        """Write the table to a .npz file."""
+        params = {"format_version": NEIGHBOR_TABLE_FORMAT_VERSION, "fingerprint": self.fingerprint}
+        with Path(path).open("wb") as f:
+            np.savez(
+                f,
+                ids=self.ids.astype(str),
+                neighbors=self.neighbors,
+                scores=self.scores,
+                params=np.array(json.dumps(params)),
+            )
+        logger.info("Saved %d x %d neighbour table to %s", len(self), self.n, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "NeighborTable":
+        """Read a table written by save().
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            params = json.loads(str(data["params"]))
+            if params["format_version"] != NEIGHBOR_TABLE_FORMAT_VERSION:
+                raise ValueError(f"{path} was written by an incompatible neighbour table version")
+            return cls(
+                ids=np.asarray(data["ids"]).astype(object),
+                neighbors=data["neighbors"],
+                scores=data["scores"],
+                fingerprint=params["fingerprint"],
+            )
+
+    @classmethod
+    def build(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        cls,
+        search: SimilaritySearch,
+        n: int = DEFAULT_NEIGHBORS,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        workers: int = 1,
+        fingerprint: str = "",
+    ) -> "NeighborTable":
+        """Compute the neighbours of every row of search (see compute_neighbors())."""
+        neighbors, scores = compute_neighbors(search, n, block_size=block_size, workers=workers)
+        return cls(search.ids.copy(), neighbors, scores, fingerprint)
+
+
+def _init_worker(search: SimilaritySearch, shared: dict[str, tuple[str, tuple[int, ...], str]], k: int) -> None:
+    """Attach a pool process to the shared index vectors, positions and output arrays."""
+    arrays = {}
+    segments = []
+    for key, (name, shape, dtype) in shared.items():
+        # The parent owns and unlinks the segments, so workers must not track them
+        shm = SharedMemory(name=name, track=False)
+        segments.append(shm)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    search.vectors = arrays.pop("vectors")
+    _pool_state.update(search=search, k=k, segments=segments, **arrays)
+
+
+def _neighbor_block(start: int, stop: int) -> None:
+    """Pool task: compute rows start..stop of the requested positions into the shared outputs."""
+    search, k = _pool_state["search"], _pool_state["k"]
+    indices, scores = search.search_positions(_pool_state["positions"][start:stop], k, stop - start)
+    _pool_state["neighbors"][start:stop, :k] = indices
+    _pool_state["scores"][start:stop, :k] = scores
+
+
+def _shared_array(shape: tuple[int, ...], dtype: Any, segments: list[SharedMemory]) -> np.ndarray:
+    """Allocate an array in a new shared-memory segment (appended to segments for cleanup)."""
+    shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+    segments.append(shm)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _compute_in_pool(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    search: SimilaritySearch,
+    positions: np.ndarray,
+    k: int,
+    n: int,
+    block_size: int,
+    workers: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Run _neighbor_block() over every block on a pool attached to shared-memory arrays."""
+    segments: list[SharedMemory] = []
+    try:
+        arrays = {
+            "vectors": _shared_array(search.vectors.shape, np.float32, segments),
+            "positions": _shared_array(positions.shape, np.intp, segments),
+            "neighbors": _shared_array((len(positions), n), np.int32, segments),
+            "scores": _shared_array((len(positions), n), np.float32, segments),
+        }
+        arrays["vectors"][:] = search.vectors
+        arrays["positions"][:] = positions
+        arrays["neighbors"].fill(-1)
+        arrays["scores"].fill(-np.inf)
+        shared = {
+            key: (shm.name, array.shape, array.dtype.str) for (key, array), shm in zip(arrays.items(), segments)
+        }
+        # The workers get the index without its matrix and attach to the shared copy instead
+        shell = copy.copy(search)
+        shell.vectors = np.empty((0, search.vectors.shape[1]), dtype=np.float32)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=pool_context(), initializer=_init_worker, initargs=(shell, shared, k)
+        ) as pool:
+            starts = range(0, len(positions), block_size)
+            for future in [pool.submit(_neighbor_block, start, start + block_size) for start in starts]:
+                future.result()
+        return arrays["neighbors"].copy(), arrays["scores"].copy()
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+
+def compute_neighbors(
+    search: SimilaritySearch,
+    n: int = DEFAULT_NEIGHBORS,
+    positions: Optional[np.ndarray] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    workers: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the n nearest neighbours of indexed rows, excluding each row itself.
+
+    Args:
+        search: Index to compute over; must not hold tombstoned rows.
+        n: Neighbours per row.
+        positions: Rows to compute; defaults to every row.
+        block_size: Rows scored per matrix product (and per pool task).
+        workers: Processes to use.
+
+    Returns:
+        (neighbors, scores): int32 and float32 arrays of shape (len(positions), n),
+        padded with -1 / -inf when the index has n rows or fewer.
+
+    Raises:
+        ValueError: If the index has tombstoned rows (compact() it first).
+    """
+    if search.dead:
+        raise ValueError("The index has tombstoned rows, compact() it before computing neighbours")
+    positions = np.arange(len(search)) if positions is None else np.asarray(positions, dtype=np.intp)
+    k = max(0, min(n, len(search) - 1))
+    start = time.perf_counter()
+
+    if workers > 1 and len(positions) > block_size:
+        neighbors, scores = _compute_in_pool(search, positions, k, n, block_size, workers)
+    else:
+        neighbors = np.full((len(positions), n), -1, dtype=np.int32)
+        scores = np.full((len(positions), n), -np.inf, dtype=np.float32)
+        for block_start in range(0, len(positions), block_size):
+            block = slice(block_start, block_start + block_size)
+            neighbors[block, :k], scores[block, :k] = search.search_positions(positions[block], k, block_size)
+
+    logger.info(
+        "Computed %d neighbours for %d of %d rows in %.2fs",
+        n,
+        len(positions),
+        len(search),
+        time.perf_counter() - start,
+    )
+    return neighbors, scores
+
+
+def _beaten_rows(
+    search: SimilaritySearch, changed: np.ndarray, thresholds: np.ndarray, block_size: int
+) -> np.ndarray:
+    """Rows for which some changed row now scores above their threshold (their current N-th score)."""
+    beaten = np.zeros(len(search), dtype=bool)
+    for start in range(0, len(changed), block_size):
+        block = changed[start:start + block_size]
+        scores = search.pairwise(block)
+        scores[np.arange(len(block)), block] = -np.inf
+        beaten |= (scores > thresholds).any(axis=0)
+    return beaten
+
+
+def _carry_over(
+    table: NeighborTable, new_positions: dict[str, int], touched: set[str]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Re-map the old lists to the new row numbers.
+
+    Returns:
+        (neighbors, scores, thresholds, affected) for the new rows: the kept
+        lists, each row's current N-th score, and which rows must be recomputed
+        (new rows, and rows listing a touched id).
+    """
+    size = len(new_positions)
+    old_to_new = np.fromiter(
+        (new_positions.get(row_id, -1) for row_id in table.ids.tolist()), dtype=np.intp, count=len(table)
+    )
+    valid = table.neighbors >= 0
+    listed = np.where(valid, table.neighbors, 0)
+    old_touched = np.isin(table.ids, list(touched)) if touched else np.zeros(len(table), dtype=bool)
+    kept = old_to_new >= 0
+    rows = old_to_new[kept]
+
+    neighbors = np.full((size, table.n), -1, dtype=np.int32)
+    scores = np.full((size, table.n), -np.inf, dtype=np.float32)
+    thresholds = np.full(size, np.inf, dtype=np.float32)
+    affected = np.ones(size, dtype=bool)
+    neighbors[rows] = np.where(valid, old_to_new[listed], -1)[kept]
+    scores[rows] = table.scores[kept]
+    thresholds[rows] = table.scores[kept, -1]
+    affected[rows] = (old_touched[listed] & valid).any(axis=1)[kept]
+    return neighbors, scores, thresholds, affected
+
+
+def update_neighbor_table(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    table: NeighborTable,
+    search: SimilaritySearch,
+    changed_ids: Iterable[str],
+    removed_ids: Iterable[str] = (),
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    workers: int = 1,
+) -> tuple[NeighborTable, np.ndarray]:
+    """Update a table after search received upserts and removals, recomputing only affected rows.
+
+    Args:
+        table: Table computed from the index before the changes.
+        search: The updated index (compacted).
+        changed_ids: Ids upserted into the index since the table was computed.
+        removed_ids: Ids removed from the index since then.
+        block_size: Rows scored per matrix product.
+        workers: Processes used to recompute the affected rows.
+
+    Returns:
+        (table, recomputed): the table aligned with search's rows, and the
+        row numbers whose lists were recomputed.
+    """
+    changed = set(changed_ids)
+    new_positions = {row_id: position for position, row_id in enumerate(search.ids.tolist())}
+    neighbors, scores, thresholds, affected = _carry_over(table, new_positions, changed | set(removed_ids))
+
+    changed_rows = np.fromiter(
+        (new_positions[row_id] for row_id in changed if row_id in new_positions), dtype=np.intp
+    )
+    affected[changed_rows] = True
+    affected |= _beaten_rows(search, changed_rows, thresholds, block_size)
+
+    recomputed = np.flatnonzero(affected)
+    neighbors[recomputed], scores[recomputed] = compute_neighbors(
+        search, table.n, recomputed, block_size=block_size, workers=workers
+    )
+    logger.info("Recomputed %d of %d neighbour lists", len(recomputed), len(search))
+    return NeighborTable(search.ids.copy(), neighbors, scores, table.fingerprint), recomputed
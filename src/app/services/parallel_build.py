@@ -0,0 +1,193 @@
+"""
+Multi-core vectorization of the card corpus.
+
+CardVectorizer.transform() is pure Python per card, so a single process
+vectorizing the whole corpus leaves every other core idle. transform_parallel()
+splits the card rows into chunks and vectorizes them in a process pool:
+
+- The parent allocates the (cards x dim) float32 output matrix in shared
+  memory (multiprocessing.shared_memory).
+- Each worker attaches to it once, in the pool initializer, and writes the
+  rows of every chunk it processes in place.
+- Only card rows are pickled to the workers; each chunk sends back a small
+  (pid, cards, seconds) record instead of its array.
+
+Workers are started with forkserver (spawn where it is unavailable), never
+fork: by the time a build runs, fetch_card_rows() has started the
+psycopg_pool threads, and forking a process with live threads can deadlock
+on locks they hold.
+
+Throughput is reported per worker (ParallelBuildStats), so an uneven split
+or a slow worker shows up directly.
+"""
+
+import logging
+import multiprocessing
+import multiprocessing.context
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.services.vector_service import CardVectorizer, FeatureSchema
+
+logger = logging.getLogger(__name__)
+
+# Cards per task: large enough to amortize pickling, small enough to balance the pool
+DEFAULT_CHUNK_SIZE = 2000
+
+# Per-process state of a pool worker, set by _init_worker()
+_worker: dict[str, Any] = {}
+
+
+def pool_context() -> multiprocessing.context.BaseContext:
+    """Multiprocessing context for worker pools: forkserver, or spawn where unavailable."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+@dataclass
+class WorkerStats:
+    """Work done by one pool process.
+
+    Attributes:
+        pid: Process id of the worker.
+        chunks: Chunks vectorized.
+        cards: Cards vectorized.
+        seconds: Time spent vectorizing (excluding pickling and queueing).
+    """
+
+    pid: int
+    chunks: int = 0
+    cards: int = 0
+    seconds: float = 0.0
+
+    @property
+    def cards_per_second(self) -> float:
+        """Vectorization throughput of this worker."""
+        return self.cards / self.seconds if self.seconds > 0 else float("inf")
+
+
+@dataclass
+class ParallelBuildStats:
+    """Outcome of one parallel build.
+
+    Attributes:
+        cards: Cards vectorized.
+        wall_seconds: Elapsed time of the whole build, pool start-up included.
+        workers: Per-process statistics.
+    """
+
+    cards: int = 0
+    wall_seconds: float = 0.0
+    workers: list[WorkerStats] = field(default_factory=list)
+
+    @property
+    def cards_per_second(self) -> float:
+        """Overall throughput."""
+        return self.cards / self.wall_seconds if self.wall_seconds > 0 else float("inf")
+
+
+def _init_worker(shm_name: str, shape: tuple[int, int], schema: FeatureSchema) -> None:
+    """Attach a pool process to the shared output matrix."""
+    # The parent owns and unlinks the segment, so workers must not track it
+    shm = SharedMemory(name=shm_name, track=False)
+    _worker["shm"] = shm
+    _worker["matrix"] = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    _worker["vectorizer"] = CardVectorizer(schema)
+
+
+def _transform_chunk(start: int, cards: Sequence[Mapping[str, Any]]) -> tuple[int, int, float]:
+    """Vectorize one chunk into rows start..start+len(cards) of the shared matrix."""
+    chunk_start = time.perf_counter()
+    _worker["matrix"][start:start + len(cards)] = _worker["vectorizer"].transform(cards)
+    return os.getpid(), len(cards), time.perf_counter() - chunk_start
+
+
+def _run_pool(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    cards: Sequence[Mapping[str, Any]],
+    shm_name: str,
+    shape: tuple[int, int],
+    schema: FeatureSchema,
+    workers: int,
+    chunk_size: int,
+) -> list[WorkerStats]:
+    """Vectorize every chunk of cards into the shared matrix and collect per-worker statistics."""
+    by_pid: dict[int, WorkerStats] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=pool_context(), initializer=_init_worker, initargs=(shm_name, shape, schema)
+    ) as pool:
+        futures = [
+            pool.submit(_transform_chunk, start, cards[start:start + chunk_size])
+            for start in range(0, len(cards), chunk_size)
+        ]
+        for future in as_completed(futures):
+            pid, count, seconds = future.result()
+            worker = by_pid.setdefault(pid, WorkerStats(pid))
+            worker.chunks += 1
+            worker.cards += count
+            worker.seconds += seconds
+    return sorted(by_pid.values(), key=lambda worker: worker.pid)
+
+
+def transform_parallel(
+    cards: Sequence[Mapping[str, Any]],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    vectorizer: Optional[CardVectorizer] = None,
+) -> tuple[np.ndarray, ParallelBuildStats]:
+    """Vectorize cards table rows on several cores.
+
+    Args:
+        cards: Rows to vectorize (see CardVectorizer.transform()).
+        workers: Pool size; defaults to os.cpu_count(). With 1 worker the
+            cards are vectorized in this process.
+        chunk_size: Cards per task.
+        vectorizer: Vectorizer whose schema the workers use.
+
+    Returns:
+        (matrix, stats): the same float32 matrix as vectorizer.transform(cards)
+        and the per-worker statistics.
+    """
+    vectorizer = vectorizer or CardVectorizer()
+    workers = workers or os.cpu_count() or 1
+    stats = ParallelBuildStats(cards=len(cards))
+    start = time.perf_counter()
+
+    if workers == 1 or len(cards) <= chunk_size:
+        matrix = vectorizer.transform(cards)
+        stats.wall_seconds = time.perf_counter() - start
+        stats.workers = [WorkerStats(os.getpid(), 1, len(cards), stats.wall_seconds)]
+        return matrix, stats
+
+    shape = (len(cards), vectorizer.dim)
+    shm = SharedMemory(create=True, size=max(1, shape[0] * shape[1] * np.dtype(np.float32).itemsize))
+    try:
+        stats.workers = _run_pool(cards, shm.name, shape, vectorizer.schema, workers, chunk_size)
+        # Copy out before the segment is unlinked; this is one memcpy, not a pickle
+        matrix = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    stats.wall_seconds = time.perf_counter() - start
+    logger.info(
+        "Vectorized %d cards with %d workers in %.2fs (%.0f cards/sec)",
+        stats.cards,
+        len(stats.workers),
+        stats.wall_seconds,
+        stats.cards_per_second,
+    )
+    for worker in stats.workers:
+        logger.info(
+            "  worker %d: %d chunks, %d cards, %.0f cards/sec",
+            worker.pid,
+            worker.chunks,
+            worker.cards,
+            worker.cards_per_second,
+        )
+    return matrix, stats
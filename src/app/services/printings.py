@@ -0,0 +1,323 @@
+"""
+One vector per rules object (oracle_id) instead of one per printing.
+
+The cards table holds every printing (id) of a card, and all printings of an
+oracle_id share the same rules, so they vectorize identically. Indexing them
+all makes the index several times larger and fills the top k with reprints
+of the same card.
+
+OracleSimilaritySearch indexes a single representative per oracle_id and fans
+results back out to printings: either the canonical printing chosen by the
+preference rules (e.g. prefer non-digital, then non-promo, then newest) or
+every printing, preferred first.
+
+After a card load, OracleSimilaritySearch.apply_delta() regroups only the
+oracle keys the load touched and reports the delta in oracle keys, which is
+what update_neighbor_table() needs.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+from psycopg import sql
+
+from app.services.card_masks import card_masks
+from app.services.vector_service import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_TOP_K,
+    FILTER_COLUMNS,
+    VECTOR_COLUMNS,
+    CardVectorizer,
+    SimilaritySearch,
+    fetch_card_rows,
+)
+from database.db import get_cursor
+from database.etl.cards.cards_etl import CardsDelta
+
+logger = logging.getLogger(__name__)
+
+# Extra columns the preference rules look at
+PRINTING_COLUMNS = ("released_at", "digital", "promo")
+
+
+def _newest(card: Mapping[str, Any]) -> tuple:
+    released_at = card.get("released_at")
+    return (released_at is None, -released_at.toordinal() if released_at else 0)
+
+
+# Sort keys: lower sorts first, i.e. is preferred
+PREFERENCE_RULES: dict[str, Callable[[Mapping[str, Any]], Any]] = {
+    "non_digital": lambda card: bool(card.get("digital")),
+    "non_promo": lambda card: bool(card.get("promo")),
+    "newest": _newest,
+}
+DEFAULT_PREFERENCE = ("non_digital", "non_promo", "newest")
+
+# Every printing of the wanted oracle keys, plus those of the oracle keys of the given card ids
+FETCH_PRINTINGS_SQL = """
+WITH wanted AS (
+    SELECT unnest(%(keys)s::text[]) AS key
+    UNION
+    SELECT COALESCE(oracle_id, id) FROM cards WHERE id = ANY(%(ids)s)
+)
+SELECT {columns} FROM cards
+WHERE oracle_id IN (SELECT key FROM wanted)
+   OR (oracle_id IS NULL AND id IN (SELECT key FROM wanted))
+ORDER BY id
+"""
+
+
+def oracle_key(card: Mapping[str, Any]) -> str:
+    """Group key of a printing; cards without an oracle_id (reversible cards) stand alone."""
+    return card.get("oracle_id") or card["id"]
+
+
+@dataclass
+class PrintingGroups:
+    """Printings of each oracle_id, preferred printing first.
+
+    Attributes:
+        printings: Oracle key -> card ids, ordered by the preference rules.
+        oracle_of: Card id -> oracle key.
+    """
+
+    printings: dict[str, list[str]] = field(default_factory=dict)
+    oracle_of: dict[str, str] = field(default_factory=dict)
+
+    def canonical(self, key: str) -> str:
+        """Preferred printing of an oracle key."""
+        return self.printings[key][0]
+
+
+@dataclass
+class SimilarCard:
+    """One similarity result, collapsed to its rules object.
+
+    Attributes:
+        oracle_id: Oracle key of the similar card.
+        score: Cosine similarity.
+        printings: Card ids to show: the canonical printing only, or all of them.
+    """
+
+    oracle_id: str
+    score: float
+    printings: list[str]
+
+    @property
+    def card_id(self) -> str:
+        """The preferred printing."""
+        return self.printings[0]
+
+
+def group_printings(
+    cards: Sequence[Mapping[str, Any]], preference: Sequence[str] = DEFAULT_PREFERENCE
+) -> tuple[list[Mapping[str, Any]], PrintingGroups]:
+    """Group printings by oracle_id and pick a representative for each.
+
+    Args:
+        cards: cards table rows including oracle_id and the PRINTING_COLUMNS.
+        preference: Names of PREFERENCE_RULES, most important first.
+
+    Returns:
+        (representatives, groups): the preferred printing row of every oracle
+        key, in first-seen order, and the full grouping.
+
+    Raises:
+        ValueError: If preference names an unknown rule.
+    """
+    unknown = set(preference) - set(PREFERENCE_RULES)
+    if unknown:
+        raise ValueError(f"Unknown preference rule(s) {sorted(unknown)}, expected {sorted(PREFERENCE_RULES)}")
+    rules = [PREFERENCE_RULES[name] for name in preference]
+
+    grouped: dict[str, list[Mapping[str, Any]]] = {}
+    for card in cards:
+        grouped.setdefault(oracle_key(card), []).append(card)
+
+    groups = PrintingGroups()
+    representatives = []
+    for key, printings in grouped.items():
+        printings.sort(key=lambda card: tuple(rule(card) for rule in rules))
+        representatives.append(printings[0])
+        groups.printings[key] = [card["id"] for card in printings]
+        for card in printings:
+            groups.oracle_of[card["id"]] = key
+    return representatives, groups
+
+
+def fetch_printing_rows(keys: Collection[str], card_ids: Collection[str] = ()) -> list[dict[str, Any]]:
+    """Read every printing of some oracle keys from the cards table.
+
+    Args:
+        keys: Oracle keys whose printings are read.
+        card_ids: Also read every printing of the current oracle keys of these cards.
+
+    Returns:
+        Rows with VECTOR_COLUMNS + FILTER_COLUMNS + PRINTING_COLUMNS, ordered by id.
+    """
+    columns = VECTOR_COLUMNS + FILTER_COLUMNS + PRINTING_COLUMNS
+    query = sql.SQL(FETCH_PRINTINGS_SQL).format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+    )
+    with get_cursor() as cur:
+        cur.execute(query, {"keys": list(keys), "ids": list(card_ids)})
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def _row_state(search: SimilaritySearch, positions: np.ndarray) -> list[np.ndarray]:
+    """Copies of the vectors and bitsets at positions, one row per position."""
+    arrays = [search.vectors] + (list(search.masks) if search.masks is not None else [])
+    return [array[positions].reshape(len(positions), int(np.prod(array.shape[1:]))) for array in arrays]
+
+
+class OracleSimilaritySearch:
+    """
+    Similarity search over one vector per oracle_id.
+
+    Args:
+        search: SimilaritySearch whose ids are oracle keys.
+        groups: Printings of each oracle key.
+        preference: Names of PREFERENCE_RULES the groups were ordered by.
+    """
+
+    def __init__(self, search: SimilaritySearch, groups: PrintingGroups, preference: Sequence[str] = DEFAULT_PREFERENCE):
+        self.search = search
+        self.groups = groups
+        self.preference = tuple(preference)
+
+    @classmethod
+    def from_cards(
+        cls,
+        cards: Sequence[Mapping[str, Any]],
+        vectorizer: Optional[CardVectorizer] = None,
+        preference: Sequence[str] = DEFAULT_PREFERENCE,
+    ) -> "OracleSimilaritySearch":
+        """Collapse printings and vectorize one representative per oracle_id."""
+        representatives, groups = group_printings(cards, preference)
+        vectorizer = vectorizer or CardVectorizer()
+        logger.info("Collapsed %d printings to %d oracle cards", len(cards), len(representatives))
+        search = SimilaritySearch(
+            [oracle_key(card) for card in representatives],
+            vectorizer.transform(representatives),
+            card_masks(representatives),
+        )
+        return cls(search, groups, preference)
+
+    @classmethod
+    def from_database(
+        cls, vectorizer: Optional[CardVectorizer] = None, preference: Sequence[str] = DEFAULT_PREFERENCE
+    ) -> "OracleSimilaritySearch":
+        """Build the index from every printing in the cards table."""
+        return cls.from_cards(fetch_card_rows(VECTOR_COLUMNS + FILTER_COLUMNS + PRINTING_COLUMNS), vectorizer, preference)
+
+    def __len__(self) -> int:
+        return len(self.search)
+
+    def apply_delta(
+        self,
+        delta: CardsDelta,
+        rows: Optional[Sequence[Mapping[str, Any]]] = None,
+        vectorizer: Optional[CardVectorizer] = None,
+    ) -> CardsDelta:
+        """Bring the index up to date with one card load by regrouping the oracle keys it touched.
+
+        A changed or deleted printing can change the preferred printing of its
+        oracle key, add a key, move between keys or leave a key without
+        printings, so every printing of each affected key is regrouped.
+
+        Args:
+            delta: CardsLoadResult.delta of the load (card ids).
+            rows: Rows (VECTOR_COLUMNS + FILTER_COLUMNS + PRINTING_COLUMNS) of
+                every printing of the affected oracle keys after the load;
+                read with fetch_printing_rows() when omitted.
+            vectorizer: Vectorizer the index was built with.
+
+        Returns:
+            The delta in oracle keys: keys added, keys whose vector or bitsets
+            changed, and keys left without printings. Pass its changed and
+            deleted ids to update_neighbor_table() once the index is compacted.
+        """
+        start = time.perf_counter()
+        old_keys = {self.groups.oracle_of[card_id] for card_id in delta.changed + delta.deleted if card_id in self.groups.oracle_of}
+        if rows is None:
+            rows = fetch_printing_rows(old_keys, delta.changed)
+        representatives, regrouped = group_printings(rows, self.preference)
+        affected = old_keys | set(regrouped.printings)
+
+        for key in affected:
+            for card_id in self.groups.printings.pop(key, ()):
+                del self.groups.oracle_of[card_id]
+        self.groups.printings.update(regrouped.printings)
+        self.groups.oracle_of.update(regrouped.oracle_of)
+
+        added, updated = self._upsert_representatives(representatives, vectorizer)
+        result = CardsDelta(inserted=added, updated=updated, deleted=sorted(affected - set(regrouped.printings)))
+        self.search.remove(result.deleted)
+        logger.info(
+            "Applied card delta in %.3fs: %d oracle keys regrouped, %d added, %d changed, %d removed",
+            time.perf_counter() - start,
+            len(affected),
+            len(result.inserted),
+            len(result.updated),
+            len(result.deleted),
+        )
+        return result
+
+    def _upsert_representatives(
+        self, representatives: Sequence[Mapping[str, Any]], vectorizer: Optional[CardVectorizer]
+    ) -> tuple[list[str], list[str]]:
+        """Upsert representative rows; return the oracle keys added and those whose vector or bitsets changed."""
+        keys = [oracle_key(card) for card in representatives]
+        known = [key for key in keys if key in self.search]
+        added = [key for key in keys if key not in self.search]
+        positions = self.search.positions(known)
+        before = _row_state(self.search, positions)
+        if representatives:
+            vectorizer = vectorizer or CardVectorizer()
+            self.search.upsert(keys, vectorizer.transform(representatives), card_masks(representatives))
+        same = np.all([(old == new).all(axis=1) for old, new in zip(before, _row_state(self.search, positions))], axis=0)
+        return added, [key for key, unchanged in zip(known, same) if not unchanged]
+
+    def most_similar(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        card_ids: Sequence[str],
+        k: int = DEFAULT_TOP_K,
+        all_printings: bool = False,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        legal_in: Optional[str] = None,
+        color_identity: Optional[Iterable[str]] = None,
+    ) -> list[list[SimilarCard]]:
+        """Find the k most similar distinct cards for each query printing.
+
+        Other printings of the query card are never returned, since they
+        share its oracle_id.
+
+        Args:
+            card_ids: Query printings (card ids), e.g. a decklist.
+            k: Number of distinct similar cards per query.
+            all_printings: Return every printing of each result instead of the canonical one.
+            block_size: Query rows scored per matrix product.
+            legal_in: Only return cards legal in this format.
+            color_identity: Only return cards within this color identity.
+
+        Returns:
+            For each query, SimilarCard results, best first.
+
+        Raises:
+            KeyError: If a card id is not indexed.
+        """
+        keys = [self.groups.oracle_of[card_id] for card_id in card_ids]
+        results = []
+        for neighbours in self.search.most_similar(keys, k, block_size, legal_in, color_identity):
+            results.append([
+                SimilarCard(
+                    oracle_id=key,
+                    score=score,
+                    printings=list(self.groups.printings[key]) if all_printings else [self.groups.canonical(key)],
+                )
+                for key, score in neighbours
+            ])
+        return results
@@ -0,0 +1,412 @@
+"""
+Sparse TF-IDF vectors over oracle text, and hybrid text + structure search.
+
+The hashed oracle block of CardVectorizer is compact but coarse: 256 buckets
+shared by every token. OracleTextVectorizer keeps an exact vocabulary of
+normalized unigrams and bigrams and weights them by inverse document
+frequency, so rare, telling phrases ("exile target spell", "{t}: add") count
+for more than "target" or "you". Rows are stored as SciPy CSR matrices.
+
+Normalization, applied before tokenizing:
+
+- the card's own name (each face) becomes "~" and reminder text in
+  parentheses is removed, by the same normalize_oracle_text() as the hashed
+  oracle block, so the text and structural blocks see the same text
+- mana symbols are tokens of their own: "{t}", "{g}", "{w/u}"; generic costs
+  are bucketed like other numbers ("{3}" -> "{#3}")
+- numbers are bucketed ("#0", "#1", "#2", "#3", "#4-5", "#6-9", "#10+"), so
+  "deals 4 damage" and "deals 5 damage" share a token
+
+The vocabulary and document frequencies are fitted once and cached with
+save()/load(). partial_fit() folds in the cards of a newly ingested set
+without re-reading the corpus: new tokens are appended as new columns, so
+existing column ids stay valid, and document frequencies are updated in
+place. IDF weights are derived at transform() time, so rows transformed
+before an update should be re-transformed to pick up the new weights.
+
+HybridSimilaritySearch scores cards by a weighted sum of the dense
+structural cosine (CardVectorizer) and the sparse text cosine. It supports the
+same in-place updates as SimilaritySearch; text rows of a vocabulary grown by
+partial_fit() are accepted, the existing rows simply have zeros in the new
+columns.
+"""
+
+import json
+import logging
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from app.services.card_masks import card_masks
+from app.services.vector_service import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_TOP_K,
+    FILTER_COLUMNS,
+    VECTOR_COLUMNS,
+    CardVectorizer,
+    SimilaritySearch,
+    fetch_card_rows,
+    normalize_oracle_text,
+    normalize_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+VOCABULARY_FORMAT_VERSION = 1
+# Tokens seen in fewer documents get no weight (they cannot make two cards similar)
+DEFAULT_MIN_DF = 2
+# Share of the hybrid score that comes from oracle text
+DEFAULT_TEXT_WEIGHT = 0.5
+
+# Upper bound (inclusive) and label of each number bucket; larger numbers are "#10+"
+NUMBER_BUCKETS = ((0, "#0"), (1, "#1"), (2, "#2"), (3, "#3"), (5, "#4-5"), (9, "#6-9"))
+TEXT_TOKEN_RE = re.compile(r"\{([^}]+)\}|[a-z0-9~+\-/']+")
+DIGITS_RE = re.compile(r"\d+")
+
+
+def number_bucket(value: int) -> str:
+    """Bucket label of a non-negative integer."""
+    for upper, label in NUMBER_BUCKETS:
+        if value <= upper:
+            return label
+    return "#10+"
+
+
+def _bucket_digits(match: re.Match) -> str:
+    return number_bucket(int(match.group()))
+
+
+def text_tokens(text: Optional[str], name: Optional[str] = None) -> list[str]:
+    """Normalize and tokenize oracle text into unigrams and bigrams.
+
+    Args:
+        text: oracle_text of the card.
+        name: Card name to replace with "~".
+
+    Returns:
+        Tokens in text order, unigrams first, then bigrams.
+    """
+    words = []
+    for match in TEXT_TOKEN_RE.finditer(normalize_oracle_text(text, name, keep_numbers=True)):
+        symbol = match.group(1)
+        if symbol is None:
+            words.append(DIGITS_RE.sub(_bucket_digits, match.group()))
+        elif symbol.isdigit():
+            words.append("{" + number_bucket(int(symbol)) + "}")
+        else:
+            words.append(match.group())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def normalize_sparse_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """L2-normalize the rows of a CSR matrix in place (all-zero rows are left as is)."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr)).astype(matrix.dtype)
+    return matrix
+
+
+class OracleTextVectorizer:
+    """
+    TF-IDF vectorizer over normalized oracle text with an updatable vocabulary.
+
+    Args:
+        min_df: Minimum document frequency for a token to be weighted.
+    """
+
+    def __init__(self, min_df: int = DEFAULT_MIN_DF):
+        self.min_df = min_df
+        self.vocabulary: dict[str, int] = {}
+        self.document_frequency = np.zeros(0, dtype=np.int64)
+        self.n_documents = 0
+
+    @property
+    def dim(self) -> int:
+        """Number of columns (vocabulary size)."""
+        return len(self.vocabulary)
+
+    @staticmethod
+    def _card_tokens(card: Mapping[str, Any]) -> list[str]:
+        return text_tokens(card.get("oracle_text"), card.get("name"))
+
+    def fit(self, cards: Iterable[Mapping[str, Any]]) -> "OracleTextVectorizer":
+        """Build the vocabulary and document frequencies from scratch."""
+        self.vocabulary = {}
+        self.document_frequency = np.zeros(0, dtype=np.int64)
+        self.n_documents = 0
+        return self.partial_fit(cards)
+
+    def partial_fit(self, cards: Iterable[Mapping[str, Any]]) -> "OracleTextVectorizer":
+        """Add documents (e.g. the cards of a new set) to the fitted statistics.
+
+        New tokens are appended as new columns. Pass each rules object once:
+        re-adding a card that was already fitted counts it twice.
+        """
+        counts: Counter[str] = Counter()
+        added = 0
+        for card in cards:
+            counts.update(set(self._card_tokens(card)))
+            added += 1
+
+        new_tokens = [token for token in counts if token not in self.vocabulary]
+        for token in new_tokens:
+            self.vocabulary[token] = len(self.vocabulary)
+        frequency = np.zeros(len(self.vocabulary), dtype=np.int64)
+        frequency[:len(self.document_frequency)] = self.document_frequency
+        columns = np.fromiter((self.vocabulary[token] for token in counts), dtype=np.intp, count=len(counts))
+        frequency[columns] += np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+        self.document_frequency = frequency
+        self.n_documents += added
+        logger.info("Fitted %d documents, %d new tokens (vocabulary %d)", added, len(new_tokens), self.dim)
+        return self
+
+    @property
+    def idf(self) -> np.ndarray:
+        """Smoothed inverse document frequency per column; 0 below min_df."""
+        idf = np.log((1.0 + self.n_documents) / (1.0 + self.document_frequency)) + 1.0
+        idf[self.document_frequency < self.min_df] = 0.0
+        return idf.astype(np.float32)
+
+    def transform(self, cards: Sequence[Mapping[str, Any]]) -> sparse.csr_matrix:
+        """Vectorize cards as L2-normalized sublinear TF-IDF rows.
+
+        Tokens outside the vocabulary are ignored.
+
+        Returns:
+            float32 CSR matrix of shape (len(cards), dim).
+        """
+        indptr = [0]
+        indices: list[int] = []
+        data: list[float] = []
+        for card in cards:
+            counts = Counter(
+                self.vocabulary[token] for token in self._card_tokens(card) if token in self.vocabulary
+            )
+            indices.extend(counts)
+            data.extend(1.0 + math.log(count) for count in counts.values())
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(cards), self.dim),
+        )
+        matrix.data *= self.idf[matrix.indices]
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+        return normalize_sparse_rows(matrix)
+
+    def save(self, path: str | Path) -> None:
+        """Write the vocabulary and document frequencies to a .npz file."""
+        tokens = np.empty(self.dim, dtype=object)
+        for token, column in self.vocabulary.items():
+            tokens[column] = token
+        params = {"format_version": VOCABULARY_FORMAT_VERSION, "min_df": self.min_df, "n_documents": self.n_documents}
+        with Path(path).open("wb") as f:
+            np.savez(
+                f,
+                tokens=tokens.astype(str),
+                document_frequency=self.document_frequency,
+                params=np.array(json.dumps(params)),
+            )
+        logger.info("Saved %d-token vocabulary to %s", self.dim, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "OracleTextVectorizer":
+        """Read a vocabulary written by save().
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            params = json.loads(str(data["params"]))
+            if params["format_version"] != VOCABULARY_FORMAT_VERSION:
+                raise ValueError(f"{path} was written by an incompatible vocabulary version")
+            vectorizer = cls(min_df=params["min_df"])
+            tokens: list[str] = np.asarray(data["tokens"]).tolist()
+            vectorizer.vocabulary = {token: column for column, token in enumerate(tokens)}
+            vectorizer.document_frequency = data["document_frequency"]
+            vectorizer.n_documents = params["n_documents"]
+        return vectorizer
+
+
+class HybridSimilaritySearch(SimilaritySearch):
+    """
+    Similarity search scoring (1 - text_weight) * structural cosine + text_weight * text cosine.
+
+    Both parts are cosines of L2-normalized rows, so the hybrid score stays in
+    [-1, 1] and text_weight trades them off directly. Filters, exclusion and
+    blocking work as in SimilaritySearch.
+
+    Args:
+        ids: Card id of each row.
+        vectors: Dense structural vectors, shape (len(ids), dim).
+        text: Sparse text vectors (OracleTextVectorizer.transform()), len(ids) rows.
+        text_weight: Share of the score from the text part, in [0, 1].
+        masks: Optional (legal_formats, color_identity_bits) arrays from card_masks().
+        text_vectorizer: Vectorizer of the text rows, used by upsert_cards().
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        text: sparse.csr_matrix,
+        text_weight: float = DEFAULT_TEXT_WEIGHT,
+        masks: Optional[tuple[np.ndarray, np.ndarray]] = None,
+        text_vectorizer: Optional[OracleTextVectorizer] = None,
+    ):
+        super().__init__(ids, vectors, masks)
+        if text.shape[0] != len(ids):
+            raise ValueError(f"Got {len(ids)} ids for {text.shape[0]} text rows")
+        if not 0.0 <= text_weight <= 1.0:
+            raise ValueError(f"text_weight must be in [0, 1], got {text_weight}")
+        self.text_weight = text_weight
+        self.text_vectorizer = text_vectorizer
+        self._set_text(normalize_sparse_rows(sparse.csr_matrix(text, dtype=np.float32, copy=True)))
+
+    def _set_text(self, text: sparse.csr_matrix) -> None:
+        self.text = text
+        # Transposed once, so query blocks multiply CSR x CSR without converting the corpus
+        self._text_by_column = text.T.tocsr()
+
+    @classmethod
+    def from_cards_with_text(
+        cls,
+        cards: Sequence[Mapping[str, Any]],
+        vectorizer: Optional[CardVectorizer] = None,
+        text_vectorizer: Optional[OracleTextVectorizer] = None,
+        text_weight: float = DEFAULT_TEXT_WEIGHT,
+    ) -> "HybridSimilaritySearch":
+        """Vectorize cards table rows both ways; text_vectorizer is fitted on cards if not given."""
+        vectorizer = vectorizer or CardVectorizer()
+        text_vectorizer = text_vectorizer or OracleTextVectorizer().fit(cards)
+        return cls(
+            [card["id"] for card in cards],
+            vectorizer.transform(cards),
+            text_vectorizer.transform(cards),
+            text_weight,
+            card_masks(cards),
+            text_vectorizer,
+        )
+
+    @classmethod
+    def from_database_with_text(
+        cls,
+        vectorizer: Optional[CardVectorizer] = None,
+        text_vectorizer: Optional[OracleTextVectorizer] = None,
+        text_weight: float = DEFAULT_TEXT_WEIGHT,
+    ) -> "HybridSimilaritySearch":
+        """Build the index from every card in the cards table."""
+        cards = fetch_card_rows(VECTOR_COLUMNS + FILTER_COLUMNS)
+        logger.info("Vectorizing %d cards from the cards table", len(cards))
+        return cls.from_cards_with_text(cards, vectorizer, text_vectorizer, text_weight)
+
+    @classmethod
+    def from_cards(
+        cls, cards: Sequence[Mapping[str, Any]], vectorizer: Optional[CardVectorizer] = None
+    ) -> "HybridSimilaritySearch":
+        """SimilaritySearch.from_cards() with a text vectorizer fitted on cards and the default weight."""
+        return cls.from_cards_with_text(cards, vectorizer)
+
+    @classmethod
+    def from_database(cls, vectorizer: Optional[CardVectorizer] = None) -> "HybridSimilaritySearch":
+        """SimilaritySearch.from_database() with a fitted text vectorizer and the default weight."""
+        return cls.from_database_with_text(vectorizer)
+
+    def search(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        queries: np.ndarray,
+        k: int = DEFAULT_TOP_K,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        exclude: Optional[np.ndarray] = None,
+        allowed: Optional[np.ndarray] = None,
+        text_queries: Optional[sparse.csr_matrix] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the k best corpus rows by hybrid score (see SimilaritySearch.search()).
+
+        Args:
+            text_queries: Sparse text vectors of the queries, one row per query.
+                Without them only the structural part is scored.
+        """
+        if text_queries is None:
+            return super().search(queries, k, block_size, exclude, allowed)
+        queries = normalize_rows(np.array(np.atleast_2d(queries), dtype=np.float32))
+        text_queries = normalize_sparse_rows(sparse.csr_matrix(text_queries, dtype=np.float32, copy=True))
+        corpus, candidates, exclude = self._restrict(allowed, exclude)
+        text_corpus = self._text_by_column if candidates is None else self.text[candidates].T.tocsr()
+
+        def score_block(rows: slice) -> np.ndarray:
+            scores = (queries[rows] @ corpus.T) * (1.0 - self.text_weight)
+            scores += (text_queries[rows] @ text_corpus).toarray() * self.text_weight
+            return scores
+
+        return self._rank_blocks(score_block, len(queries), len(corpus), k, block_size, exclude, candidates)
+
+    def search_positions(
+        self,
+        positions: np.ndarray,
+        k: int = DEFAULT_TOP_K,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        allowed: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        return self.search(
+            self.vectors[positions], k, block_size, exclude=positions, allowed=allowed, text_queries=self.text[positions]
+        )
+
+    def pairwise(self, positions: np.ndarray) -> np.ndarray:
+        scores = super().pairwise(positions) * (1.0 - self.text_weight)
+        scores += (self.text[positions] @ self._text_by_column).toarray() * self.text_weight
+        return scores
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        masks: Optional[tuple[np.ndarray, np.ndarray]] = None,
+        text: Optional[sparse.csr_matrix] = None,
+    ) -> np.ndarray:
+        """Replace or append cards (see SimilaritySearch.upsert()) with their text rows.
+
+        Raises:
+            ValueError: If text does not have one row per id.
+        """
+        if text is None or text.shape[0] != len(ids):
+            raise ValueError("HybridSimilaritySearch.upsert() needs one text row per id")
+        text = normalize_sparse_rows(sparse.csr_matrix(text, dtype=np.float32, copy=True))
+        previous = self.text.shape[0]
+        positions = super().upsert(ids, vectors, masks)
+
+        # Rows of [old text; new text] that make up the updated matrix
+        source = np.arange(len(self))
+        source[positions] = previous + np.arange(len(ids))
+        width = max(self.text.shape[1], text.shape[1])
+        self.text.resize((previous, width))
+        text.resize((len(ids), width))
+        self._set_text(sparse.vstack([self.text, text], format="csr")[source])
+        return positions
+
+    def compact(self) -> np.ndarray:
+        keep = super().compact()
+        self._set_text(self.text[keep])
+        return keep
+
+    def upsert_cards(self, cards: Sequence[Mapping[str, Any]], vectorizer: Optional[CardVectorizer] = None) -> np.ndarray:
+        """Vectorize cards table rows both ways and upsert them.
+
+        Raises:
+            ValueError: If the index was built without a text vectorizer.
+        """
+        if self.text_vectorizer is None:
+            raise ValueError("This index has no text vectorizer, use upsert() with text rows")
+        vectorizer = vectorizer or CardVectorizer()
+        return self.upsert(
+            [card["id"] for card in cards],
+            vectorizer.transform(cards),
+            card_masks(cards),
+            self.text_vectorizer.transform(cards),
+        )
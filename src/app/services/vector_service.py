@@ -0,0 +1,735 @@
+"""
+Feature vectors for MTG cards.
+
+CardVectorizer turns rows of the cards table (dicts keyed by column name) into
+fixed-width float32 vectors built from:
+
+- mana cost symbols and cmc
+- colors and color identity
+- type line: supertypes, card types and (hashed) subtypes
+- (hashed) keywords
+- power / toughness / loyalty
+- produced mana
+- (hashed) normalized oracle text
+
+Hashed blocks use zlib.crc32, so a card maps to the same vector in every
+process and on every machine. The layout is described by a FeatureSchema with
+a version and a fingerprint; stored vectors should record the fingerprint and
+be rebuilt when it no longer matches (see FeatureSchema.check()).
+
+SimilaritySearch answers "most similar cards to X" by exact cosine
+similarity: the corpus is held as one L2-normalized matrix, a batch of queries
+(e.g. a whole decklist) is scored with a single matrix product, and the top k
+per query are picked with argpartition. Queries are processed in blocks of
+block_size rows, so the score matrix never exceeds block_size x corpus size;
+iter_all_pairs() uses the same blocking for corpus-wide neighbour jobs.
+
+After a card load the index is updated in place rather than rebuilt:
+apply_delta() re-vectorizes only the inserted/updated cards of the load's
+CardsDelta (replacing indexed rows, appending new ones) and tombstones
+deleted ones. Tombstoned rows are skipped by every search and dropped by
+compact(), which remove() triggers once they exceed compact_threshold.
+"""
+
+import hashlib
+import logging
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+from psycopg import sql
+
+from app.services.card_masks import COLORS, card_masks, filter_mask
+from database.db import get_cursor
+from database.etl.cards.cards_etl import CardsDelta
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the layout, normalization or weights below change
+FEATURE_SCHEMA_VERSION = 1
+
+MANA_COLORS = COLORS + ("C",)
+MANA_SYMBOLS = COLORS + ("C", "X", "S")
+SUPERTYPES = ("Basic", "Legendary", "Ongoing", "Snow", "World")
+CARD_TYPES = (
+    "Artifact", "Battle", "Creature", "Enchantment", "Instant",
+    "Kindred", "Land", "Planeswalker", "Sorcery",
+)
+
+SUBTYPE_BUCKETS = 64
+KEYWORD_BUCKETS = 64
+ORACLE_BUCKETS = 256
+
+# Scale of the numeric features, so typical values land in [0, 1]
+MAX_CMC = 16.0
+MAX_STAT = 20.0
+
+# Relative weight of each block in the final (L2-normalized) vector
+BLOCK_WEIGHTS: dict[str, float] = {
+    "mana": 1.0,
+    "cmc": 1.0,
+    "colors": 1.0,
+    "color_identity": 1.0,
+    "supertypes": 0.5,
+    "types": 1.5,
+    "subtypes": 1.0,
+    "keywords": 1.0,
+    "stats": 1.0,
+    "produced_mana": 1.0,
+    "oracle": 2.0,
+}
+
+# Columns of the cards table the vectorizer reads
+VECTOR_COLUMNS = (
+    "id", "oracle_id", "name", "mana_cost", "cmc", "type_line", "oracle_text", "power", "toughness",
+    "loyalty", "colors", "color_identity", "keywords", "produced_mana",
+)
+# Columns needed for legality/color filtering (see card_masks)
+FILTER_COLUMNS = ("legalities",)
+
+DEFAULT_TOP_K = 10
+# 256 query rows x 100k cards of float32 scores is ~100 MB per block
+DEFAULT_BLOCK_SIZE = 256
+# Share of tombstoned rows at which remove() compacts the index
+DEFAULT_COMPACT_THRESHOLD = 0.2
+
+MANA_SYMBOL_RE = re.compile(r"\{([^}]+)\}")
+REMINDER_TEXT_RE = re.compile(r"\([^)]*\)")
+NUMBER_RE = re.compile(r"\b\d+\b")
+TOKEN_RE = re.compile(r"[a-z~+\-/]+|\{[^}]+\}")
+TYPE_LINE_SPLIT_RE = re.compile(r"\s+[—-]\s+")
+
+
+@dataclass(frozen=True)
+class FeatureSchema:
+    """Layout of the card feature vector.
+
+    Attributes:
+        version: FEATURE_SCHEMA_VERSION the layout was built with.
+        blocks: (block name, width) pairs in vector order.
+        weights: Weight applied to each block.
+    """
+
+    version: int
+    blocks: tuple[tuple[str, int], ...]
+    weights: tuple[tuple[str, float], ...]
+
+    @property
+    def dim(self) -> int:
+        """Total vector width."""
+        return sum(width for _, width in self.blocks)
+
+    @property
+    def offsets(self) -> dict[str, slice]:
+        """Column slice of each block."""
+        offsets = {}
+        start = 0
+        for name, width in self.blocks:
+            offsets[name] = slice(start, start + width)
+            start += width
+        return offsets
+
+    @property
+    def fingerprint(self) -> str:
+        """Short hash identifying the layout; store it next to persisted vectors."""
+        payload = repr((self.version, self.blocks, self.weights)).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def check(self, fingerprint: str) -> None:
+        """Verify that stored vectors were built with this schema.
+
+        Args:
+            fingerprint: Fingerprint recorded alongside the stored vectors.
+
+        Raises:
+            ValueError: If the fingerprint does not match this schema.
+        """
+        if fingerprint != self.fingerprint:
+            raise ValueError(
+                f"Vectors were built with feature schema {fingerprint}, "
+                f"expected {self.fingerprint} (v{self.version}); rebuild them"
+            )
+
+
+FEATURE_SCHEMA = FeatureSchema(
+    version=FEATURE_SCHEMA_VERSION,
+    blocks=(
+        ("mana", len(MANA_SYMBOLS) + 3),  # + generic, hybrid, phyrexian
+        ("cmc", 1),
+        ("colors", len(COLORS)),
+        ("color_identity", len(COLORS)),
+        ("supertypes", len(SUPERTYPES)),
+        ("types", len(CARD_TYPES)),
+        ("subtypes", SUBTYPE_BUCKETS),
+        ("keywords", KEYWORD_BUCKETS),
+        ("stats", 6),  # power, toughness, loyalty values + presence flags
+        ("produced_mana", len(MANA_COLORS)),
+        ("oracle", ORACLE_BUCKETS),
+    ),
+    weights=tuple(BLOCK_WEIGHTS.items()),
+)
+
+
+def stable_bucket(token: str, buckets: int) -> int:
+    """Hash a token into [0, buckets) identically across processes."""
+    return zlib.crc32(token.encode("utf-8")) % buckets
+
+
+def normalize_oracle_text(text: Optional[str], name: Optional[str] = None, keep_numbers: bool = False) -> str:
+    """Normalize rules text so functionally similar cards share tokens.
+
+    Lowercases, replaces the card's own name with "~", strips reminder text
+    and replaces numbers with "#".
+
+    Args:
+        text: oracle_text of the card.
+        name: Card name to replace with "~".
+        keep_numbers: Leave numbers as they are (for callers that bucket them).
+
+    Returns:
+        Normalized text.
+    """
+    if not text:
+        return ""
+    if name:
+        for face_name in name.split(" // "):
+            text = text.replace(face_name, "~")
+    text = REMINDER_TEXT_RE.sub(" ", text).lower()
+    return text if keep_numbers else NUMBER_RE.sub("#", text)
+
+
+def oracle_tokens(text: Optional[str], name: Optional[str] = None) -> list[str]:
+    """Tokenize normalized oracle text into unigrams and bigrams."""
+    words = TOKEN_RE.findall(normalize_oracle_text(text, name).replace("#", " num "))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def parse_stat(value: Optional[str]) -> Optional[float]:
+    """Parse power/toughness/loyalty; variable values like '*' or '1+*' count their digits only."""
+    if value is None:
+        return None
+    digits = re.sub(r"[^\d.\-]", "", value)
+    try:
+        return float(digits) if digits else 0.0
+    except ValueError:
+        return 0.0
+
+
+def split_type_line(type_line: Optional[str]) -> tuple[list[str], list[str]]:
+    """Split a type line into (supertypes + card types, subtypes), across all faces."""
+    types: list[str] = []
+    subtypes: list[str] = []
+    for face in (type_line or "").split(" // "):
+        parts = TYPE_LINE_SPLIT_RE.split(face, maxsplit=1)
+        types.extend(parts[0].split())
+        if len(parts) > 1:
+            subtypes.extend(parts[1].split())
+    return types, subtypes
+
+
+class CardVectorizer:
+    """
+    Builds fixed-width feature vectors from cards table rows.
+
+    Cards are tokenized into (row, column, value) entries once, and the whole
+    matrix is then filled with a single scatter-add per batch, followed by
+    vectorized per-block weighting and normalization.
+
+    Args:
+        schema: Feature layout; only the current FEATURE_SCHEMA is supported.
+    """
+
+    def __init__(self, schema: FeatureSchema = FEATURE_SCHEMA):
+        if schema.version != FEATURE_SCHEMA_VERSION:
+            raise ValueError(f"Unsupported feature schema version {schema.version}")
+        self.schema = schema
+        self._offsets = schema.offsets
+        self._weights = dict(schema.weights)
+        self._index = self._build_index()
+
+    @property
+    def dim(self) -> int:
+        """Width of the produced vectors."""
+        return self.schema.dim
+
+    def _build_index(self) -> dict[tuple[str, str], int]:
+        """Map (block, fixed vocabulary entry) to its matrix column."""
+        index = {}
+        vocabularies = {
+            "mana": MANA_SYMBOLS + ("generic", "hybrid", "phyrexian"),
+            "colors": COLORS,
+            "color_identity": COLORS,
+            "supertypes": SUPERTYPES,
+            "types": CARD_TYPES,
+            "produced_mana": MANA_COLORS,
+        }
+        for block, vocabulary in vocabularies.items():
+            start = self._offsets[block].start
+            for position, entry in enumerate(vocabulary):
+                index[(block, entry)] = start + position
+        return index
+
+    def _card_entries(self, card: Mapping[str, Any]) -> Iterable[tuple[int, float]]:
+        """Yield (column, value) pairs for one card, before weighting."""
+        yield from self._mana_entries(card.get("mana_cost"))
+        yield self._offsets["cmc"].start, min(float(card.get("cmc") or 0.0), MAX_CMC) / MAX_CMC
+
+        for block in ("colors", "color_identity", "produced_mana"):
+            for color in card.get(block) or ():
+                column = self._index.get((block, color))
+                if column is not None:
+                    yield column, 1.0
+
+        yield from self._type_entries(card.get("type_line"))
+
+        keywords_start = self._offsets["keywords"].start
+        for keyword in card.get("keywords") or ():
+            yield keywords_start + stable_bucket(keyword.lower(), KEYWORD_BUCKETS), 1.0
+
+        yield from self._stat_entries(card)
+
+        oracle_start = self._offsets["oracle"].start
+        for token in oracle_tokens(card.get("oracle_text"), card.get("name")):
+            yield oracle_start + stable_bucket(token, ORACLE_BUCKETS), 1.0
+
+    def _mana_entries(self, mana_cost: Optional[str]) -> Iterable[tuple[int, float]]:
+        """Count the symbols of a mana cost; generic mana counts its amount."""
+        index = self._index
+        for symbol in MANA_SYMBOL_RE.findall(mana_cost or ""):
+            if symbol.isdigit():
+                yield index[("mana", "generic")], float(symbol)
+            elif "/P" in symbol:
+                yield index[("mana", "phyrexian")], 1.0
+            elif "/" in symbol:
+                yield index[("mana", "hybrid")], 1.0
+            elif ("mana", symbol) in index:
+                yield index[("mana", symbol)], 1.0
+
+    def _type_entries(self, type_line: Optional[str]) -> Iterable[tuple[int, float]]:
+        """One-hot supertypes and card types, hashed subtypes."""
+        types, subtypes = split_type_line(type_line)
+        for word in types:
+            column = self._index.get(("supertypes", word), self._index.get(("types", word)))
+            if column is not None:
+                yield column, 1.0
+        subtypes_start = self._offsets["subtypes"].start
+        for subtype in subtypes:
+            yield subtypes_start + stable_bucket(subtype.lower(), SUBTYPE_BUCKETS), 1.0
+
+    def _stat_entries(self, card: Mapping[str, Any]) -> Iterable[tuple[int, float]]:
+        """Scaled power/toughness/loyalty plus a presence flag for each."""
+        stats_start = self._offsets["stats"].start
+        for position, column_name in enumerate(("power", "toughness", "loyalty")):
+            value = parse_stat(card.get(column_name))
+            if value is not None:
+                yield stats_start + position, max(min(value, MAX_STAT), -MAX_STAT) / MAX_STAT
+                yield stats_start + 3 + position, 1.0
+
+    def transform(self, cards: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Vectorize a batch of cards.
+
+        Args:
+            cards: cards table rows as dicts keyed by column name.
+
+        Returns:
+            float32 array of shape (len(cards), dim); each row has unit L2
+            norm (all-zero rows stay zero).
+        """
+        rows: list[int] = []
+        columns: list[int] = []
+        values: list[float] = []
+        for row, card in enumerate(cards):
+            for column, value in self._card_entries(card):
+                rows.append(row)
+                columns.append(column)
+                values.append(value)
+
+        matrix = np.zeros((len(cards), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), values)
+
+        # Hashed count blocks are log-scaled and normalized so each block's
+        # contribution to the final vector is set by its weight alone
+        for block in ("mana", "subtypes", "keywords", "oracle"):
+            part = matrix[:, self._offsets[block]]
+            np.log1p(part, out=part)
+        for block, weight in self._weights.items():
+            part = matrix[:, self._offsets[block]]
+            if part.shape[1] > 1:
+                norms = np.linalg.norm(part, axis=1, keepdims=True)
+                np.divide(part, norms, out=part, where=norms > 0)
+            part *= weight
+
+        return normalize_rows(matrix)
+
+    def transform_one(self, card: Mapping[str, Any]) -> np.ndarray:
+        """Vectorize a single card (shape (dim,))."""
+        return self.transform([card])[0]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize the rows of matrix in place, leaving all-zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def fetch_card_rows(
+    columns: Sequence[str] = VECTOR_COLUMNS, ids: Optional[Sequence[str]] = None
+) -> list[dict[str, Any]]:
+    """Read card rows from the cards table.
+
+    Args:
+        columns: Columns to select; defaults to those used for vectorizing.
+        ids: Only read these card ids (e.g. the changed cards of a load).
+
+    Returns:
+        Rows as dicts keyed by column name, ordered by id.
+    """
+    query = sql.SQL("SELECT {columns} FROM cards {where}ORDER BY id").format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+        where=sql.SQL("WHERE id = ANY(%s) " if ids is not None else ""),
+    )
+    with get_cursor() as cur:
+        cur.execute(query, (list(ids),) if ids is not None else None)
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pick the k highest scores of each row, best first.
+
+    argpartition selects the k candidates in linear time; only those k are
+    then sorted.
+
+    Args:
+        scores: Array of shape (queries, candidates).
+        k: Number of results per row (clipped to the number of candidates).
+
+    Returns:
+        (indices, scores) arrays of shape (queries, k).
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.intp), empty.astype(scores.dtype)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+class SimilaritySearch:
+    """
+    Exact cosine-similarity search over card vectors.
+
+    When built from cards table rows, legality and color identity bitsets
+    (see card_masks) are kept next to the vectors; filtered queries select the
+    allowed rows with a vectorized mask before scoring, so filtered-out cards
+    cost nothing and never push allowed cards out of the top k.
+
+    Args:
+        ids: Card id of each vector row.
+        vectors: Array of shape (len(ids), dim); rows are L2-normalized on load.
+        masks: Optional (legal_formats, color_identity_bits) arrays from card_masks().
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        masks: Optional[tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        self.ids = np.asarray(ids, dtype=object)
+        self.vectors = normalize_rows(np.array(vectors, dtype=np.float32))
+        self.masks = masks
+        self.live = np.ones(len(ids), dtype=bool)
+        self._dead = 0
+        self._positions = {card_id: position for position, card_id in enumerate(ids)}
+
+    @classmethod
+    def from_cards(
+        cls, cards: Sequence[Mapping[str, Any]], vectorizer: Optional[CardVectorizer] = None
+    ) -> "SimilaritySearch":
+        """Vectorize cards table rows and index them, with filter bitsets."""
+        vectorizer = vectorizer or CardVectorizer()
+        return cls([card["id"] for card in cards], vectorizer.transform(cards), card_masks(cards))
+
+    @classmethod
+    def from_database(cls, vectorizer: Optional[CardVectorizer] = None) -> "SimilaritySearch":
+        """Build the index from every card in the cards table."""
+        cards = fetch_card_rows(VECTOR_COLUMNS + FILTER_COLUMNS)
+        logger.info("Vectorizing %d cards from the cards table", len(cards))
+        return cls.from_cards(cards, vectorizer)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, card_id: object) -> bool:
+        """Whether a card is indexed (tombstoned cards are not)."""
+        return card_id in self._positions
+
+    @property
+    def dead(self) -> int:
+        """Number of tombstoned rows awaiting compaction."""
+        return self._dead
+
+    def upsert(
+        self, ids: Sequence[str], vectors: np.ndarray, masks: Optional[tuple[np.ndarray, np.ndarray]] = None
+    ) -> np.ndarray:
+        """Replace the vectors of indexed cards in place and append new cards.
+
+        Args:
+            ids: Card ids; indexed ids are replaced, others are appended.
+            vectors: Array of shape (len(ids), dim).
+            masks: (legal_formats, color_identity_bits) of the cards; required
+                when the index keeps bitsets.
+
+        Returns:
+            Row position of each id.
+
+        Raises:
+            ValueError: On mismatched ids/vectors or missing masks.
+        """
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        if self.masks is not None and masks is None:
+            raise ValueError("This index keeps legality/color bitsets, pass masks for the new rows")
+        positions = np.fromiter((self._positions.get(card_id, -1) for card_id in ids), dtype=np.intp, count=len(ids))
+        new = positions < 0
+        positions[new] = len(self) + np.arange(np.count_nonzero(new))
+
+        def place(current: np.ndarray, update: np.ndarray) -> np.ndarray:
+            update = np.asarray(update, dtype=current.dtype)
+            merged = np.concatenate([current, update[new]]) if new.any() else current
+            merged[positions[~new]] = update[~new]
+            return merged
+
+        self.vectors = place(self.vectors, normalize_rows(np.array(vectors, dtype=np.float32)))
+        self.ids = place(self.ids, np.asarray(ids, dtype=object))
+        self.live = place(self.live, np.ones(len(ids), dtype=bool))
+        if self.masks is not None and masks is not None:
+            self.masks = (place(self.masks[0], masks[0]), place(self.masks[1], masks[1]))
+        self._positions.update(zip(ids, positions.tolist()))
+        return positions
+
+    def remove(self, ids: Iterable[str], compact_threshold: float = DEFAULT_COMPACT_THRESHOLD) -> int:
+        """Tombstone cards; ids that are not indexed are ignored.
+
+        Args:
+            ids: Card ids to remove.
+            compact_threshold: compact() once this share of rows is tombstoned.
+
+        Returns:
+            Number of rows tombstoned.
+        """
+        positions = [self._positions.pop(card_id) for card_id in ids if card_id in self._positions]
+        self.live[positions] = False
+        self._dead += len(positions)
+        if self._dead and self._dead >= compact_threshold * len(self):
+            self.compact()
+        return len(positions)
+
+    def compact(self) -> np.ndarray:
+        """Drop tombstoned rows, renumbering the remaining ones.
+
+        Returns:
+            Previous positions of the kept rows, in their new order.
+        """
+        keep = np.flatnonzero(self.live)
+        self.ids = self.ids[keep]
+        self.vectors = self.vectors[keep]
+        if self.masks is not None:
+            self.masks = (self.masks[0][keep], self.masks[1][keep])
+        self.live = np.ones(len(keep), dtype=bool)
+        logger.info("Compacted index: dropped %d tombstoned rows, %d left", self._dead, len(keep))
+        self._dead = 0
+        self._positions = {card_id: position for position, card_id in enumerate(self.ids.tolist())}
+        return keep
+
+    def upsert_cards(self, cards: Sequence[Mapping[str, Any]], vectorizer: Optional[CardVectorizer] = None) -> np.ndarray:
+        """Vectorize cards table rows and upsert them with their bitsets."""
+        vectorizer = vectorizer or CardVectorizer()
+        return self.upsert([card["id"] for card in cards], vectorizer.transform(cards), card_masks(cards))
+
+    def apply_delta(self, delta: CardsDelta, vectorizer: Optional[CardVectorizer] = None) -> None:
+        """Bring the index up to date with one card load, without a rebuild.
+
+        Inserted and updated cards are read back from the cards table and
+        re-vectorized; deleted cards are tombstoned.
+
+        Args:
+            delta: CardsLoadResult.delta of the load.
+            vectorizer: Vectorizer the index was built with.
+        """
+        start = time.perf_counter()
+        removed = self.remove(delta.deleted) if delta.deleted else 0
+        changed = delta.changed
+        if changed:
+            self.upsert_cards(fetch_card_rows(VECTOR_COLUMNS + FILTER_COLUMNS, ids=changed), vectorizer)
+        logger.info(
+            "Applied card delta in %.3fs: %d upserted, %d removed (%d rows, %d tombstoned)",
+            time.perf_counter() - start,
+            len(changed),
+            removed,
+            len(self),
+            self._dead,
+        )
+
+    def positions(self, card_ids: Sequence[str]) -> np.ndarray:
+        """Map card ids to their row in the matrix.
+
+        Raises:
+            KeyError: If a card id is not indexed.
+        """
+        return np.fromiter((self._positions[card_id] for card_id in card_ids), dtype=np.intp, count=len(card_ids))
+
+    def allowed(self, legal_in: Optional[str] = None, color_identity: Optional[Iterable[str]] = None) -> Optional[np.ndarray]:
+        """Boolean mask of the cards passing the filters, or None without filters.
+
+        Raises:
+            ValueError: If filtering is requested but the index has no bitsets.
+        """
+        if legal_in is None and color_identity is None:
+            return None
+        if self.masks is None:
+            raise ValueError("This index was built without legality/color bitsets")
+        return filter_mask(*self.masks, legal_in=legal_in, color_identity=color_identity)
+
+    def _restrict(
+        self, allowed: Optional[np.ndarray], exclude: Optional[np.ndarray]
+    ) -> tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """Select the allowed live rows and re-map exclude positions into them (-1 if not allowed)."""
+        if self._dead:
+            allowed = self.live if allowed is None else allowed & self.live
+        if allowed is None:
+            return self.vectors, None, exclude
+        candidates = np.flatnonzero(allowed)
+        if exclude is not None:
+            slot = np.full(len(self), -1, dtype=np.intp)
+            slot[candidates] = np.arange(len(candidates))
+            exclude = slot[exclude]
+        return self.vectors[candidates], candidates, exclude
+
+    def search(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        queries: np.ndarray,
+        k: int = DEFAULT_TOP_K,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        exclude: Optional[np.ndarray] = None,
+        allowed: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the k most similar corpus rows for each query vector.
+
+        Args:
+            queries: Array of shape (queries, dim) or a single (dim,) vector.
+            k: Number of neighbours per query.
+            block_size: Query rows scored per matrix product.
+            exclude: Optional corpus position per query to leave out (the query card itself).
+            allowed: Optional boolean mask over the corpus; only these rows are scored.
+
+        Returns:
+            (indices, scores) arrays of shape (queries, k), best first. Excluded
+            rows score -inf, so they can only appear when fewer than k others exist.
+        """
+        queries = normalize_rows(np.array(np.atleast_2d(queries), dtype=np.float32))
+        corpus, candidates, exclude = self._restrict(allowed, exclude)
+        return self._rank_blocks(
+            lambda rows: queries[rows] @ corpus.T, len(queries), len(corpus), k, block_size, exclude, candidates
+        )
+
+    @staticmethod
+    def _rank_blocks(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        score_block: Callable[[slice], np.ndarray],
+        n_queries: int,
+        n_corpus: int,
+        k: int,
+        block_size: int,
+        exclude: Optional[np.ndarray],
+        candidates: Optional[np.ndarray],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top k of score_block(rows) for consecutive blocks of query rows (see search())."""
+        k = min(k, n_corpus)
+        indices = np.empty((n_queries, k), dtype=np.intp)
+        scores = np.empty((n_queries, k), dtype=np.float32)
+        for start in range(0, n_queries, block_size):
+            stop = min(start + block_size, n_queries)
+            block_scores = score_block(slice(start, stop))
+            if exclude is not None:
+                hit = exclude[start:stop] >= 0
+                block_scores[np.flatnonzero(hit), exclude[start:stop][hit]] = -np.inf
+            indices[start:stop], scores[start:stop] = top_k(block_scores, k)
+        if candidates is not None:
+            indices = candidates[indices]
+        return indices, scores
+
+    def search_positions(
+        self,
+        positions: np.ndarray,
+        k: int = DEFAULT_TOP_K,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        allowed: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Search with indexed rows as queries, leaving each query row out of its own results."""
+        return self.search(self.vectors[positions], k, block_size, exclude=positions, allowed=allowed)
+
+    def pairwise(self, positions: np.ndarray) -> np.ndarray:
+        """Scores of indexed rows against every row, shape (len(positions), len(self))."""
+        return self.vectors[positions] @ self.vectors.T
+
+    def most_similar(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        card_ids: Sequence[str],
+        k: int = DEFAULT_TOP_K,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        legal_in: Optional[str] = None,
+        color_identity: Optional[Iterable[str]] = None,
+    ) -> list[list[tuple[str, float]]]:
+        """Find the k most similar cards for each of a batch of indexed cards.
+
+        Args:
+            card_ids: Query card ids, e.g. every card of a decklist.
+            k: Number of neighbours per card (the card itself is excluded).
+            block_size: Query rows scored per matrix product.
+            legal_in: Only return cards legal in this format (e.g. "commander").
+            color_identity: Only return cards within this color identity (e.g. "WUB").
+
+        Returns:
+            For each query card, a list of (card id, cosine similarity), best first.
+        """
+        positions = self.positions(card_ids)
+        allowed = self.allowed(legal_in, color_identity)
+        indices, scores = self.search_positions(positions, k, block_size, allowed)
+        return [
+            [(card_id, score) for card_id, score in zip(self.ids[row_indices].tolist(), row_scores.tolist())
+             if score != -np.inf]
+            for row_indices, row_scores in zip(indices, scores)
+        ]
+
+    def iter_all_pairs(
+        self, k: int = DEFAULT_TOP_K, block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """Compute the k nearest neighbours of every indexed card, block by block.
+
+        Peak memory is one block_size x len(self) score matrix, independent of
+        the corpus size squared.
+        Tombstoned rows are still queried (never returned); compact() first to skip them.
+
+        Args:
+            k: Number of neighbours per card (the card itself is excluded).
+            block_size: Corpus rows scored per matrix product.
+
+        Yields:
+            (start, indices, scores) where rows start..start+len(indices) of
+            the corpus are the queries.
+        """
+        for start in range(0, len(self), block_size):
+            positions = np.arange(start, min(start + block_size, len(self)))
+            indices, scores = self.search_positions(positions, k, block_size)
+            yield start, indices, scores
@@ -0,0 +1,284 @@
+"""
+Optional pgvector storage and SQL-side kNN for card feature vectors.
+
+Vectors from CardVectorizer are stored in card_embeddings (one row per card
+id, with its oracle_id) under an HNSW cosine index, so similarity queries and
+their filters (format legality, color identity, set) run entirely in Postgres.
+
+Requires a pgvector-enabled server; with docker-compose set
+POSTGRES_IMAGE=pgvector/pgvector:pg16. The table is created by
+create_embeddings_table(), not by the create_tables/ init scripts.
+
+Run with:
+    PYTHONPATH=src python -m database.card_embeddings
+"""
+
+import logging
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Iterable, LiteralString, Optional, Sequence, cast
+
+import numpy as np
+import psycopg
+from psycopg import sql
+from psycopg.adapt import Dumper
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+
+from app.config.logging_config import setup_logging
+from app.services.card_masks import ALL_COLORS, color_mask, format_bit
+from app.services.parallel_build import transform_parallel
+from app.services.vector_service import FEATURE_SCHEMA, CardVectorizer, fetch_card_rows
+from database.db import get_cursor
+from database.etl.cards.cards_etl import CardsDelta
+
+logger = logging.getLogger(__name__)
+
+SQL_DIR = Path(__file__).parent / "sql" / "pgvector"
+EMBEDDINGS_DDL = cast(LiteralString, (SQL_DIR / "card_embeddings.sql").read_text())
+EMBEDDINGS_STAGING_SQL = cast(LiteralString, (SQL_DIR / "card_embeddings_staging.sql").read_text())
+EMBEDDINGS_MERGE_SQL = cast(LiteralString, (SQL_DIR / "card_embeddings_merge.sql").read_text())
+
+EMBEDDING_COLUMNS = ("card_id", "oracle_id", "schema_fingerprint", "embedding")
+DEFAULT_K = 10
+DEFAULT_BUILD_BATCH_SIZE = 10_000
+
+
+class VectorBinaryDumper(Dumper):
+    """Dump a NumPy vector in pgvector's binary format (dim, unused, float4 values)."""
+
+    format = Format.BINARY
+
+    def dump(self, obj) -> bytes:
+        vector = np.asarray(obj, dtype=">f4")
+        return struct.pack(">HH", len(vector), 0) + vector.tobytes()
+
+
+def register_vector_dumper(cur: psycopg.Cursor) -> int:
+    """Teach a cursor to COPY NumPy arrays into vector columns.
+
+    Returns:
+        The oid of the vector type in this database.
+
+    Raises:
+        RuntimeError: If the pgvector extension is not installed.
+    """
+    info = TypeInfo.fetch(cur.connection, "vector")
+    if info is None:
+        raise RuntimeError("The pgvector extension is not installed in this database")
+    dumper = type("VectorOidDumper", (VectorBinaryDumper,), {"oid": info.oid})
+    cur.adapters.register_dumper(np.ndarray, dumper)
+    return info.oid
+
+
+def vector_literal(vector: np.ndarray) -> str:
+    """Format a vector as pgvector text input, e.g. '[0.1,0.2]'."""
+    return "[" + ",".join(repr(float(value)) for value in np.asarray(vector, dtype=np.float32)) + "]"
+
+
+def create_embeddings_table(dim: int = FEATURE_SCHEMA.dim) -> None:
+    """Create the vector extension, card_embeddings and its indexes if missing.
+
+    Args:
+        dim: Width of the stored vectors.
+    """
+    with get_cursor() as cur:
+        cur.execute(sql.SQL(EMBEDDINGS_DDL).format(dim=sql.Literal(dim)))
+    logger.info("card_embeddings table ready (dim=%d)", dim)
+
+
+def load_embeddings(rows: Iterable[tuple[str, Optional[str], np.ndarray]], schema_fingerprint: str) -> int:
+    """Bulk load vectors with a binary COPY into staging and one upsert.
+
+    Args:
+        rows: (card_id, oracle_id, vector) tuples; consumed lazily.
+        schema_fingerprint: FeatureSchema fingerprint the vectors were built with.
+
+    Returns:
+        Number of rows copied.
+    """
+    copy_sql = sql.SQL("COPY card_embeddings_staging ({columns}) FROM STDIN (FORMAT BINARY)").format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in EMBEDDING_COLUMNS)
+    )
+    start = time.perf_counter()
+    copied = 0
+    with get_cursor() as cur:
+        vector_oid = register_vector_dumper(cur)
+        cur.execute(EMBEDDINGS_STAGING_SQL)
+        with cur.copy(copy_sql) as copy:
+            copy.set_types(["text", "text", "text", vector_oid])
+            for card_id, oracle_id, vector in rows:
+                copy.write_row((card_id, oracle_id, schema_fingerprint, vector))
+                copied += 1
+        cur.execute(EMBEDDINGS_MERGE_SQL)
+    logger.info("Loaded %d embeddings in %.3fs", copied, time.perf_counter() - start)
+    return copied
+
+
+def build_embeddings(
+    batch_size: int = DEFAULT_BUILD_BATCH_SIZE, card_ids: Optional[Sequence[str]] = None, workers: int = 1
+) -> int:
+    """Vectorize cards from the cards table and store the vectors.
+
+    Args:
+        batch_size: Cards vectorized per CardVectorizer.transform() call (or per task with workers > 1).
+        card_ids: Only (re)build these cards; defaults to every card.
+        workers: Vectorize on this many processes (see transform_parallel()).
+
+    Returns:
+        Number of embeddings loaded.
+    """
+    vectorizer = CardVectorizer()
+    cards = fetch_card_rows(ids=card_ids)
+
+    def rows():
+        if workers > 1:
+            matrix, _ = transform_parallel(cards, workers, batch_size, vectorizer)
+            for card, vector in zip(cards, matrix):
+                yield card["id"], card["oracle_id"], vector
+            return
+        for start in range(0, len(cards), batch_size):
+            batch = cards[start:start + batch_size]
+            for card, vector in zip(batch, vectorizer.transform(batch)):
+                yield card["id"], card["oracle_id"], vector
+
+    return load_embeddings(rows(), vectorizer.schema.fingerprint)
+
+
+def apply_embeddings_delta(delta: CardsDelta) -> int:
+    """Re-embed the inserted and updated cards of one card load.
+
+    Deleted cards need no work: their embeddings are removed by ON DELETE CASCADE.
+
+    Returns:
+        Number of embeddings loaded.
+    """
+    changed = delta.changed
+    return build_embeddings(card_ids=changed) if changed else 0
+
+
+def build_knn_query(
+    query: sql.Composable,
+    k: int,
+    legal_in: Optional[str] = None,
+    color_identity: Optional[Sequence[str]] = None,
+    set_code: Optional[str] = None,
+) -> tuple[sql.Composed, list]:
+    """Compose the kNN statement and its parameters.
+
+    Args:
+        query: Scalar SQL expression (or subquery) yielding the query vector.
+        k: Number of neighbours.
+        legal_in: Only cards 'legal' in this format (one of card_masks.FORMATS).
+        color_identity: Only cards whose color identity is within these colors.
+        set_code: Only cards from this set.
+
+    Returns:
+        (statement, params) ready for cursor.execute().
+    """
+    # Both filters test the precomputed bitset columns of cards (see card_masks)
+    filters = []
+    params: list = []
+    if legal_in is not None:
+        filters.append(sql.SQL("c.legal_formats & %s <> 0"))
+        params.append(format_bit(legal_in))
+    if color_identity is not None:
+        filters.append(sql.SQL("c.color_identity_bits & %s = 0"))
+        params.append(ALL_COLORS & ~color_mask(color_identity))
+    if set_code is not None:
+        filters.append(sql.SQL("c.set_code = %s"))
+        params.append(set_code)
+    where = sql.SQL("WHERE ") + sql.SQL(" AND ").join(filters) if filters else sql.SQL("")
+
+    # The query vector appears once, as the ORDER BY distance, so the planner
+    # can answer the ORDER BY ... LIMIT from the HNSW index
+    statement = sql.SQL(
+        "SELECT c.id, c.name, e.embedding <=> ({query}) AS distance "
+        "FROM card_embeddings e JOIN cards c ON c.id = e.card_id "
+        "{where} ORDER BY distance LIMIT %s"
+    ).format(query=query, where=where)
+    return statement, params + [k]
+
+
+def _run_knn(
+    statement: sql.Composed, params: list, ef_search: Optional[int], query_card: Optional[str] = None
+) -> list[tuple[str, str, float]]:
+    """Execute a kNN statement, optionally widening the HNSW search.
+
+    Raises:
+        KeyError: If query_card is given and has no stored embedding (its
+            distances would all be NULL).
+    """
+    with get_cursor() as cur:
+        if query_card is not None:
+            cur.execute("SELECT 1 FROM card_embeddings WHERE card_id = %s", (query_card,))
+            if cur.fetchone() is None:
+                raise KeyError(f"Card {query_card} has no embedding")
+        if ef_search is not None:
+            # Filters are applied to the HNSW candidates, so selective filters need a wider search
+            cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),))
+        cur.execute(statement, params)
+        return [(card_id, name, 1.0 - float(distance)) for card_id, name, distance in cur.fetchall()]
+
+
+def knn(
+    vector: np.ndarray,
+    k: int = DEFAULT_K,
+    ef_search: Optional[int] = None,
+    **filters,
+) -> list[tuple[str, str, float]]:
+    """Find the cards most similar to a vector, filtered in SQL.
+
+    Args:
+        vector: Query vector (same feature schema as the stored ones).
+        k: Number of neighbours.
+        ef_search: Optional hnsw.ef_search for this query.
+        **filters: legal_in, color_identity and/or set_code (see build_knn_query()).
+
+    Returns:
+        (card id, name, cosine similarity) tuples, most similar first.
+    """
+    statement, params = build_knn_query(sql.SQL("%s::vector"), k, **filters)
+    return _run_knn(statement, [vector_literal(vector)] + params, ef_search)
+
+
+def knn_by_card(
+    card_id: str,
+    k: int = DEFAULT_K,
+    ef_search: Optional[int] = None,
+    **filters,
+) -> list[tuple[str, str, float]]:
+    """Find the cards most similar to a stored card, excluding the card itself.
+
+    Args:
+        card_id: Query card id; its vector is read from card_embeddings in the same statement.
+        k: Number of neighbours.
+        ef_search: Optional hnsw.ef_search for this query.
+        **filters: legal_in, color_identity and/or set_code (see build_knn_query()).
+
+    Returns:
+        (card id, name, cosine similarity) tuples, most similar first.
+
+    Raises:
+        KeyError: If the card is unknown or has no embedding.
+    """
+    query = sql.SQL("SELECT embedding FROM card_embeddings WHERE card_id = %s")
+    statement, params = build_knn_query(query, k + 1, **filters)
+    results = _run_knn(statement, [card_id] + params, ef_search, query_card=card_id)
+    return [result for result in results if result[0] != card_id][:k]
+
+
+def main() -> None:
+    """Create the embeddings table and (re)build it from the cards table.
+
+    EMBEDDING_WORKERS sets the number of vectorizing processes (default 1).
+    """
+    setup_logging(log_level=logging.INFO)
+    create_embeddings_table()
+    build_embeddings(workers=int(os.getenv("EMBEDDING_WORKERS", "1")))
+
+
+if __name__ == "__main__":
+    main()
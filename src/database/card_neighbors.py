@@ -0,0 +1,192 @@
+"""
+Storage of the precomputed neighbour table in Postgres.
+
+card_neighbors holds one row per oracle card with the oracle keys and scores
+of its top-N most similar cards (see app.services.neighbor_table), so a
+"similar cards" page is a single primary-key lookup instead of a kNN query.
+
+Run with:
+    PYTHONPATH=src python -m database.card_neighbors [-n 50] [--workers 8] [--file neighbors.npz]
+
+With --load, the bulk-data file is loaded into the cards table first and only
+the lists the load can affect are recomputed, starting from the table a
+previous run saved to --file:
+    PYTHONPATH=src python -m database.card_neighbors --file neighbors.npz --load default-cards.json.gz [--prune]
+"""
+
+import argparse
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterable, LiteralString, Mapping, Optional, Sequence, cast
+
+import numpy as np
+from psycopg import sql
+
+from app.config.logging_config import setup_logging
+from app.services.neighbor_table import DEFAULT_NEIGHBORS, NeighborTable, update_neighbor_table
+from app.services.printings import OracleSimilaritySearch
+from app.services.vector_service import FEATURE_SCHEMA
+from database.db import get_cursor
+from database.etl.cards.cards_bulk_file import load_bulk_file
+from database.etl.cards.cards_etl import CardsDelta
+
+logger = logging.getLogger(__name__)
+
+SQL_DIR = Path(__file__).parent / "sql"
+NEIGHBORS_DDL = cast(LiteralString, (SQL_DIR / "create_tables" / "card_neighbors.sql").read_text())
+NEIGHBORS_STAGING_SQL = cast(LiteralString, (SQL_DIR / "upsert" / "card_neighbors_staging.sql").read_text())
+NEIGHBORS_MERGE_SQL = cast(LiteralString, (SQL_DIR / "upsert" / "card_neighbors_merge.sql").read_text())
+
+NEIGHBOR_COLUMNS = ("oracle_id", "neighbor_ids", "scores", "schema_fingerprint")
+
+FETCH_NEIGHBORS_SQL = """
+SELECT n.neighbor_ids[1:%(k)s], n.scores[1:%(k)s]
+FROM cards c
+JOIN card_neighbors n ON n.oracle_id = COALESCE(c.oracle_id, c.id)
+WHERE c.id = %(card_id)s
+"""
+
+
+def create_neighbors_table() -> None:
+    """Create card_neighbors if missing (databases initialized before it was added)."""
+    with get_cursor() as cur:
+        cur.execute(NEIGHBORS_DDL)
+
+
+def store_neighbors(
+    table: NeighborTable, positions: Optional[Iterable[int]] = None, removed_ids: Iterable[str] = ()
+) -> int:
+    """Upsert neighbour lists with a COPY into staging and one merge.
+
+    Args:
+        table: Neighbour table to store.
+        positions: Only store these rows (e.g. those recomputed by update_neighbor_table()); defaults to all.
+        removed_ids: Oracle keys whose rows are deleted.
+
+    Returns:
+        Number of rows copied.
+    """
+    copy_sql = sql.SQL("COPY card_neighbors_staging ({columns}) FROM STDIN (FORMAT BINARY)").format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in NEIGHBOR_COLUMNS)
+    )
+    rows = range(len(table)) if positions is None else positions
+    start = time.perf_counter()
+    copied = 0
+    with get_cursor() as cur:
+        cur.execute(NEIGHBORS_STAGING_SQL)
+        with cur.copy(copy_sql) as copy:
+            copy.set_types(["text", "text[]", "float4[]", "text"])
+            for position in rows:
+                neighbors = table.row(int(position))
+                copy.write_row((
+                    table.ids[position],
+                    [neighbor_id for neighbor_id, _ in neighbors],
+                    [score for _, score in neighbors],
+                    table.fingerprint,
+                ))
+                copied += 1
+        cur.execute(NEIGHBORS_MERGE_SQL)
+        removed = list(removed_ids)
+        if removed:
+            cur.execute("DELETE FROM card_neighbors WHERE oracle_id = ANY(%s)", (removed,))
+    logger.info("Stored %d neighbour lists in %.3fs", copied, time.perf_counter() - start)
+    return copied
+
+
+def fetch_neighbors(card_id: str, k: int = DEFAULT_NEIGHBORS) -> list[tuple[str, float]]:
+    """Precomputed most similar cards of a printing, as (oracle key, score), best first.
+
+    Returns:
+        An empty list if the card or its neighbour row does not exist.
+    """
+    with get_cursor() as cur:
+        cur.execute(FETCH_NEIGHBORS_SQL, {"card_id": card_id, "k": k})
+        row = cur.fetchone()
+    if row is None:
+        return []
+    neighbor_ids, scores = row
+    return list(zip(neighbor_ids, scores))
+
+
+def apply_card_delta(
+    table: NeighborTable,
+    search: OracleSimilaritySearch,
+    delta: CardsDelta,
+    rows: Optional[Sequence[Mapping[str, Any]]] = None,
+    workers: int = 1,
+) -> tuple[NeighborTable, np.ndarray, list[str]]:
+    """Update the index and the neighbour table computed from it after one card load.
+
+    Args:
+        table: Table computed from search before the load.
+        search: Oracle-level index, updated in place.
+        delta: CardsLoadResult.delta of the load.
+        rows: Printings of the affected oracle keys (see OracleSimilaritySearch.apply_delta()).
+        workers: Processes used to recompute the affected rows.
+
+    Returns:
+        (table, recomputed, removed): the updated table, its recomputed row
+        numbers and the oracle keys it no longer holds, ready for store_neighbors().
+    """
+    keys = search.apply_delta(delta, rows)
+    search.search.compact()
+    table, recomputed = update_neighbor_table(table, search.search, keys.changed, keys.deleted, workers=workers)
+    return table, recomputed, keys.deleted
+
+
+def load_and_update(
+    path: Path, bulk_file: Path, prune: bool = False, workers: int = 1
+) -> tuple[NeighborTable, Optional[np.ndarray], list[str]]:
+    """Load a bulk-data file and bring the table saved at path up to date with it.
+
+    The table must have been computed from the current cards table with the
+    current feature schema; otherwise every list is recomputed after the load.
+
+    Returns:
+        (table, recomputed, removed) as for apply_card_delta(); recomputed is
+        None when the table was rebuilt.
+    """
+    table = NeighborTable.load(path)
+    search = OracleSimilaritySearch.from_database()
+    stale = table.fingerprint != FEATURE_SCHEMA.fingerprint or set(table.ids.tolist()) != set(search.search.ids.tolist())
+    delta = load_bulk_file(bulk_file, prune=prune).delta
+    if not stale:
+        return apply_card_delta(table, search, delta, workers=workers)
+
+    logger.warning("%s was not computed from the current cards and feature schema, rebuilding it", path)
+    search.apply_delta(delta)
+    search.search.compact()
+    rebuilt = NeighborTable.build(search.search, table.n, workers=workers, fingerprint=FEATURE_SCHEMA.fingerprint)
+    return rebuilt, None, sorted(set(table.ids.tolist()) - set(rebuilt.ids.tolist()))
+
+
+def main() -> None:
+    """Compute the neighbours of every oracle card and store them (and optionally a .npz file)."""
+    parser = argparse.ArgumentParser(description="Precompute the top-N similar cards of every oracle card")
+    parser.add_argument("-n", type=int, default=DEFAULT_NEIGHBORS, help="neighbours per card")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("EMBEDDING_WORKERS", "1")))
+    parser.add_argument("--file", type=Path, help="also save the table to this .npz file")
+    parser.add_argument("--load", type=Path, help="load this bulk-data file, then update the table saved in --file")
+    parser.add_argument("--prune", action="store_true", help="with --load: the file is a complete dump, delete missing cards")
+    args = parser.parse_args()
+    if args.load and not (args.file and args.file.exists()):
+        parser.error("--load updates the table of a previous run: pass its .npz file with --file")
+    setup_logging(log_level=logging.INFO)
+
+    create_neighbors_table()
+    if args.load:
+        table, recomputed, removed = load_and_update(args.file, args.load, args.prune, args.workers)
+        store_neighbors(table, positions=recomputed, removed_ids=removed)
+    else:
+        search = OracleSimilaritySearch.from_database().search
+        table = NeighborTable.build(search, args.n, workers=args.workers, fingerprint=FEATURE_SCHEMA.fingerprint)
+        store_neighbors(table)
+    if args.file:
+        table.save(args.file)
+    logger.info("Neighbour table covers %d oracle cards (%d with neighbours)", len(table), int(np.sum(table.neighbors[:, 0] >= 0)))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,26 +7,58 @@ The functions in this module have the following call hierarchy:
     test_connection()
         └── get_cursor()
             └── get_db_connection()
-                └── get_connection()
+                └── get_pool()
                     └── get_database_url()
 
+    get_connection()
+        └── get_database_url()
+
+    get_async_cursor()
+        └── get_async_db_connection()
+            └── get_async_pool()
+                └── get_database_url()
+
 Function Dependencies:
 - get_database_url() - Base function that retrieves database URL from environment
-- get_connection() - Creates a connection using get_database_url()
-- get_db_connection() - Context manager wrapping get_connection() with auto-cleanup
+- get_pool() - Lazily creates the process-wide ConnectionPool using get_database_url()
+- close_pool() - Closes the process-wide pool (registered with atexit)
+- get_connection() - Creates a dedicated, unpooled connection using get_database_url()
+- get_db_connection() - Context manager borrowing a pooled connection with auto-cleanup
 - get_cursor() - Higher-level context manager providing both connection and cursor
 - test_connection() - Utility function using get_cursor() to verify connectivity
+- get_async_pool() / get_async_db_connection() / get_async_cursor() / close_async_pool()
+  - asyncio counterparts for serving code
 
 Recommended Usage:
 - Use get_cursor() for most database operations (handles connection, cursor, and cleanup)
 - Use get_db_connection() when you need direct connection access
 - Use get_connection() only when manual connection management is required
+- Use get_async_cursor() from async code (e.g. request handlers)
+
+Connection Pooling
+------------------
+get_db_connection() and get_cursor() draw connections from a single
+psycopg_pool.ConnectionPool per process instead of opening a new TCP +
+auth handshake for every call. The pool is created on first use and sized
+via environment variables:
+
+- DB_POOL_MIN_SIZE (default 1)   - connections kept open at all times
+- DB_POOL_MAX_SIZE (default 10)  - upper bound on concurrent connections
+- DB_POOL_MAX_IDLE (default 300) - seconds before an idle connection above
+  min size is closed
+- DB_POOL_TIMEOUT (default 30)   - seconds to wait for a free connection
+
+Connections are health-checked on checkout (a broken connection is discarded
+and replaced transparently) and the pool is closed at interpreter exit.
+
+Each get_cursor() block is timed as the db_cursor span (app.metrics): pool
+checkout, the statements and the commit.
 
 Key Differences Between Connection Functions
 ---------------------------------------------
 
 get_connection():
-    - Returns: Raw psycopg.Connection object
+    - Returns: Raw psycopg.Connection object (NOT pooled)
     - Resource Management: MANUAL - You must close the connection yourself
     - Transaction Management: MANUAL - You must call commit() or rollback()
     - Error Handling: MANUAL - No automatic rollback on errors
@@ -34,8 +66,8 @@ get_connection():
       integrating with code that expects a connection object
 
 get_db_connection():
-    - Returns: psycopg.Connection via context manager
-    - Resource Management: AUTOMATIC - Connection closed on context exit
+    - Returns: psycopg.Connection via context manager (borrowed from the pool)
+    - Resource Management: AUTOMATIC - Connection returned to the pool on context exit
     - Transaction Management: AUTOMATIC - Commits on success, rolls back on error
     - Error Handling: AUTOMATIC - Rolls back transaction if exception occurs
     - Use When: You need direct connection access (e.g., for multiple cursors,
@@ -44,7 +76,7 @@ get_db_connection():
 
 get_cursor():
     - Returns: psycopg.Cursor via context manager
-    - Resource Management: AUTOMATIC - Both cursor and connection cleaned up
+    - Resource Management: AUTOMATIC - Cursor closed and connection returned to the pool
     - Transaction Management: AUTOMATIC - Commits on success, rolls back on error
     - Error Handling: AUTOMATIC - Rolls back transaction if exception occurs
     - Use When: Standard database operations where you only need one cursor
@@ -56,18 +88,38 @@ Summary:
     get_connection()    ← Use only when you need manual control
 """
 
+import asyncio
+import atexit
 import logging
 import os
-from contextlib import contextmanager
-from typing import Generator
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Generator, Optional
 
 import psycopg
 from dotenv import load_dotenv
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from app import metrics
 
 # Load environment variables from .env file
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+POOL_NAME = "mtg-similarcards"
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))  # sec
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # sec
+
+_pool: Optional[ConnectionPool] = None  # pylint: disable=invalid-name
+_pool_lock = threading.Lock()
+_async_pool: Optional[AsyncConnectionPool] = None  # pylint: disable=invalid-name
+# One lock per event loop: an asyncio.Lock binds to the first loop that waits on it
+_async_pool_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
 def get_database_url() -> str:
     """Get database URL from environment variables."""
     return os.getenv(
@@ -76,9 +128,57 @@ def get_database_url() -> str:
     )
 
 
+def get_pool() -> ConnectionPool:
+    """
+    Return the process-wide connection pool, creating it on first use.
+
+    The pool checks every connection on checkout (ConnectionPool.check_connection)
+    so callers never receive a connection that was dropped by the server while idle.
+
+    Returns:
+        psycopg_pool ConnectionPool object
+    """
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                logger.info(
+                    "Opening connection pool (min=%d, max=%d)", POOL_MIN_SIZE, POOL_MAX_SIZE
+                )
+                _pool = ConnectionPool(
+                    get_database_url(),
+                    min_size=POOL_MIN_SIZE,
+                    max_size=POOL_MAX_SIZE,
+                    max_idle=POOL_MAX_IDLE,
+                    timeout=POOL_TIMEOUT,
+                    check=ConnectionPool.check_connection,
+                    name=POOL_NAME,
+                    open=True,
+                )
+    return _pool
+
+
+def close_pool() -> None:
+    """
+    Close the process-wide connection pool, if open.
+
+    Registered with atexit so connections are released cleanly on shutdown;
+    safe to call more than once. A later get_pool() call opens a fresh pool.
+    """
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is not None:
+            logger.info("Closing connection pool")
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_pool)
+
+
 def get_connection() -> psycopg.Connection:
     """
-    Create and return a new database connection.
+    Create and return a new, unpooled database connection.
     
     Returns:
         psycopg Connection object
@@ -98,8 +198,8 @@ def get_connection() -> psycopg.Connection:
 @contextmanager
 def get_db_connection() -> Generator[psycopg.Connection, None, None]:
     """
-    Context manager for database connections.
-    Automatically handles connection cleanup.
+    Context manager for pooled database connections.
+    Commits on success, rolls back on error and returns the connection to the pool.
     
     Yields:
         psycopg Connection object
@@ -110,15 +210,8 @@ def get_db_connection() -> Generator[psycopg.Connection, None, None]:
                 cur.execute("SELECT * FROM sets")
                 results = cur.fetchall()
     """
-    conn = get_connection()
-    try:
+    with get_pool().connection() as conn:
         yield conn
-        conn.commit()
-    except psycopg.Error:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
 
 
 @contextmanager
@@ -135,7 +228,7 @@ def get_cursor() -> Generator[psycopg.Cursor, None, None]:
             cur.execute("SELECT * FROM sets")
             results = cur.fetchall()
     """
-    with get_db_connection() as conn:
+    with metrics.span("db_cursor"), get_db_connection() as conn:
         cursor = conn.cursor()
         try:
             yield cursor
@@ -143,6 +236,94 @@ def get_cursor() -> Generator[psycopg.Cursor, None, None]:
             cursor.close()
 
 
+def _async_pool_lock() -> asyncio.Lock:
+    """The running event loop's lock guarding the async pool."""
+    loop = asyncio.get_running_loop()
+    with _pool_lock:
+        lock = _async_pool_locks.get(loop)
+        if lock is None:
+            lock = _async_pool_locks[loop] = asyncio.Lock()
+        return lock
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Return the process-wide async connection pool, opening it on first use.
+
+    Must be awaited from inside the event loop that will use the pool.
+
+    Returns:
+        psycopg_pool AsyncConnectionPool object
+    """
+    global _async_pool  # pylint: disable=global-statement
+    if _async_pool is None:
+        # Coroutines awaiting the first open() must not each build a pool
+        async with _async_pool_lock():
+            if _async_pool is None:
+                logger.info(
+                    "Opening async connection pool (min=%d, max=%d)", POOL_MIN_SIZE, POOL_MAX_SIZE
+                )
+                pool = AsyncConnectionPool(
+                    get_database_url(),
+                    min_size=POOL_MIN_SIZE,
+                    max_size=POOL_MAX_SIZE,
+                    max_idle=POOL_MAX_IDLE,
+                    timeout=POOL_TIMEOUT,
+                    check=AsyncConnectionPool.check_connection,
+                    name=f"{POOL_NAME}-async",
+                    open=False,
+                )
+                await pool.open()
+                _async_pool = pool
+    return _async_pool
+
+
+async def close_async_pool() -> None:
+    """
+    Close the process-wide async connection pool, if open.
+
+    Call from the serving application's shutdown hook.
+    """
+    global _async_pool  # pylint: disable=global-statement
+    async with _async_pool_lock():
+        if _async_pool is not None:
+            logger.info("Closing async connection pool")
+            await _async_pool.close()
+            _async_pool = None
+
+
+@asynccontextmanager
+async def get_async_db_connection() -> AsyncGenerator[psycopg.AsyncConnection, None]:
+    """
+    Async context manager for pooled database connections.
+    Commits on success, rolls back on error and returns the connection to the pool.
+
+    Yields:
+        psycopg AsyncConnection object
+    """
+    pool = await get_async_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def get_async_cursor() -> AsyncGenerator[psycopg.AsyncCursor, None]:
+    """
+    Async context manager that provides both a pooled connection and cursor.
+
+    Yields:
+        psycopg AsyncCursor object
+
+    Example:
+        async with get_async_cursor() as cur:
+            await cur.execute("SELECT * FROM sets")
+            results = await cur.fetchall()
+    """
+    async with get_async_db_connection() as conn:
+        async with conn.cursor() as cursor:
+            yield cursor
+
+
 def test_connection() -> bool:
     """
     Test the database connection.
@@ -156,5 +337,5 @@ def test_connection() -> bool:
             logger.info("Database connection successful.")
             return True
     except psycopg.Error as e:
-        logger.info(f"Database connection failed: {e}")
+        logger.info("Database connection failed: %s", e)
         return False
@@ -0,0 +1,168 @@
+"""Price-only refresh of the card_prices table.
+
+Prices change daily while the rest of a card barely ever does, so refreshing
+them through the full card load (validation of ~50 fields, COPY of wide rows,
+a content-hash merge over cards) is mostly wasted work. This job streams only
+id + prices out of a Scryfall bulk-data file:
+
+1. (card_id, usd, usd_foil, usd_etched, eur, eur_foil, tix) rows are COPYed
+   into a temporary staging table; cards are not validated beyond that.
+2. card_prices_merge.sql upserts them into card_prices, rewriting only rows
+   whose prices changed.
+3. Optionally, the day's prices are also stored in card_price_history, which is
+   partitioned by month; the partition is created on first use.
+
+Run with:
+    PYTHONPATH=src python -m database.etl.cards.card_prices path/to/default-cards.json.gz [--history]
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterable, Iterator, LiteralString, Optional, cast
+
+import psycopg
+from psycopg import sql
+
+from app.config.logging_config import setup_logging
+from database.db import get_cursor
+from database.etl.cards.cards_bulk_file import iter_bulk_cards
+from database.etl.cards.cards_etl import CARD_PRICES_MERGE_SQL, CARD_PRICES_STAGING_SQL, SQL_DIR
+
+logger = logging.getLogger(__name__)
+
+PRICE_HISTORY_INSERT_SQL = cast(LiteralString, (SQL_DIR / "card_price_history_insert.sql").read_text())
+
+# Scryfall price keys, in card_prices column order
+PRICE_KEYS = ("usd", "usd_foil", "usd_etched", "eur", "eur_foil", "tix")
+PRICE_COLUMNS = ("card_id",) + PRICE_KEYS
+
+
+@dataclass
+class PricesLoadResult:
+    """Outcome of one price refresh.
+
+    Attributes:
+        copied: Price rows streamed into staging.
+        updated: Rows of card_prices inserted or changed.
+        history: Rows written to card_price_history (0 without a history date).
+    """
+
+    copied: int = 0
+    updated: int = 0
+    history: int = 0
+
+    @property
+    def unchanged(self) -> int:
+        """Staged rows that did not change card_prices (same prices, or unknown card)."""
+        return self.copied - self.updated
+
+
+def iter_price_rows(cards: Iterable[dict[str, Any]]) -> Iterator[tuple[str, ...]]:
+    """Yield (card_id, *prices) rows in PRICE_COLUMNS order from Scryfall card dicts.
+
+    Prices stay the decimal strings Scryfall sends; Postgres parses them.
+    Cards without an id are skipped.
+    """
+    for card in cards:
+        card_id = card.get("id")
+        if card_id is None:
+            continue
+        prices = card.get("prices") or {}
+        yield (card_id,) + tuple(prices.get(key) for key in PRICE_KEYS)
+
+
+def history_partition(day: date) -> tuple[str, date, date]:
+    """Name and [start, end) bounds of the card_price_history partition holding day."""
+    start = day.replace(day=1)
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return f"card_price_history_{start:%Y_%m}", start, end
+
+
+def create_history_partition(cur: psycopg.Cursor, day: date) -> str:
+    """Create the monthly card_price_history partition for day if missing.
+
+    Returns:
+        Name of the partition.
+    """
+    name, start, end = history_partition(day)
+    cur.execute(
+        sql.SQL(
+            "CREATE TABLE IF NOT EXISTS {name} PARTITION OF card_price_history FOR VALUES FROM ({start}) TO ({end})"
+        ).format(name=sql.Identifier(name), start=sql.Literal(start), end=sql.Literal(end))
+    )
+    return name
+
+
+def load_prices(rows: Iterable[tuple], history_date: Optional[date] = None) -> PricesLoadResult:
+    """Bulk load price rows via a COPY into staging and one merge into card_prices.
+
+    Args:
+        rows: Tuples in PRICE_COLUMNS order (see iter_price_rows()); consumed lazily.
+        history_date: Also store the prices as the snapshot of this day.
+
+    Returns:
+        PricesLoadResult with copied, updated and history row counts.
+
+    Raises:
+        psycopg.Error: If the load fails (the transaction is rolled back).
+    """
+    copy_sql = sql.SQL("COPY card_prices_staging ({columns}) FROM STDIN").format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in PRICE_COLUMNS)
+    )
+    start = time.perf_counter()
+    result = PricesLoadResult()
+
+    with get_cursor() as cur:
+        cur.execute(CARD_PRICES_STAGING_SQL)
+        with cur.copy(copy_sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+                result.copied += 1
+        cur.execute(CARD_PRICES_MERGE_SQL)
+        result.updated = cur.rowcount
+        if history_date is not None:
+            create_history_partition(cur, history_date)
+            cur.execute(PRICE_HISTORY_INSERT_SQL, {"price_date": history_date})
+            result.history = cur.rowcount
+
+    logger.info(
+        "Refreshed %d prices in %.3fs: %d updated, %d unchanged, %d history rows",
+        result.copied,
+        time.perf_counter() - start,
+        result.updated,
+        result.unchanged,
+        result.history,
+    )
+    return result
+
+
+def refresh_prices_from_bulk_file(path: str | Path, history_date: Optional[date] = None) -> PricesLoadResult:
+    """Stream the prices of a bulk-data file into card_prices.
+
+    Args:
+        path: Path to a plain or gzip-compressed bulk-data JSON file.
+        history_date: Also store the prices as the snapshot of this day.
+
+    Returns:
+        PricesLoadResult with the row counts.
+    """
+    logger.info("Refreshing prices from bulk-data file %s", path)
+    return load_prices(iter_price_rows(iter_bulk_cards(path)), history_date)
+
+
+def main() -> None:
+    """Entry point for a price refresh as a script."""
+    parser = argparse.ArgumentParser(description="Refresh card_prices from a Scryfall bulk-data file")
+    parser.add_argument("bulk_file", type=Path, help="plain or gzip-compressed bulk-data JSON file")
+    parser.add_argument("--history", action="store_true", help="also store today's prices in card_price_history")
+    args = parser.parse_args()
+    setup_logging(log_level=logging.INFO)
+    refresh_prices_from_bulk_file(args.bulk_file, date.today() if args.history else None)
+
+
+if __name__ == "__main__":
+    main()
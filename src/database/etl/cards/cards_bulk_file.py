@@ -0,0 +1,174 @@
+"""Streaming reader for Scryfall bulk-data files.
+
+Scryfall publishes full card dumps (default_cards, oracle_cards, ...) as a
+single JSON array that is hundreds of MB large: https://scryfall.com/docs/api/bulk-data
+
+iter_bulk_cards() parses such a file incrementally, holding only one read
+buffer and one card in memory at a time, so peak memory stays flat no matter
+how large the dump is. Files may be plain or gzip-compressed; no network
+access is needed.
+
+Run with:
+    PYTHONPATH=src python -m database.etl.cards.cards_bulk_file path/to/default-cards.json.gz
+"""
+
+import gzip
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from app.config.logging_config import setup_logging
+from database.etl.cards.cards_etl import CardsLoadResult, load_cards_from_api
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+DEFAULT_READ_SIZE = 1 << 20  # characters per read
+WHITESPACE = " \t\n\r"
+
+
+def open_bulk_file(path: str | Path) -> TextIO:
+    """Open a bulk-data file for text reading, transparently un-gzipping it.
+
+    Compression is detected from the file's magic bytes, not its suffix.
+
+    Args:
+        path: Path to a .json or .json.gz bulk-data file.
+
+    Returns:
+        Text file object yielding decoded JSON.
+    """
+    path = Path(path)
+    with path.open("rb") as raw:
+        is_gzip = raw.read(2) == GZIP_MAGIC
+    if is_gzip:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+
+def iter_json_array(stream: TextIO, read_size: int = DEFAULT_READ_SIZE) -> Iterator[Any]:
+    """Incrementally decode the elements of a top-level JSON array.
+
+    Args:
+        stream: Text stream positioned at the start of a JSON array.
+        read_size: Number of characters read per refill of the buffer.
+
+    Yields:
+        Each decoded array element, in file order.
+
+    Raises:
+        ValueError: If the stream is not a well-formed JSON array. A malformed
+            element is reported once one more read has not completed it,
+            without buffering the rest of the stream.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def refill() -> None:
+        nonlocal buffer, pos, eof
+        chunk = stream.read(read_size)
+        if not chunk:
+            eof = True
+        # Drop consumed text only on refill, so each element is not a copy of the buffer
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace() -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            refill()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise ValueError("Bulk-data file does not start with a JSON array")
+    pos += 1
+
+    expect_element = True
+    after_comma = False
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of file inside JSON array")
+
+        char = buffer[pos]
+        if char == "]":
+            if after_comma:
+                raise ValueError("Trailing ',' before ']' in JSON array")
+            return
+        if not expect_element:
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            pos += 1
+            expect_element = after_comma = True
+            continue
+
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # An element cut off by the buffer end fails near the end of the buffer
+            # (an unterminated string is reported from its opening quote). With more
+            # than a read's worth of text after the error, the element is malformed.
+            truncated = e.msg.startswith("Unterminated string") or len(buffer) - e.pos <= read_size
+            if eof or not truncated:
+                raise ValueError(f"Malformed JSON element in array: {e}") from e
+            # Element spans the end of the buffer: read more and retry
+            refill()
+            continue
+
+        # A number could be cut off at the buffer boundary and still decode
+        if end == len(buffer) and not eof:
+            refill()
+            continue
+
+        pos = end
+        expect_element = after_comma = False
+        yield element
+
+
+def iter_bulk_cards(path: str | Path, read_size: int = DEFAULT_READ_SIZE) -> Iterator[dict[str, Any]]:
+    """Yield cards one at a time from a Scryfall bulk-data file.
+
+    Args:
+        path: Path to a plain or gzip-compressed bulk-data JSON file.
+        read_size: Number of characters read per refill of the parse buffer.
+
+    Yields:
+        Card dictionaries in file order.
+    """
+    with open_bulk_file(path) as stream:
+        yield from iter_json_array(stream, read_size=read_size)
+
+
+def load_bulk_file(path: str | Path, prune: bool = False) -> CardsLoadResult:
+    """Stream a bulk-data file into the cards table.
+
+    Args:
+        path: Path to a plain or gzip-compressed bulk-data JSON file.
+        prune: The file is a complete dump: delete cards that are not in it.
+
+    Returns:
+        CardsLoadResult with counts and the delta of changed ids.
+    """
+    logger.info("Loading cards from bulk-data file %s", path)
+    return load_cards_from_api(iter_bulk_cards(path), prune=prune)
+
+
+def main() -> None:
+    """Entry point for loading a bulk-data file as a script."""
+    setup_logging(log_level=logging.INFO)
+    if len(sys.argv) != 2:
+        logger.error("Usage: python -m database.etl.cards.cards_bulk_file <bulk-data file>")
+        sys.exit(2)
+    load_bulk_file(sys.argv[1])
+
+
+if __name__ == "__main__":
+    main()
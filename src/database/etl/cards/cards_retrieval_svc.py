@@ -4,36 +4,138 @@ Supports two retrieval strategies:
 - Collection lookup: POST /cards/collection with specific identifiers
   (set + collector_number). Scryfall limits to 75 identifiers per request;
   this service handles automatic batching.
+
+get_cards_collection() returns one list; iter_cards_collection() and
+aiter_cards_collection() yield cards batch by batch as responses arrive.
+
+Batches are fetched serially by default. With max_workers > 1, up to that
+many batches are in flight at once, sharing a TokenBucket that keeps the
+combined request rate within Scryfall's limit and backs off on 429s.
+
+Each batch is timed as the scryfall_collection_batch span (including rate
+limiter waits and 429 back-offs) and counted in scryfall_cards_found_total /
+scryfall_cards_not_found_total; see app.metrics.
 """
 
+import asyncio
 import logging
 import time
-from typing import Any
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Iterator, Optional
 
 import requests
 
+from app import metrics
 from app.config.api_endpoints import APIEndpointsConfig
-from database.etl.session_manager import SessionManager
+from database.etl.rate_limiter import TokenBucket
+from database.etl.response_cache import ResponseCache
+from database.etl.session_manager import (
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    MAX_RETRIES,
+    SessionManager,
+)
 
 logger = logging.getLogger(__name__)
 
 # Scryfall asks for 50-100 ms between requests
 RATE_LIMIT_DELAY_SECONDS = 0.1
+# Fallback pause when a 429 response carries no usable Retry-After header
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Parse a Retry-After header (delay in seconds or HTTP date).
+
+    Args:
+        value: Raw header value, or None if the header was absent.
+
+    Returns:
+        Seconds to wait; DEFAULT_RETRY_AFTER_SECONDS if the value is unusable.
+    """
+    if not value:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+@dataclass
+class CollectionSummary:
+    """Running totals for a (streamed) collection lookup.
+
+    Attributes:
+        requested: Number of identifiers requested.
+        found: Number of cards returned so far.
+        batches: Number of batches received so far.
+        not_found: Identifiers Scryfall reported as not found, in batch order.
+    """
+
+    requested: int = 0
+    found: int = 0
+    batches: int = 0
+    not_found: list[dict[str, str]] = field(default_factory=list)
+
+    def add_batch(
+        self, cards: list[dict[str, Any]], not_found: list[dict[str, str]]
+    ) -> None:
+        """Record the result of one batch."""
+        self.found += len(cards)
+        self.batches += 1
+        self.not_found.extend(not_found)
 
 
 class CardsRetrievalService(SessionManager):
     """Retrieves MTG card data from the Scryfall API.
 
     Scryfall API reference: https://scryfall.com/docs/api/cards/collection
+
+    Args:
+        timeout: Per-request timeout in seconds.
+        max_workers: Number of batches fetched concurrently. 1 keeps the
+            serial fetch with a fixed delay between batches.
+        requests_per_second: Combined request rate allowed across all
+            workers when max_workers > 1.
+        cache: Optional persistent response cache (see SessionManager).
     """
 
+    def __init__(
+        self,
+        timeout: int = DEFAULT_TIMEOUT,
+        max_workers: int = 1,
+        requests_per_second: float = 1 / RATE_LIMIT_DELAY_SECONDS,
+        cache: Optional[ResponseCache] = None,
+    ):
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be positive, got {max_workers}")
+        concurrent = max_workers > 1
+        # In concurrent mode 429s are handled here so the shared limiter can slow every worker down
+        super().__init__(
+            timeout=timeout,
+            retry_on_rate_limit=not concurrent,
+            pool_maxsize=max(max_workers, DEFAULT_POOL_MAXSIZE),
+            cache=cache,
+        )
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second) if concurrent else None
+
     def get_cards_collection(
         self, identifiers: list[dict[str, str]]
     ) -> list[dict[str, Any]]:
         """Retrieve cards by a list of identifiers via POST /cards/collection.
 
         Automatically batches requests when the identifier list exceeds
-        Scryfall's 75-item limit.
+        Scryfall's 75-item limit. Cards are returned in batch order whether
+        batches are fetched serially or concurrently.
 
         Each identifier should contain 'set' and 'collector_number' keys.
         Example: [{"set": "tdm", "collector_number": "1"}]
@@ -50,36 +152,163 @@ class CardsRetrievalService(SessionManager):
         if not identifiers:
             return []
 
+        summary = CollectionSummary()
+        all_cards: list[dict[str, Any]] = []
+        for cards in self.iter_cards_collection(identifiers, summary):
+            all_cards.extend(cards)
+        return all_cards
+
+    def iter_cards_collection(
+        self,
+        identifiers: list[dict[str, str]],
+        summary: Optional[CollectionSummary] = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yield the cards of each collection batch as soon as it arrives.
+
+        Unlike get_cards_collection(), nothing is accumulated: downstream
+        validation and DB writes can process one batch while the next is
+        still in flight. Batches are yielded in order; in concurrent mode at
+        most max_workers batches are fetched ahead of the consumer.
+
+        Args:
+            identifiers: List of card identifier dicts.
+            summary: Optional CollectionSummary, updated as batches arrive
+                and complete once the iterator is exhausted.
+
+        Yields:
+            List of card dictionaries per batch.
+
+        Raises:
+            requests.RequestException: If any batch request fails after retries.
+        """
+        summary = summary if summary is not None else CollectionSummary()
+        batches = self._split_batches(identifiers, summary)
+
+        if self.rate_limiter is None:
+            results = self._iter_batches_serially(batches)
+        else:
+            results = self._iter_batches_concurrently(batches)
+
+        for cards, not_found in results:
+            summary.add_batch(cards, not_found)
+            yield cards
+
+        self._log_summary(summary)
+
+    async def aiter_cards_collection(
+        self,
+        identifiers: list[dict[str, str]],
+        summary: Optional[CollectionSummary] = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Async counterpart of iter_cards_collection().
+
+        Requests run on worker threads via asyncio.to_thread() so the event
+        loop stays free; up to max_workers batches are in flight at once,
+        governed by the same rate limiting as the sync API.
+
+        Args:
+            identifiers: List of card identifier dicts.
+            summary: Optional CollectionSummary, updated as batches arrive.
+
+        Yields:
+            List of card dictionaries per batch, in batch order.
+
+        Raises:
+            requests.RequestException: If any batch request fails after retries.
+        """
+        summary = summary if summary is not None else CollectionSummary()
+        batches = self._split_batches(identifiers, summary)
+
+        pending: deque[asyncio.Task] = deque()
+        try:
+            for batch_num, batch in enumerate(batches, start=1):
+                if self.rate_limiter is None and batch_num > 1:
+                    # Serial mode: wait for the previous batch, then keep Scryfall's spacing
+                    cards, not_found = await pending.popleft()
+                    summary.add_batch(cards, not_found)
+                    yield cards
+                    if not self._is_cached(batch):
+                        await asyncio.sleep(RATE_LIMIT_DELAY_SECONDS)
+                elif len(pending) >= self.max_workers:
+                    cards, not_found = await pending.popleft()
+                    summary.add_batch(cards, not_found)
+                    yield cards
+                pending.append(
+                    asyncio.create_task(
+                        asyncio.to_thread(self._post_collection_batch, batch, batch_num)
+                    )
+                )
+            while pending:
+                cards, not_found = await pending.popleft()
+                summary.add_batch(cards, not_found)
+                yield cards
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self._log_summary(summary)
+
+    @staticmethod
+    def _split_batches(
+        identifiers: list[dict[str, str]], summary: CollectionSummary
+    ) -> list[list[dict[str, str]]]:
+        """Split identifiers into batches of at most 75 and record the request size."""
         batch_size = APIEndpointsConfig.MAX_COLLECTION_BATCH_SIZE
         batches = [
             identifiers[i : i + batch_size]
             for i in range(0, len(identifiers), batch_size)
         ]
+        summary.requested += len(identifiers)
 
         logger.info(
             "Fetching %d cards in %d batch(es)", len(identifiers), len(batches)
         )
+        return batches
 
-        all_cards: list[dict[str, Any]] = []
-        all_not_found: list[dict[str, str]] = []
+    @staticmethod
+    def _log_summary(summary: CollectionSummary) -> None:
+        """Log the not-found identifiers and the total number of cards retrieved."""
+        if summary.not_found:
+            logger.warning(
+                "%d identifier(s) were not found: %s",
+                len(summary.not_found),
+                summary.not_found,
+            )
+
+        logger.info("Retrieved %d cards total", summary.found)
 
+    def _iter_batches_serially(
+        self, batches: list[list[dict[str, str]]]
+    ) -> Iterator[tuple[list[dict[str, Any]], list[dict[str, str]]]]:
+        """Fetch batches one after another with a fixed delay in between."""
         for batch_num, batch in enumerate(batches, start=1):
-            if batch_num > 1:
+            if batch_num > 1 and not self._is_cached(batch):
                 time.sleep(RATE_LIMIT_DELAY_SECONDS)
+            yield self._post_collection_batch(batch, batch_num)
 
-            cards, not_found = self._post_collection_batch(batch, batch_num)
-            all_cards.extend(cards)
-            all_not_found.extend(not_found)
-
-        if all_not_found:
-            logger.warning(
-                "%d identifier(s) were not found: %s",
-                len(all_not_found),
-                all_not_found,
-            )
+    def _iter_batches_concurrently(
+        self, batches: list[list[dict[str, str]]]
+    ) -> Iterator[tuple[list[dict[str, Any]], list[dict[str, str]]]]:
+        """Fetch batches on a thread pool, yielding results in batch order.
 
-        logger.info("Retrieved %d cards total", len(all_cards))
-        return all_cards
+        Only max_workers batches are submitted ahead of the consumer, so a
+        slow consumer does not cause every remaining response to pile up.
+        """
+        workers = min(self.max_workers, len(batches)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scryfall") as executor:
+            pending: deque[Future] = deque()
+            try:
+                for batch_num, batch in enumerate(batches, start=1):
+                    if len(pending) >= workers:
+                        yield pending.popleft().result()
+                    pending.append(
+                        executor.submit(self._post_collection_batch, batch, batch_num)
+                    )
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
 
     def _post_collection_batch(
         self,
@@ -108,18 +337,21 @@ class CardsRetrievalService(SessionManager):
             url,
         )
 
-        try:
-            response = self.session.post(url, json=body, timeout=self.timeout)
-            response.raise_for_status()
-        except requests.RequestException:
-            logger.exception(
-                "Batch %d: Failed to fetch cards from %s", batch_num, url
-            )
-            raise
+        with metrics.span("scryfall_collection_batch"):
+            try:
+                response = self._post_with_rate_limit(url, body, batch_num)
+                response.raise_for_status()
+            except requests.RequestException:
+                logger.exception(
+                    "Batch %d: Failed to fetch cards from %s", batch_num, url
+                )
+                raise
 
-        data = response.json()
+            data = response.json()
         cards = data.get("data", [])
         not_found = data.get("not_found", [])
+        metrics.increment("scryfall_cards_found_total", len(cards))
+        metrics.increment("scryfall_cards_not_found_total", len(not_found))
 
         logger.info(
             "Batch %d: Retrieved %d cards, %d not found",
@@ -128,3 +360,54 @@ class CardsRetrievalService(SessionManager):
             len(not_found),
         )
         return cards, not_found
+
+    def _post_with_rate_limit(
+        self, url: str, body: dict, batch_num: int
+    ) -> requests.Response:
+        """POST through the shared rate limiter, backing off on 429 responses.
+
+        Without a rate limiter (serial mode) this is a plain POST; 429s are
+        then retried by the session's urllib3 retry strategy. Requests that
+        will be answered from the response cache skip the limiter.
+
+        Returns:
+            The last response received (still a 429 if retries ran out).
+        """
+        if self.rate_limiter is None or self._is_cached(body["identifiers"]):
+            return self.session.post(url, json=body, timeout=self.timeout)
+
+        for attempt in range(MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            response = self.session.post(url, json=body, timeout=self.timeout)
+            if response.status_code != 429:
+                # Only a served request shows Scryfall has capacity again; 5xx must not speed up
+                if response.ok:
+                    self.rate_limiter.record_success()
+                return response
+
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            logger.warning(
+                "Batch %d: Rate limited (attempt %d), backing off %.2fs",
+                batch_num,
+                attempt + 1,
+                delay,
+            )
+            self.rate_limiter.penalize(delay)
+        return response
+
+    def _is_cached(self, identifiers: list[dict[str, str]]) -> bool:
+        """Return True if the batch will be served from a fresh cache entry.
+
+        Cache hits do not reach Scryfall, so they need no rate limiting.
+        """
+        if self.cache is None:
+            return False
+        prepared = self.session.prepare_request(
+            requests.Request(
+                "POST",
+                APIEndpointsConfig.get_cards_collection_url(),
+                json=APIEndpointsConfig.build_collection_body(identifiers),
+            )
+        )
+        key = ResponseCache.make_key("POST", prepared.url, prepared.body)
+        return self.cache.has_fresh(key)
@@ -0,0 +1,95 @@
+"""
+Token-bucket rate limiter shared by concurrent API workers.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+# Tolerance for float rounding when checking for a whole token
+TOKEN_EPSILON = 1e-9
+# Fraction of the configured rate regained per successful request
+RECOVERY_FRACTION = 0.1
+
+
+class TokenBucket:  # pylint: disable=too-many-instance-attributes
+    """
+    Thread-safe token bucket enforcing a request rate across all workers.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; every
+    request takes one token and blocks until one is available. When the API
+    answers 429, penalize() pauses every worker for the Retry-After delay and
+    halves the rate; each successful request then recovers a fraction of the
+    configured rate (additive increase / multiplicative decrease).
+
+    Args:
+        rate: Maximum sustained requests per second.
+        capacity: Burst size. 1 spaces requests evenly at 1/rate seconds.
+        min_rate: Lower bound for the adaptive rate. Defaults to rate / 8.
+        clock: Monotonic time source (injectable for tests).
+        sleep: Sleep function (injectable for tests).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        min_rate: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last update (caller holds the lock)."""
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """Block until a request may be sent, then consume one token."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1 - TOKEN_EPSILON:
+                        self._tokens = max(0.0, self._tokens - 1)
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def penalize(self, retry_after: float) -> None:
+        """Pause all workers for retry_after seconds and halve the rate.
+
+        Args:
+            retry_after: Seconds to wait, typically from a Retry-After header.
+        """
+        with self._lock:
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + max(0.0, retry_after))
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._updated = self._blocked_until
+
+    def record_success(self) -> None:
+        """Recover part of the configured rate after a successful request."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION)
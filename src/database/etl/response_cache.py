@@ -0,0 +1,285 @@
+"""
+Persistent on-disk cache for Scryfall API responses.
+
+Responses are stored in a SQLite file keyed by method + URL + a hash of the
+request body, so both GET /sets and the POST /cards/collection batches can be
+replayed. Entries younger than the TTL are served without any network I/O.
+Expired GET entries carrying an ETag or Last-Modified header are revalidated
+with a conditional request; a 304 answer refreshes the entry instead of
+downloading it again. The cache is bounded in size and evicts the least
+recently used entries first.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(".cache") / "scryfall_responses.sqlite"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+CACHEABLE_METHODS = frozenset({"GET", "POST"})
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+
+@dataclass
+class CachedResponse:
+    """A response as stored in the cache."""
+
+    url: str
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU response cache persisted in a SQLite file.
+
+    Safe to share between threads (e.g. concurrent collection workers).
+
+    Args:
+        path: SQLite file to store responses in (created if missing).
+        ttl_seconds: Age after which an entry must be revalidated or refetched.
+        max_bytes: Upper bound on the total size of cached bodies.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(CREATE_TABLE_SQL)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    @staticmethod
+    def make_key(method: str, url: str, body: Optional[bytes | str] = None) -> str:
+        """Build the cache key for a request.
+
+        Args:
+            method: HTTP method.
+            url: Full request URL including query string.
+            body: Request body, if any.
+
+        Returns:
+            Hex digest identifying the request.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        body_hash = hashlib.sha256(body or b"").hexdigest()
+        return hashlib.sha256(f"{method.upper()} {url} {body_hash}".encode("utf-8")).hexdigest()
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """Return True if the entry is younger than the TTL."""
+        return time.time() - entry.stored_at < self.ttl_seconds
+
+    def has_fresh(self, key: str) -> bool:
+        """Return True if a non-expired entry exists for key (without marking it used)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] < self.ttl_seconds
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Look up an entry and mark it as recently used.
+
+        Returns:
+            The cached response, or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, etag, last_modified, stored_at "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        return CachedResponse(
+            url=row[0],
+            status=row[1],
+            headers=json.loads(row[2]),
+            body=row[3],
+            etag=row[4],
+            last_modified=row[5],
+            stored_at=row[6],
+        )
+
+    def put(self, key: str, method: str, response: requests.Response) -> None:
+        """Store a response and evict old entries if the cache is over size.
+
+        Args:
+            key: Cache key from make_key().
+            method: HTTP method of the request.
+            response: Response whose body has been read.
+        """
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, method, url, status, headers, body, etag, last_modified, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    method.upper(),
+                    response.url,
+                    response.status_code,
+                    json.dumps(dict(response.headers)),
+                    body,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(body),
+                ),
+            )
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        """Reset an entry's age after a successful revalidation (304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes (caller holds the lock)."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.debug("Evicted %d cached response(s)", len(evicted))
+
+    def total_bytes(self) -> int:
+        """Return the combined size of all cached bodies."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def build_cached_response(
+    entry: CachedResponse, request: requests.PreparedRequest
+) -> requests.Response:
+    """Rebuild a requests.Response from a cache entry.
+
+    The returned response has `from_cache = True` set for callers and tests.
+    """
+    response = requests.Response()
+    response.status_code = entry.status
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response._content = entry.body  # pylint: disable=protected-access
+    response.url = entry.url
+    response.request = request
+    response.reason = "OK"
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that answers requests from a ResponseCache when possible.
+
+    Only successful (200) responses are stored. Fresh entries are returned
+    without touching the network; stale GET entries with validators are
+    revalidated with If-None-Match / If-Modified-Since.
+    """
+
+    def __init__(self, cache: ResponseCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        method = (request.method or "GET").upper()
+        if method not in CACHEABLE_METHODS or stream:
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        key = ResponseCache.make_key(method, request.url, request.body)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            logger.debug("Cache hit: %s %s", method, request.url)
+            return build_cached_response(entry, request)
+
+        revalidating = False
+        if entry is not None and method == "GET":
+            if entry.etag:
+                request.headers["If-None-Match"] = entry.etag
+                revalidating = True
+            if entry.last_modified:
+                request.headers["If-Modified-Since"] = entry.last_modified
+                revalidating = True
+
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+
+        if revalidating and response.status_code == 304:
+            logger.debug("Cache revalidated: %s %s", method, request.url)
+            self.cache.touch(key)
+            return build_cached_response(entry, request)
+
+        if response.status_code == 200:
+            self.cache.put(key, method, response)
+        response.from_cache = False
+        return response
@@ -1,7 +1,16 @@
 """
 Pydantic schema validation of API responses.
 """
-from pydantic import BaseModel
+import logging
+from datetime import date
+from operator import attrgetter
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class SetsValidation(BaseModel):
@@ -36,4 +45,138 @@ class SetsValidation(BaseModel):
 class CardsValidation(BaseModel):
     """
     Validation of API response for cards endpoint.
+
+    Fields are declared in the column order of cards_upsert.sql, followed
+    by prices (stored in card_prices), so CARDS_UPSERT_COLUMNS (and the tuples
+    from validate_cards_batch()) line up with the upsert/COPY placeholders. Optional fields are those absent for
+    some card types (see schemas/README.md) or nullable in Scryfall's card
+    object (e.g. on multi-faced cards, whose faces carry the mana cost and text).
+    """
+    # Identity
+    id: str
+    oracle_id: Optional[str] = None  # absent on reversible cards
+    name: str
+    lang: str
+    released_at: date
+    layout: str
+
+    # Mana & Cost
+    mana_cost: Optional[str] = None  # absent on multi-faced cards
+    cmc: Optional[float] = None  # absent on reversible cards
+
+    # Type & Rules
+    type_line: Optional[str] = None
+    oracle_text: Optional[str] = None  # absent on multi-faced cards
+    flavor_text: Optional[str] = None
+
+    # Combat Stats (creatures)
+    power: Optional[str] = None
+    toughness: Optional[str] = None
+
+    # Planeswalker
+    loyalty: Optional[str] = None
+
+    # Colors & Keywords
+    colors: Optional[list[str]] = None  # absent on multi-faced cards
+    color_identity: list[str]
+    keywords: list[str] = []
+    produced_mana: Optional[list[str]] = None
+
+    # Related Cards (tokens, combo pieces)
+    all_parts: Optional[list[dict[str, Any]]] = None
+
+    # Legality & Availability
+    legalities: dict[str, str]
+    games: list[str] = []
+    reserved: bool = False
+    foil: bool = False
+    nonfoil: bool = False
+    finishes: list[str] = []
+
+    # Set Info
+    set_code: str = Field(alias="set")  # SET is a SQL reserved word
+    set_name: str
+    set_type: str
+    collector_number: str
+    digital: bool = False
+    rarity: str
+
+    # Card Properties
+    oversized: bool = False
+    promo: bool = False
+    promo_types: Optional[list[str]] = None
+    reprint: bool = False
+    variation: bool = False
+    booster: bool = False
+    full_art: bool = False
+    textless: bool = False
+    story_spotlight: bool = False
+
+    # Visual & Frame
+    border_color: str
+    frame: str
+    frame_effects: Optional[list[str]] = None
+    security_stamp: Optional[str] = None
+    highres_image: bool = False
+    image_status: str
+    image_uris: Optional[dict[str, str]] = None  # absent on multi-faced cards
+
+    # Artist
+    artist: Optional[str] = None
+
+    # Rankings
+    edhrec_rank: Optional[int] = None
+    penny_rank: Optional[int] = None
+
+    # Pricing
+    prices: dict[str, Optional[str]]
+
+    model_config = {
+        "extra": "ignore",  # Ignore all other fields in response body not specified above
+        "populate_by_name": True,  # accept set_code as well as Scryfall's "set"
+    }
+
+
+# Upsert/COPY column order; content_hash is computed by cards_merge.sql and the
+# filter bitsets are generated columns of cards.sql
+CARDS_UPSERT_COLUMNS = tuple(CardsValidation.model_fields)
+CARDS_DERIVED_COLUMNS = ("content_hash", "legal_formats", "color_identity_bits")
+# Validated fields that are stored outside the cards table (in card_prices)
+CARDS_PRICE_FIELDS = ("prices",)
+
+_cards_list_adapter = TypeAdapter(list[CardsValidation])
+_card_row_getter = attrgetter(*CARDS_UPSERT_COLUMNS)
+
+
+def validate_cards_batch(cards: list[dict[str, Any]]) -> list[tuple]:
+    """
+    Validate a batch of Scryfall cards and return DB-ready rows.
+
+    The whole list is validated in one TypeAdapter call (a single pass in
+    pydantic-core), and each model is turned into a tuple in
+    CARDS_UPSERT_COLUMNS order with one attrgetter call, skipping the
+    model_dump() dict. If any card is invalid, the batch is re-validated card
+    by card so that only the invalid cards are dropped (and logged).
+
+    Args:
+        cards: Card dictionaries as returned by the Scryfall API.
+
+    Returns:
+        List of tuples in CARDS_UPSERT_COLUMNS order.
     """
+    with metrics.span("validate_cards_batch"):
+        try:
+            models = _cards_list_adapter.validate_python(cards)
+        except ValidationError:
+            models = []
+            for card in cards:
+                try:
+                    models.append(CardsValidation.model_validate(card))
+                except ValidationError as e:
+                    logger.warning(
+                        "Skipping card %s (%s): %s", card.get("id"), card.get("name"), e
+                    )
+        rows = [_card_row_getter(model) for model in models]
+    metrics.increment("cards_validated_total", len(rows))
+    metrics.increment("cards_invalid_total", len(cards) - len(rows))
+    return rows
@@ -2,14 +2,33 @@
 Session Manager for handling API requests.
 """
 
+import os
+from typing import Optional
+
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from app import metrics
 from app.config.api_endpoints import APIEndpointsConfig
+from database.etl.response_cache import CachingAdapter, ResponseCache
 
 DEFAULT_TIMEOUT = 30  # sec
 MAX_RETRIES = 3
+RETRY_STATUS_FORCELIST = [429, 500, 502, 503, 504]
+DEFAULT_POOL_MAXSIZE = 10  # connections kept per host
+
+
+def record_response(response: requests.Response, *args, **kwargs) -> None:  # pylint: disable=unused-argument
+    """requests response hook: record the request's duration up to the response headers."""
+    if metrics.REGISTRY.enabled:
+        metrics.observe(
+            "http_request_seconds",
+            response.elapsed.total_seconds(),
+            method=response.request.method,
+            status=response.status_code,
+            cached=getattr(response, "from_cache", False),
+        )
 
 
 class SessionManager:
@@ -17,27 +36,66 @@ class SessionManager:
     Manages HTTP requests with retry logic and rate limiting.
 
     This class provides a configured requests.Session for making API calls
-    with built-in retry logic.
+    with built-in retry logic and an optional persistent response cache.
+
+    The cache is enabled by passing a ResponseCache, or for every service at
+    once by setting the SCRYFALL_CACHE_PATH environment variable.
+
+    Every response is recorded in the http_request_seconds histogram (see
+    app.metrics) by method, status code and whether it came from the cache.
 
     returns:
         A requests.Session object with retry strategy and default headers.
     """
 
-    def __init__(self, timeout: int = DEFAULT_TIMEOUT):
+    def __init__(
+        self,
+        timeout: int = DEFAULT_TIMEOUT,
+        retry_on_rate_limit: bool = True,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        cache: Optional[ResponseCache] = None,
+    ):
         self.timeout = timeout
-        self.session = self._build_session()
+        if cache is None and os.getenv("SCRYFALL_CACHE_PATH"):
+            cache = ResponseCache(os.environ["SCRYFALL_CACHE_PATH"])
+        self.cache = cache
+        self.session = self._build_session(retry_on_rate_limit, pool_maxsize, cache)
 
     @staticmethod
-    def _build_session() -> requests.Session:
-        """Create a requests Session with retry strategy and default headers."""
+    def _build_session(
+        retry_on_rate_limit: bool = True,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        cache: Optional[ResponseCache] = None,
+    ) -> requests.Session:
+        """Create a requests Session with retry strategy and default headers.
+
+        Args:
+            retry_on_rate_limit: Let urllib3 retry 429 responses itself. Disable
+                when the caller handles 429s (e.g. through a shared rate limiter).
+            pool_maxsize: Connections kept per host; should be at least the
+                number of threads sharing the session.
+            cache: Serve and store responses through this cache if given.
+        """
         session = requests.Session()
         session.headers.update(APIEndpointsConfig.DEFAULT_HEADERS)
+        session.hooks["response"].append(record_response)
+        status_forcelist = [
+            status for status in RETRY_STATUS_FORCELIST
+            if retry_on_rate_limit or status != 429
+        ]
         retry = Retry(
             total=MAX_RETRIES,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=status_forcelist,
+            # POSTs are only /cards/collection lookups, which are idempotent
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"},
+            # urllib3 retries any 429 carrying Retry-After, even outside status_forcelist
+            respect_retry_after_header=retry_on_rate_limit,
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        if cache is not None:
+            adapter = CachingAdapter(cache, max_retries=retry, pool_maxsize=pool_maxsize)
+        else:
+            adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
         session.mount("https://", adapter)
         session.mount("http://", adapter)
         return session
@@ -1,57 +1,132 @@
-"""Sets ETL docstring"""
+"""ETL for the sets table.
+
+Fetches every set from Scryfall, validates all of them up front and writes
+them to the sets table in a single transaction using batched upserts.
+
+Run with:
+    PYTHONPATH=src python -m database.etl.sets.sets_etl
+"""
 
 import logging
+import time
 from pathlib import Path
-from typing import LiteralString, cast
+from typing import Any, LiteralString, cast
+
+from pydantic import ValidationError
 
+from app import metrics
 from app.config.logging_config import setup_logging
 from database.db import get_cursor
 from database.etl.schema_validation import SetsValidation
 from database.etl.sets.sets_retrieval_svc import SetsRetrievalService
 
-setup_logging(log_level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 SQL_FILE = Path(__file__).parents[2] / "sql" / "upsert" / "sets_upsert.sql"
-logging.info(f"Reading SQL file: {SQL_FILE}")
 SETS_UPSERT_SQL = cast(LiteralString, SQL_FILE.read_text())
 
-sets_svc = SetsRetrievalService()
+# Column order of the %s placeholders in sets_upsert.sql
+SETS_UPSERT_COLUMNS = (
+    "code",
+    "name",
+    "set_type",
+    "released_at",
+    "card_count",
+    "digital",
+    "foil_only",
+    "nonfoil_only",
+    "icon_svg_uri",
+)
+
+# Rows sent per executemany() call inside the single upsert transaction
+DEFAULT_CHUNK_SIZE = 500
+
+
+def validate_sets(sets: list[dict[str, Any]]) -> list[tuple]:
+    """Validate raw Scryfall sets and convert them to upsert parameter tuples.
+
+    Sets that fail validation are logged and skipped so that one malformed
+    set does not abort the whole run.
+
+    Args:
+        sets: Set dictionaries as returned by SetsRetrievalService.get_sets().
+
+    Returns:
+        List of tuples in SETS_UPSERT_COLUMNS order.
+    """
+    rows: list[tuple] = []
+    with metrics.span("validate_sets"):
+        for raw_set in sets:
+            try:
+                validated = SetsValidation.model_validate(raw_set)
+            except ValidationError as e:
+                logger.warning("Skipping set %s: %s", raw_set.get("code"), e)
+                continue
+            rows.append(tuple(getattr(validated, column) for column in SETS_UPSERT_COLUMNS))
+    metrics.increment("sets_validated_total", len(rows))
+    metrics.increment("sets_invalid_total", len(sets) - len(rows))
+
+    logger.info("Validated %d of %d sets", len(rows), len(sets))
+    return rows
+
 
-sets = sets_svc.get_sets()
+def upsert_sets(rows: list[tuple], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Upsert validated set rows in one transaction.
 
+    Rows are written with executemany() in chunks of chunk_size, which psycopg
+    pipelines into few network round trips. Any failure rolls back the whole
+    batch.
 
-for set in sets:
-    logging.info(f"Processing set: {set['name']} ({set['code']})")
-    logging.info(f"Raw API response for set: {len(set.keys())} fields")
-    loaded_df = SetsValidation.model_validate(set) #only validates
-    cleaned_df = loaded_df.model_dump() #model_config with extra="ignore" will drop any fields not defined in the model here!
-    logging.info(f"After pydantic validation: {len(set.keys())} fields")
+    Args:
+        rows: Tuples in SETS_UPSERT_COLUMNS order (see validate_sets()).
+        chunk_size: Number of rows per executemany() call.
 
-    # Set identification
-    SET_CODE = cleaned_df["code"]
-    SET_NAME = cleaned_df["name"]
+    Returns:
+        Number of rows written.
 
-    # Set properties
-    SET_TYPE = cleaned_df["set_type"]
-    RELEASED_AT = cleaned_df["released_at"]
-    CARD_COUNT = cleaned_df["card_count"]
-    DIGITAL = cleaned_df["digital"]
-    FOIL_ONLY = cleaned_df["foil_only"]
-    NONFOIL_ONLY = cleaned_df["nonfoil_only"]
-    ICON_SVG_URI = cleaned_df["icon_svg_uri"]
+    Raises:
+        ValueError: If chunk_size is not positive.
+        psycopg.Error: If the upsert fails (the transaction is rolled back).
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    if not rows:
+        return 0
 
     with get_cursor() as cur:
-        cur.execute(SETS_UPSERT_SQL, ( #upsert ensures we never insert duplicate data
-            SET_CODE,
-            SET_NAME,
-            SET_TYPE,
-            RELEASED_AT,
-            CARD_COUNT,
-            DIGITAL,
-            FOIL_ONLY,
-            NONFOIL_ONLY,
-            ICON_SVG_URI
-        ))
-        logging.info(f"Inserted/Updated set: {SET_NAME} ({SET_CODE})")
-
-    #break
+        for start in range(0, len(rows), chunk_size):
+            cur.executemany(SETS_UPSERT_SQL, rows[start : start + chunk_size])
+    return len(rows)
+
+
+def run_sets_etl(chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Fetch, validate and upsert all Scryfall sets.
+
+    Args:
+        chunk_size: Number of rows per executemany() call.
+
+    Returns:
+        Number of sets written.
+    """
+    sets = SetsRetrievalService().get_sets()
+    rows = validate_sets(sets)
+
+    start = time.perf_counter()
+    written = upsert_sets(rows, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    logger.info(
+        "Upserted %d sets in %.3fs (%.0f rows/sec)", written, elapsed, rate
+    )
+    return written
+
+
+def main() -> None:
+    """Entry point for running the sets ETL as a script."""
+    setup_logging(log_level=logging.INFO)
+    run_sets_etl()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Versioned schema migrations for existing databases.
+
+The create_tables/ scripts only run when the Docker volume is first
+initialized, so later schema changes (indexes, new columns) need to be applied
+to existing databases. Each change is a file in sql/migrations/ named
+NNNN_description.sql and is applied at most once:
+
+- schema_migrations records the version, name and sha256 checksum of every
+  applied file.
+- Each migration runs in its own transaction together with its
+  schema_migrations row, so a failed migration leaves nothing behind.
+- A transaction-level advisory lock serializes concurrent runners; the
+  applied state is re-read after taking it.
+- Editing a file after it was applied is an error; add a new migration instead.
+
+Migrations should be idempotent (IF NOT EXISTS), since databases created after
+a change may already have it from create_tables/.
+
+Run with:
+    PYTHONPATH=src python -m database.migrations [--status] [--target VERSION]
+"""
+
+import argparse
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import LiteralString, Optional, cast
+
+import psycopg
+
+from app.config.logging_config import setup_logging
+from database.db import get_cursor
+
+logger = logging.getLogger(__name__)
+
+SQL_DIR = Path(__file__).parent / "sql"
+MIGRATIONS_DIR = SQL_DIR / "migrations"
+SCHEMA_MIGRATIONS_DDL = cast(LiteralString, (SQL_DIR / "create_tables" / "schema_migrations.sql").read_text())
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+# Arbitrary key of the advisory lock held while a migration is applied
+MIGRATION_LOCK_KEY = 0x6D7467
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One versioned migration file.
+
+    Attributes:
+        version: Number from the file name; migrations apply in ascending order.
+        name: Description from the file name.
+        path: Path of the .sql file.
+    """
+
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> LiteralString:
+        """Statements of the migration."""
+        return cast(LiteralString, self.path.read_text(encoding="utf-8"))
+
+    @property
+    def checksum(self) -> str:
+        """sha256 of the file, recorded when the migration is applied."""
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """List the migration files of a directory, by version.
+
+    Raises:
+        ValueError: If a .sql file is misnamed or two files share a version.
+    """
+    migrations: dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file {path.name} is not named NNNN_description.sql")
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Migrations {migrations[version].path.name} and {path.name} share version {version}")
+        migrations[version] = Migration(version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_migrations(cur: psycopg.Cursor) -> dict[int, str]:
+    """Versions and checksums recorded in schema_migrations."""
+    cur.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cur.fetchall())
+
+
+def check_applied(migrations: list[Migration], applied: dict[int, str]) -> None:
+    """Verify that applied migration files were not edited since.
+
+    Raises:
+        RuntimeError: If the checksum of an applied file changed.
+    """
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            raise RuntimeError(
+                f"Migration {migration.path.name} was modified after it was applied; add a new migration instead"
+            )
+
+
+def pending_migrations(directory: Path = MIGRATIONS_DIR, target: Optional[int] = None) -> list[Migration]:
+    """Migrations not yet applied to the database, up to target (inclusive)."""
+    migrations = discover_migrations(directory)
+    with get_cursor() as cur:
+        cur.execute(SCHEMA_MIGRATIONS_DDL)
+        applied = applied_migrations(cur)
+    check_applied(migrations, applied)
+    return [
+        migration
+        for migration in migrations
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+
+def apply_migration(migration: Migration) -> bool:
+    """Apply one migration and record it, in a single transaction.
+
+    Returns:
+        False if another runner applied it first.
+    """
+    with get_cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+        cur.execute(SCHEMA_MIGRATIONS_DDL)
+        if migration.version in applied_migrations(cur):
+            return False
+        cur.execute(migration.sql)
+        cur.execute(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (migration.version, migration.name, migration.checksum),
+        )
+    return True
+
+
+def migrate(directory: Path = MIGRATIONS_DIR, target: Optional[int] = None) -> list[Migration]:
+    """Apply every pending migration in version order.
+
+    Args:
+        directory: Directory of the migration files.
+        target: Stop after this version; defaults to the latest.
+
+    Returns:
+        The migrations applied by this call (empty if the schema was up to date).
+
+    Raises:
+        RuntimeError: If an applied migration file was modified.
+        psycopg.Error: If a migration fails; it is rolled back and later ones are not run.
+    """
+    applied = []
+    for migration in pending_migrations(directory, target):
+        logger.info("Applying migration %04d_%s", migration.version, migration.name)
+        if apply_migration(migration):
+            applied.append(migration)
+    logger.info("Applied %d migration(s)", len(applied))
+    return applied
+
+
+def main() -> None:
+    """Apply pending migrations, or list them with --status."""
+    parser = argparse.ArgumentParser(description="Apply the versioned migrations in sql/migrations/")
+    parser.add_argument("--status", action="store_true", help="only list pending migrations")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args()
+    setup_logging(log_level=logging.INFO)
+
+    if args.status:
+        pending = pending_migrations(target=args.target)
+        for migration in pending:
+            logger.info("Pending: %s", migration.path.name)
+        logger.info("%d pending migration(s)", len(pending))
+        return
+    migrate(target=args.target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+-- Precomputed top-N similar cards per oracle card (see database/card_neighbors.py).
+-- oracle_id is the oracle key: the card's oracle_id, or its id for cards without one.
+CREATE TABLE IF NOT EXISTS card_neighbors (
+    oracle_id TEXT PRIMARY KEY,
+    -- Oracle keys of the neighbours, best first, aligned with scores
+    neighbor_ids TEXT[] NOT NULL,
+    scores REAL[] NOT NULL,
+    -- FeatureSchema fingerprint of the vectors the neighbours were computed from
+    schema_fingerprint TEXT NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
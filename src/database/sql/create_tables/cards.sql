@@ -75,6 +75,40 @@ CREATE TABLE IF NOT EXISTS cards (
     edhrec_rank INTEGER,
     penny_rank INTEGER,
 
-    -- Pricing
-    prices JSONB
+    -- Prices live in card_prices (cards_prices.sql), so daily refreshes do not rewrite these rows
+
+    -- Filter bitsets (bit order matches app/services/card_masks.py)
+    legal_formats INTEGER GENERATED ALWAYS AS (
+        ((legalities ->> 'standard' IS NOT DISTINCT FROM 'legal')::INTEGER << 0) |
+        ((legalities ->> 'future' IS NOT DISTINCT FROM 'legal')::INTEGER << 1) |
+        ((legalities ->> 'historic' IS NOT DISTINCT FROM 'legal')::INTEGER << 2) |
+        ((legalities ->> 'timeless' IS NOT DISTINCT FROM 'legal')::INTEGER << 3) |
+        ((legalities ->> 'gladiator' IS NOT DISTINCT FROM 'legal')::INTEGER << 4) |
+        ((legalities ->> 'pioneer' IS NOT DISTINCT FROM 'legal')::INTEGER << 5) |
+        ((legalities ->> 'modern' IS NOT DISTINCT FROM 'legal')::INTEGER << 6) |
+        ((legalities ->> 'legacy' IS NOT DISTINCT FROM 'legal')::INTEGER << 7) |
+        ((legalities ->> 'pauper' IS NOT DISTINCT FROM 'legal')::INTEGER << 8) |
+        ((legalities ->> 'vintage' IS NOT DISTINCT FROM 'legal')::INTEGER << 9) |
+        ((legalities ->> 'penny' IS NOT DISTINCT FROM 'legal')::INTEGER << 10) |
+        ((legalities ->> 'commander' IS NOT DISTINCT FROM 'legal')::INTEGER << 11) |
+        ((legalities ->> 'oathbreaker' IS NOT DISTINCT FROM 'legal')::INTEGER << 12) |
+        ((legalities ->> 'standardbrawl' IS NOT DISTINCT FROM 'legal')::INTEGER << 13) |
+        ((legalities ->> 'brawl' IS NOT DISTINCT FROM 'legal')::INTEGER << 14) |
+        ((legalities ->> 'alchemy' IS NOT DISTINCT FROM 'legal')::INTEGER << 15) |
+        ((legalities ->> 'paupercommander' IS NOT DISTINCT FROM 'legal')::INTEGER << 16) |
+        ((legalities ->> 'duel' IS NOT DISTINCT FROM 'legal')::INTEGER << 17) |
+        ((legalities ->> 'oldschool' IS NOT DISTINCT FROM 'legal')::INTEGER << 18) |
+        ((legalities ->> 'premodern' IS NOT DISTINCT FROM 'legal')::INTEGER << 19) |
+        ((legalities ->> 'predh' IS NOT DISTINCT FROM 'legal')::INTEGER << 20)
+    ) STORED,
+    color_identity_bits SMALLINT GENERATED ALWAYS AS ((
+        (COALESCE('W' = ANY (color_identity), FALSE)::INTEGER << 0) |
+        (COALESCE('U' = ANY (color_identity), FALSE)::INTEGER << 1) |
+        (COALESCE('B' = ANY (color_identity), FALSE)::INTEGER << 2) |
+        (COALESCE('R' = ANY (color_identity), FALSE)::INTEGER << 3) |
+        (COALESCE('G' = ANY (color_identity), FALSE)::INTEGER << 4)
+    )::SMALLINT) STORED,
+
+    -- Change detection (md5 over all columns above, set by cards_merge.sql)
+    content_hash TEXT
 );
@@ -0,0 +1,31 @@
+-- Narrow price tables, split from cards so that daily price refreshes do not
+-- rewrite wide card rows. Named cards_prices.sql so that it runs after
+-- cards.sql in docker-entrypoint-initdb.d (card_prices references cards).
+
+-- Current prices, one row per card. NULL means Scryfall has no price.
+CREATE TABLE IF NOT EXISTS card_prices (
+    card_id TEXT PRIMARY KEY REFERENCES cards (id) ON DELETE CASCADE,
+    usd NUMERIC(10, 2),
+    usd_foil NUMERIC(10, 2),
+    usd_etched NUMERIC(10, 2),
+    eur NUMERIC(10, 2),
+    eur_foil NUMERIC(10, 2),
+    tix NUMERIC(10, 2),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Optional daily snapshots, partitioned by month. Partitions are created by
+-- the price-refresh job (database/etl/cards/card_prices.py) on first use, and
+-- old months can be dropped with DROP TABLE instead of a bulk DELETE.
+-- No foreign key: history outlives cards removed from Scryfall.
+CREATE TABLE IF NOT EXISTS card_price_history (
+    price_date DATE NOT NULL,
+    card_id TEXT NOT NULL,
+    usd NUMERIC(10, 2),
+    usd_foil NUMERIC(10, 2),
+    usd_etched NUMERIC(10, 2),
+    eur NUMERIC(10, 2),
+    eur_foil NUMERIC(10, 2),
+    tix NUMERIC(10, 2),
+    PRIMARY KEY (price_date, card_id)
+) PARTITION BY RANGE (price_date);
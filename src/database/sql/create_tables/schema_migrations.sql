@@ -0,0 +1,9 @@
+-- Applied-state table of the migration runner (database/migrations.py).
+-- One row per applied file of sql/migrations/; checksum is the sha256 of the
+-- file as applied, so edits to an applied migration are detected.
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
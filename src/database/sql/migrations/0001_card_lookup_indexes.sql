@@ -0,0 +1,21 @@
+-- Secondary indexes for the card lookup paths, which were sequential scans.
+-- Plain (not CONCURRENTLY) builds, so the migration stays one transaction; on
+-- a full Scryfall dump each index builds in seconds but blocks writes to cards
+-- meanwhile, so run it outside a card load.
+
+-- Printings of one card: WHERE oracle_id = ...
+CREATE INDEX IF NOT EXISTS cards_oracle_id_idx ON cards (oracle_id);
+
+-- A printing by set and collector number: WHERE set_code = ... AND collector_number = ...
+-- (not unique: all_cards has one row per language)
+CREATE INDEX IF NOT EXISTS cards_set_code_collector_number_idx ON cards (set_code, collector_number);
+
+-- Exact names: WHERE name = ...
+CREATE INDEX IF NOT EXISTS cards_name_idx ON cards (name);
+
+-- Array containment: WHERE keywords @> ARRAY[...] / color_identity <@ ARRAY[...]
+CREATE INDEX IF NOT EXISTS cards_keywords_idx ON cards USING gin (keywords);
+CREATE INDEX IF NOT EXISTS cards_color_identity_idx ON cards USING gin (color_identity);
+
+-- JSONB containment: WHERE legalities @> '{"modern": "legal"}'
+CREATE INDEX IF NOT EXISTS cards_legalities_idx ON cards USING gin (legalities jsonb_path_ops);
@@ -0,0 +1,6 @@
+-- Trigram index for substring and fuzzy name search:
+-- WHERE name ILIKE '%...%' or name % '...' (similarity).
+-- pg_trgm ships with the official postgres and pgvector images (contrib).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS cards_name_trgm_idx ON cards USING gin (name gin_trgm_ops);
@@ -0,0 +1,4 @@
+-- cards.content_hash: md5 over the card columns, written by cards_merge.sql so
+-- that loads skip cards whose content did not change. Existing rows start out
+-- NULL, so the first card load after this migration rewrites every card once.
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS content_hash TEXT;
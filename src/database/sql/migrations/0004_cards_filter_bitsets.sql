@@ -0,0 +1,35 @@
+-- cards.legal_formats / cards.color_identity_bits: filter bitsets for the
+-- similarity queries of card_embeddings.py (bit order matches
+-- app/services/card_masks.py). Same definitions as create_tables/cards.sql.
+-- Adding stored generated columns rewrites the table once.
+ALTER TABLE cards
+    ADD COLUMN IF NOT EXISTS legal_formats INTEGER GENERATED ALWAYS AS (
+        ((legalities ->> 'standard' IS NOT DISTINCT FROM 'legal')::INTEGER << 0) |
+        ((legalities ->> 'future' IS NOT DISTINCT FROM 'legal')::INTEGER << 1) |
+        ((legalities ->> 'historic' IS NOT DISTINCT FROM 'legal')::INTEGER << 2) |
+        ((legalities ->> 'timeless' IS NOT DISTINCT FROM 'legal')::INTEGER << 3) |
+        ((legalities ->> 'gladiator' IS NOT DISTINCT FROM 'legal')::INTEGER << 4) |
+        ((legalities ->> 'pioneer' IS NOT DISTINCT FROM 'legal')::INTEGER << 5) |
+        ((legalities ->> 'modern' IS NOT DISTINCT FROM 'legal')::INTEGER << 6) |
+        ((legalities ->> 'legacy' IS NOT DISTINCT FROM 'legal')::INTEGER << 7) |
+        ((legalities ->> 'pauper' IS NOT DISTINCT FROM 'legal')::INTEGER << 8) |
+        ((legalities ->> 'vintage' IS NOT DISTINCT FROM 'legal')::INTEGER << 9) |
+        ((legalities ->> 'penny' IS NOT DISTINCT FROM 'legal')::INTEGER << 10) |
+        ((legalities ->> 'commander' IS NOT DISTINCT FROM 'legal')::INTEGER << 11) |
+        ((legalities ->> 'oathbreaker' IS NOT DISTINCT FROM 'legal')::INTEGER << 12) |
+        ((legalities ->> 'standardbrawl' IS NOT DISTINCT FROM 'legal')::INTEGER << 13) |
+        ((legalities ->> 'brawl' IS NOT DISTINCT FROM 'legal')::INTEGER << 14) |
+        ((legalities ->> 'alchemy' IS NOT DISTINCT FROM 'legal')::INTEGER << 15) |
+        ((legalities ->> 'paupercommander' IS NOT DISTINCT FROM 'legal')::INTEGER << 16) |
+        ((legalities ->> 'duel' IS NOT DISTINCT FROM 'legal')::INTEGER << 17) |
+        ((legalities ->> 'oldschool' IS NOT DISTINCT FROM 'legal')::INTEGER << 18) |
+        ((legalities ->> 'premodern' IS NOT DISTINCT FROM 'legal')::INTEGER << 19) |
+        ((legalities ->> 'predh' IS NOT DISTINCT FROM 'legal')::INTEGER << 20)
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS color_identity_bits SMALLINT GENERATED ALWAYS AS ((
+        (COALESCE('W' = ANY (color_identity), FALSE)::INTEGER << 0) |
+        (COALESCE('U' = ANY (color_identity), FALSE)::INTEGER << 1) |
+        (COALESCE('B' = ANY (color_identity), FALSE)::INTEGER << 2) |
+        (COALESCE('R' = ANY (color_identity), FALSE)::INTEGER << 3) |
+        (COALESCE('G' = ANY (color_identity), FALSE)::INTEGER << 4)
+    )::SMALLINT) STORED;
@@ -0,0 +1,54 @@
+-- Move prices out of cards into the narrow card_prices / card_price_history
+-- tables (same definitions as create_tables/cards_prices.sql), so daily price
+-- refreshes do not rewrite wide card rows.
+
+CREATE TABLE IF NOT EXISTS card_prices (
+    card_id TEXT PRIMARY KEY REFERENCES cards (id) ON DELETE CASCADE,
+    usd NUMERIC(10, 2),
+    usd_foil NUMERIC(10, 2),
+    usd_etched NUMERIC(10, 2),
+    eur NUMERIC(10, 2),
+    eur_foil NUMERIC(10, 2),
+    tix NUMERIC(10, 2),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS card_price_history (
+    price_date DATE NOT NULL,
+    card_id TEXT NOT NULL,
+    usd NUMERIC(10, 2),
+    usd_foil NUMERIC(10, 2),
+    usd_etched NUMERIC(10, 2),
+    eur NUMERIC(10, 2),
+    eur_foil NUMERIC(10, 2),
+    tix NUMERIC(10, 2),
+    PRIMARY KEY (price_date, card_id)
+) PARTITION BY RANGE (price_date);
+
+-- Copy the current prices over and drop cards.prices. Databases created after
+-- the split never had the column. Prices no longer count toward content_hash,
+-- so the first card load afterwards rewrites every card once.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'cards' AND column_name = 'prices'
+    ) THEN
+        INSERT INTO card_prices (card_id, usd, usd_foil, usd_etched, eur, eur_foil, tix)
+        SELECT
+            id,
+            (prices ->> 'usd')::NUMERIC,
+            (prices ->> 'usd_foil')::NUMERIC,
+            (prices ->> 'usd_etched')::NUMERIC,
+            (prices ->> 'eur')::NUMERIC,
+            (prices ->> 'eur_foil')::NUMERIC,
+            (prices ->> 'tix')::NUMERIC
+        FROM cards
+        WHERE prices IS NOT NULL
+        ON CONFLICT (card_id) DO NOTHING;
+
+        ALTER TABLE cards DROP COLUMN prices;
+    END IF;
+END
+$$;
@@ -0,0 +1,9 @@
+-- Precomputed top-N neighbours per oracle card (see database/card_neighbors.py).
+-- Same definition as create_tables/card_neighbors.sql.
+CREATE TABLE IF NOT EXISTS card_neighbors (
+    oracle_id TEXT PRIMARY KEY,
+    neighbor_ids TEXT[] NOT NULL,
+    scores REAL[] NOT NULL,
+    schema_fingerprint TEXT NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,19 @@
+-- Optional pgvector storage for card feature vectors.
+-- Requires a pgvector-enabled Postgres (POSTGRES_IMAGE=pgvector/pgvector:pg16),
+-- so it is not part of create_tables/. {dim} is filled in from the feature schema.
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS card_embeddings (
+    card_id TEXT PRIMARY KEY REFERENCES cards (id) ON DELETE CASCADE,
+    oracle_id TEXT,
+    -- FeatureSchema fingerprint the vector was built with
+    schema_fingerprint TEXT NOT NULL,
+    embedding vector({dim}) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS card_embeddings_oracle_id_idx ON card_embeddings (oracle_id);
+
+-- Cosine-distance HNSW index used by ORDER BY embedding <=> query
+CREATE INDEX IF NOT EXISTS card_embeddings_embedding_hnsw_idx
+    ON card_embeddings USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
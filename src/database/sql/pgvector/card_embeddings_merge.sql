@@ -0,0 +1,8 @@
+INSERT INTO card_embeddings (card_id, oracle_id, schema_fingerprint, embedding)
+SELECT DISTINCT ON (card_id) card_id, oracle_id, schema_fingerprint, embedding
+FROM card_embeddings_staging
+ORDER BY card_id
+ON CONFLICT (card_id) DO UPDATE SET
+    oracle_id = EXCLUDED.oracle_id,
+    schema_fingerprint = EXCLUDED.schema_fingerprint,
+    embedding = EXCLUDED.embedding;
@@ -0,0 +1 @@
+CREATE TEMP TABLE IF NOT EXISTS card_embeddings_staging (LIKE card_embeddings) ON COMMIT DROP;
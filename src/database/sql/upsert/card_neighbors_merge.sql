@@ -0,0 +1,9 @@
+INSERT INTO card_neighbors (oracle_id, neighbor_ids, scores, schema_fingerprint, computed_at)
+SELECT DISTINCT ON (oracle_id) oracle_id, neighbor_ids, scores, schema_fingerprint, computed_at
+FROM card_neighbors_staging
+ORDER BY oracle_id
+ON CONFLICT (oracle_id) DO UPDATE SET
+    neighbor_ids = EXCLUDED.neighbor_ids,
+    scores = EXCLUDED.scores,
+    schema_fingerprint = EXCLUDED.schema_fingerprint,
+    computed_at = EXCLUDED.computed_at;
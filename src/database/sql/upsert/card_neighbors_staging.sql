@@ -0,0 +1 @@
+CREATE TEMP TABLE IF NOT EXISTS card_neighbors_staging (LIKE card_neighbors INCLUDING DEFAULTS) ON COMMIT DROP;
@@ -0,0 +1,13 @@
+-- Snapshot card_prices_staging as the prices of one day (%(price_date)s).
+-- The month's partition must exist; re-running a day overwrites its snapshot.
+INSERT INTO card_price_history (price_date, card_id, usd, usd_foil, usd_etched, eur, eur_foil, tix)
+SELECT DISTINCT ON (card_id) %(price_date)s::DATE, card_id, usd, usd_foil, usd_etched, eur, eur_foil, tix
+FROM card_prices_staging
+ORDER BY card_id
+ON CONFLICT (price_date, card_id) DO UPDATE SET
+    usd = EXCLUDED.usd,
+    usd_foil = EXCLUDED.usd_foil,
+    usd_etched = EXCLUDED.usd_etched,
+    eur = EXCLUDED.eur,
+    eur_foil = EXCLUDED.eur_foil,
+    tix = EXCLUDED.tix;
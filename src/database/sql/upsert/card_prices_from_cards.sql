@@ -0,0 +1,12 @@
+-- Fill card_prices_staging from the prices JSONB of a card load (cards_staging),
+-- so card loads share card_prices_merge.sql with the price-refresh job.
+INSERT INTO card_prices_staging (card_id, usd, usd_foil, usd_etched, eur, eur_foil, tix)
+SELECT
+    id,
+    (prices ->> 'usd')::NUMERIC,
+    (prices ->> 'usd_foil')::NUMERIC,
+    (prices ->> 'usd_etched')::NUMERIC,
+    (prices ->> 'eur')::NUMERIC,
+    (prices ->> 'eur_foil')::NUMERIC,
+    (prices ->> 'tix')::NUMERIC
+FROM cards_staging;
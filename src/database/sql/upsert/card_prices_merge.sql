@@ -0,0 +1,20 @@
+-- Merge card_prices_staging into card_prices.
+-- Only rows whose prices changed are rewritten; on a typical day most prices
+-- are unchanged, so most rows produce no WAL and no dead tuples. Prices of
+-- cards that are not in cards (yet) are skipped. Returns one row per written card.
+INSERT INTO card_prices (card_id, usd, usd_foil, usd_etched, eur, eur_foil, tix)
+SELECT DISTINCT ON (s.card_id) s.card_id, s.usd, s.usd_foil, s.usd_etched, s.eur, s.eur_foil, s.tix
+FROM card_prices_staging s
+WHERE EXISTS (SELECT 1 FROM cards c WHERE c.id = s.card_id)
+ORDER BY s.card_id
+ON CONFLICT (card_id) DO UPDATE SET
+    usd = EXCLUDED.usd,
+    usd_foil = EXCLUDED.usd_foil,
+    usd_etched = EXCLUDED.usd_etched,
+    eur = EXCLUDED.eur,
+    eur_foil = EXCLUDED.eur_foil,
+    tix = EXCLUDED.tix,
+    updated_at = now()
+WHERE (card_prices.usd, card_prices.usd_foil, card_prices.usd_etched, card_prices.eur, card_prices.eur_foil, card_prices.tix)
+    IS DISTINCT FROM (EXCLUDED.usd, EXCLUDED.usd_foil, EXCLUDED.usd_etched, EXCLUDED.eur, EXCLUDED.eur_foil, EXCLUDED.tix)
+RETURNING card_id;
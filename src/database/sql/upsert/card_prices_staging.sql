@@ -0,0 +1,4 @@
+-- Session-local staging table for price refreshes (see cards_staging.sql).
+CREATE TEMP TABLE IF NOT EXISTS card_prices_staging (
+    LIKE card_prices INCLUDING DEFAULTS
+) ON COMMIT DROP;
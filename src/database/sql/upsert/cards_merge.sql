@@ -0,0 +1,228 @@
+-- Set-based merge of cards_staging into cards (see cards_staging.sql).
+-- DISTINCT ON guards against duplicate ids within one load, which ON CONFLICT
+-- cannot apply twice in a single statement.
+--
+-- content_hash is an md5 over every card column. Existing rows are only
+-- rewritten when their hash changed, so unchanged cards produce no WAL and no
+-- dead tuples. The staged prices are not part of cards: card_prices_merge.sql
+-- writes them to card_prices, so a price change alone never rewrites a card.
+-- Returns the ids of the inserted and updated rows, which callers use to
+-- update similarity indexes incrementally; (xmax = 0) is true only for freshly
+-- inserted tuples.
+WITH merged AS (
+    INSERT INTO cards (
+        id,
+        oracle_id,
+        name,
+        lang,
+        released_at,
+        layout,
+        mana_cost,
+        cmc,
+        type_line,
+        oracle_text,
+        flavor_text,
+        power,
+        toughness,
+        loyalty,
+        colors,
+        color_identity,
+        keywords,
+        produced_mana,
+        all_parts,
+        legalities,
+        games,
+        reserved,
+        foil,
+        nonfoil,
+        finishes,
+        set_code,
+        set_name,
+        set_type,
+        collector_number,
+        digital,
+        rarity,
+        oversized,
+        promo,
+        promo_types,
+        reprint,
+        variation,
+        booster,
+        full_art,
+        textless,
+        story_spotlight,
+        border_color,
+        frame,
+        frame_effects,
+        security_stamp,
+        highres_image,
+        image_status,
+        image_uris,
+        artist,
+        edhrec_rank,
+        penny_rank,
+        content_hash
+    )
+    SELECT DISTINCT ON (id)
+        id,
+        oracle_id,
+        name,
+        lang,
+        released_at,
+        layout,
+        mana_cost,
+        cmc,
+        type_line,
+        oracle_text,
+        flavor_text,
+        power,
+        toughness,
+        loyalty,
+        colors,
+        color_identity,
+        keywords,
+        produced_mana,
+        all_parts,
+        legalities,
+        games,
+        reserved,
+        foil,
+        nonfoil,
+        finishes,
+        set_code,
+        set_name,
+        set_type,
+        collector_number,
+        digital,
+        rarity,
+        oversized,
+        promo,
+        promo_types,
+        reprint,
+        variation,
+        booster,
+        full_art,
+        textless,
+        story_spotlight,
+        border_color,
+        frame,
+        frame_effects,
+        security_stamp,
+        highres_image,
+        image_status,
+        image_uris,
+        artist,
+        edhrec_rank,
+        penny_rank,
+        md5(ROW(
+            id,
+            oracle_id,
+            name,
+            lang,
+            released_at,
+            layout,
+            mana_cost,
+            cmc,
+            type_line,
+            oracle_text,
+            flavor_text,
+            power,
+            toughness,
+            loyalty,
+            colors,
+            color_identity,
+            keywords,
+            produced_mana,
+            all_parts,
+            legalities,
+            games,
+            reserved,
+            foil,
+            nonfoil,
+            finishes,
+            set_code,
+            set_name,
+            set_type,
+            collector_number,
+            digital,
+            rarity,
+            oversized,
+            promo,
+            promo_types,
+            reprint,
+            variation,
+            booster,
+            full_art,
+            textless,
+            story_spotlight,
+            border_color,
+            frame,
+            frame_effects,
+            security_stamp,
+            highres_image,
+            image_status,
+            image_uris,
+            artist,
+            edhrec_rank,
+            penny_rank
+        )::text)
+    FROM cards_staging
+    ORDER BY id
+    ON CONFLICT (id) DO UPDATE SET
+        oracle_id = EXCLUDED.oracle_id,
+        name = EXCLUDED.name,
+        lang = EXCLUDED.lang,
+        released_at = EXCLUDED.released_at,
+        layout = EXCLUDED.layout,
+        mana_cost = EXCLUDED.mana_cost,
+        cmc = EXCLUDED.cmc,
+        type_line = EXCLUDED.type_line,
+        oracle_text = EXCLUDED.oracle_text,
+        flavor_text = EXCLUDED.flavor_text,
+        power = EXCLUDED.power,
+        toughness = EXCLUDED.toughness,
+        loyalty = EXCLUDED.loyalty,
+        colors = EXCLUDED.colors,
+        color_identity = EXCLUDED.color_identity,
+        keywords = EXCLUDED.keywords,
+        produced_mana = EXCLUDED.produced_mana,
+        all_parts = EXCLUDED.all_parts,
+        legalities = EXCLUDED.legalities,
+        games = EXCLUDED.games,
+        reserved = EXCLUDED.reserved,
+        foil = EXCLUDED.foil,
+        nonfoil = EXCLUDED.nonfoil,
+        finishes = EXCLUDED.finishes,
+        set_code = EXCLUDED.set_code,
+        set_name = EXCLUDED.set_name,
+        set_type = EXCLUDED.set_type,
+        collector_number = EXCLUDED.collector_number,
+        digital = EXCLUDED.digital,
+        rarity = EXCLUDED.rarity,
+        oversized = EXCLUDED.oversized,
+        promo = EXCLUDED.promo,
+        promo_types = EXCLUDED.promo_types,
+        reprint = EXCLUDED.reprint,
+        variation = EXCLUDED.variation,
+        booster = EXCLUDED.booster,
+        full_art = EXCLUDED.full_art,
+        textless = EXCLUDED.textless,
+        story_spotlight = EXCLUDED.story_spotlight,
+        border_color = EXCLUDED.border_color,
+        frame = EXCLUDED.frame,
+        frame_effects = EXCLUDED.frame_effects,
+        security_stamp = EXCLUDED.security_stamp,
+        highres_image = EXCLUDED.highres_image,
+        image_status = EXCLUDED.image_status,
+        image_uris = EXCLUDED.image_uris,
+        artist = EXCLUDED.artist,
+        edhrec_rank = EXCLUDED.edhrec_rank,
+        penny_rank = EXCLUDED.penny_rank,
+        content_hash = EXCLUDED.content_hash
+    WHERE cards.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    RETURNING id, (xmax = 0) AS inserted
+)
+SELECT
+    coalesce(array_agg(id) FILTER (WHERE inserted), '{}') AS inserted_ids,
+    coalesce(array_agg(id) FILTER (WHERE NOT inserted), '{}') AS updated_ids
+FROM merged;
@@ -0,0 +1,6 @@
+-- Delete cards missing from a complete load (e.g. a full bulk-data dump).
+-- Runs after cards_merge.sql in the same transaction, so cards_staging holds
+-- every card id of the load. Rows in card_embeddings go with them (ON DELETE CASCADE).
+DELETE FROM cards c
+WHERE NOT EXISTS (SELECT 1 FROM cards_staging s WHERE s.id = c.id)
+RETURNING c.id;
@@ -0,0 +1,8 @@
+-- Session-local staging table for bulk card loads.
+-- Temporary tables are never WAL-logged and are dropped at the end of the
+-- loading transaction, so COPY into them is as cheap as Postgres allows.
+-- prices is staged alongside the card columns and merged into card_prices.
+CREATE TEMP TABLE IF NOT EXISTS cards_staging (
+    LIKE cards INCLUDING DEFAULTS,
+    prices JSONB
+) ON COMMIT DROP;
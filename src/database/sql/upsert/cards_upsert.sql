@@ -48,8 +48,7 @@ INSERT INTO cards (
     image_uris,
     artist,
     edhrec_rank,
-    penny_rank,
-    prices
+    penny_rank
 ) VALUES (
     %s,  -- id
     %s,  -- oracle_id
@@ -100,8 +99,7 @@ INSERT INTO cards (
     %s,  -- image_uris
     %s,  -- artist
     %s,  -- edhrec_rank
-    %s,  -- penny_rank
-    %s   -- prices
+    %s   -- penny_rank
 )
 ON CONFLICT (id) DO UPDATE SET
     oracle_id = EXCLUDED.oracle_id,
@@ -152,5 +150,4 @@ ON CONFLICT (id) DO UPDATE SET
     image_uris = EXCLUDED.image_uris,
     artist = EXCLUDED.artist,
     edhrec_rank = EXCLUDED.edhrec_rank,
-    penny_rank = EXCLUDED.penny_rank,
-    prices = EXCLUDED.prices;
+    penny_rank = EXCLUDED.penny_rank;
@@ -0,0 +1,95 @@
+"""Unit tests for the IVF approximate nearest-neighbour index."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.services.ann_index import IVFIndex, evaluate_index
+from app.services.vector_service import SimilaritySearch
+
+
+def clustered_vectors(n: int, dim: int = 32, clusters: int = 20, seed: int = 3) -> np.ndarray:
+    """Random vectors scattered around a few centres, like families of similar cards."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    return (centres[rng.integers(0, clusters, n)] + rng.normal(scale=0.5, size=(n, dim))).astype(np.float32)
+
+
+class TestIVFIndex(unittest.TestCase):
+    """Tests for IVFIndex."""
+
+    def setUp(self):
+        self.vectors = clustered_vectors(2000)
+        self.ids = [f"card-{i}" for i in range(2000)]
+        self.index = IVFIndex(nlist=20, nprobe=4).build(self.ids, self.vectors)
+        self.exact = SimilaritySearch(self.ids, self.vectors)
+
+    def test_every_vector_is_in_one_list(self):
+        """The inverted lists partition the corpus."""
+        self.assertEqual(len(self.index), 2000)
+        self.assertEqual(self.index.offsets[-1], 2000)
+        self.assertEqual(sorted(self.index.ids.tolist()), sorted(self.ids))
+
+    def test_probing_all_lists_is_exact(self):
+        """With nprobe == nlist the index returns the exact neighbours."""
+        indices, _ = self.index.search(self.vectors[:10], k=5, nprobe=20)
+        exact_indices, _ = self.exact.search(self.vectors[:10], k=5)
+        self.assertEqual(self.index.ids[indices].tolist(), self.exact.ids[exact_indices].tolist())
+
+    def test_recall_on_clustered_data(self):
+        """A few probes already find most true neighbours."""
+        evaluation = evaluate_index(self.index, self.exact, self.vectors[:50], k=10)
+        self.assertEqual(evaluation.queries, 50)
+        self.assertGreater(evaluation.recall, 0.9)
+        self.assertLessEqual(evaluation.p50_ms, evaluation.p99_ms)
+
+    def test_pads_when_fewer_candidates_than_k(self):
+        """Missing results are reported as -1 / -inf instead of garbage."""
+        index = IVFIndex(nlist=2, nprobe=1).build(["a", "b", "c"], self.vectors[:3])
+        indices, scores = index.search(self.vectors[0], k=5)
+        self.assertIn(-1, indices[0])
+        self.assertTrue(np.isneginf(scores[0, -1]))
+
+    def test_save_and_load_round_trip(self):
+        """A loaded index answers queries exactly like the saved one."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "cards.ivf.npz"
+            self.index.save(path)
+            loaded = IVFIndex.load(path)
+
+        self.assertEqual((loaded.nlist, loaded.nprobe), (20, 4))
+        expected = self.index.search(self.vectors[:5], k=3)
+        actual = loaded.search(self.vectors[:5], k=3)
+        np.testing.assert_array_equal(actual[0], expected[0])
+        np.testing.assert_allclose(actual[1], expected[1])
+
+    def test_upsert_without_retraining(self):
+        """New and replaced vectors are searchable and the centroids are untouched."""
+        centroids = self.index.centroids.copy()
+        extra = clustered_vectors(100, seed=4)
+        self.index.upsert([f"new-{i}" for i in range(100)] + ["card-0"], np.vstack([extra, self.vectors[1]]))
+
+        np.testing.assert_array_equal(self.index.centroids, centroids)
+        self.assertEqual((len(self.index), self.index.offsets[-1]), (2100, 2100))
+        indices, scores = self.index.search(np.vstack([extra[:5], self.vectors[1]]), k=1, nprobe=20)
+        self.assertEqual(self.index.ids[indices[:5, 0]].tolist(), [f"new-{i}" for i in range(5)])
+        self.assertIn(self.index.ids[indices[5, 0]], ("card-0", "card-1"))
+        np.testing.assert_allclose(scores[:, 0], 1.0, rtol=1e-5)
+
+    def test_remove_tombstones_then_compacts(self):
+        """Removed vectors are never returned, and compaction drops them."""
+        removed = [f"card-{i}" for i in range(10)]
+        self.assertEqual(self.index.remove(removed, compact_threshold=1.0), 10)
+        self.assertEqual((len(self.index), self.index.dead), (2000, 10))
+        indices, _ = self.index.search(self.vectors[:10], k=10, nprobe=20)
+        self.assertFalse(set(self.index.ids[indices[indices >= 0]].tolist()) & set(removed))
+
+        self.index.compact()
+        self.assertEqual((len(self.index), self.index.dead), (1990, 0))
+        self.assertNotIn("card-0", self.index.ids.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Unit tests for the benchmark suite's synthetic corpus, stub server and baseline comparison."""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+# pylint: disable=wrong-import-position
+from bench_suite import compare_results
+from stub_scryfall import StubScryfall
+from synthetic_cards import card_identifiers, generate_corpus
+
+from app.config.api_endpoints import APIEndpointsConfig
+from database.etl.cards.cards_etl import iter_card_rows
+from database.etl.cards.cards_retrieval_svc import CardsRetrievalService
+from database.etl.sets.sets_etl import validate_sets
+from database.etl.sets.sets_retrieval_svc import SetsRetrievalService
+
+
+class TestGenerateCorpus(unittest.TestCase):
+    """Tests for generate_corpus()."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cards, cls.sets = generate_corpus(600, seed=7)
+
+    def test_deterministic(self):
+        """The same seed gives the same corpus; another seed a different one."""
+        self.assertEqual(generate_corpus(600, seed=7), (self.cards, self.sets))
+        self.assertNotEqual(generate_corpus(600, seed=8)[0], self.cards)
+
+    def test_unique_keys(self):
+        """Ids and set + collector number identify one printing; oracle cards have several."""
+        self.assertEqual(len(self.cards), 600)
+        self.assertEqual(len({card["id"] for card in self.cards}), 600)
+        self.assertEqual(len({(card["set"], card["collector_number"]) for card in self.cards}), 600)
+        oracle_ids = {card["oracle_id"] for card in self.cards}
+        self.assertLess(len(oracle_ids), 600)
+        self.assertEqual(len({card["name"] for card in self.cards}), len(oracle_ids))
+
+    def test_valid(self):
+        """Every card and set passes the ETL validation, and set card counts add up."""
+        self.assertEqual(len(list(iter_card_rows(self.cards))), 600)
+        self.assertEqual(len(validate_sets(self.sets)), len(self.sets))
+        self.assertEqual(sum(set_object["card_count"] for set_object in self.sets), 600)
+
+
+class TestStubScryfall(unittest.TestCase):
+    """Round trips through the retrieval services against the stub server."""
+
+    def test_services_fetch_from_stub(self):
+        """Sets and collection batches come back as served; unknown identifiers are not_found."""
+        cards, sets = generate_corpus(200)
+        real_endpoint = APIEndpointsConfig.CARDS_COLLECTION_ENDPOINT
+        with StubScryfall(cards, sets) as stub:
+            self.assertTrue(APIEndpointsConfig.CARDS_COLLECTION_ENDPOINT.startswith(stub.url))
+            self.assertEqual(SetsRetrievalService().get_sets(), sets)
+            self.assertEqual(SetsRetrievalService().get_set(sets[0]["code"]), sets[0])
+
+            service = CardsRetrievalService(max_workers=2, requests_per_second=1000)
+            identifiers = card_identifiers(cards) + [{"set": "zzz", "collector_number": "1"}]
+            self.assertEqual(service.get_cards_collection(identifiers), cards)
+            self.assertEqual(stub.requests, 2 + 3)
+        self.assertEqual(APIEndpointsConfig.CARDS_COLLECTION_ENDPOINT, real_endpoint)
+
+
+class TestCompareResults(unittest.TestCase):
+    """Tests for compare_results()."""
+
+    def test_flags_only_regressions_beyond_tolerance(self):
+        """Stages slower than the tolerance regress; faster or new stages do not."""
+        baseline = {"validate": {"per_second": 1000.0}, "query": {"per_second": 100.0}}
+        current = {"validate": {"per_second": 850.0}, "query": {"per_second": 70.0}, "vectorize": {"per_second": 5.0}}
+        comparisons = compare_results(current, baseline, tolerance=0.2)
+
+        self.assertEqual([c.stage for c in comparisons], ["validate", "query"])
+        self.assertEqual([c.regressed for c in comparisons], [False, True])
+        self.assertAlmostEqual(comparisons[1].change, -0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Unit tests for the pgvector card embeddings store."""
+
+import struct
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import psycopg
+
+from database.card_embeddings import (
+    EMBEDDINGS_MERGE_SQL,
+    EMBEDDINGS_STAGING_SQL,
+    VectorBinaryDumper,
+    apply_embeddings_delta,
+    build_knn_query,
+    knn_by_card,
+    load_embeddings,
+    vector_literal,
+)
+from database.etl.cards.cards_etl import CardsDelta
+
+
+class TestVectorFormats(unittest.TestCase):
+    """Binary and text encodings of vectors."""
+
+    def test_binary_dump(self):
+        """Dimension header followed by big-endian float4 values."""
+        dumped = VectorBinaryDumper(np.ndarray).dump(np.array([1.0, -2.5]))
+        self.assertEqual(dumped, struct.pack(">HHff", 2, 0, 1.0, -2.5))
+
+    def test_text_literal(self):
+        """Text input format used for query parameters."""
+        self.assertEqual(vector_literal(np.array([0.5, 1.0])), "[0.5,1.0]")
+
+
+class TestBuildKnnQuery(unittest.TestCase):
+    """Tests for build_knn_query()."""
+
+    def render(self, statement) -> str:
+        """Render a composed statement without a connection."""
+        return statement.as_string(None)
+
+    def test_orders_by_cosine_distance(self):
+        """Without filters the query is a plain ORDER BY distance LIMIT k."""
+        statement, params = build_knn_query(psycopg.sql.SQL("%s::vector"), 5)
+        text = self.render(statement)
+        self.assertIn("e.embedding <=> (%s::vector) AS distance", text)
+        self.assertNotIn("WHERE", text)
+        self.assertTrue(text.endswith("ORDER BY distance LIMIT %s"))
+        self.assertEqual(params, [5])
+
+    def test_filters_run_in_sql(self):
+        """Legality, color identity and set filters become WHERE clauses."""
+        statement, params = build_knn_query(
+            psycopg.sql.SQL("%s::vector"), 10, legal_in="commander", color_identity="WUB", set_code="eoc"
+        )
+        text = self.render(statement)
+        self.assertIn("c.legal_formats & %s <> 0", text)
+        self.assertIn("c.color_identity_bits & %s = 0", text)
+        self.assertIn("c.set_code = %s", text)
+        self.assertEqual(params, [1 << 11, 0b11000, "eoc", 10])
+
+
+class TestDatabaseCalls(unittest.TestCase):
+    """Loading and querying against a mocked cursor."""
+
+    def setUp(self):
+        self.mock_cursor = MagicMock()
+        patcher = patch("database.card_embeddings.get_cursor")
+        mock_get_cursor = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_get_cursor.return_value.__enter__.return_value = self.mock_cursor
+
+    def test_load_copies_then_merges(self):
+        """Vectors are COPYed into staging and merged with one statement."""
+        rows = [("a", "oa", np.zeros(3)), ("b", None, np.ones(3))]
+        with patch("database.card_embeddings.register_vector_dumper", return_value=9999):
+            copied = load_embeddings(iter(rows), "fingerprint")
+
+        self.assertEqual(copied, 2)
+        executed = [call.args[0] for call in self.mock_cursor.execute.call_args_list]
+        self.assertEqual(executed, [EMBEDDINGS_STAGING_SQL, EMBEDDINGS_MERGE_SQL])
+        mock_copy = self.mock_cursor.copy.return_value.__enter__.return_value
+        mock_copy.set_types.assert_called_once_with(["text", "text", "text", 9999])
+        self.assertEqual(mock_copy.write_row.call_args_list[1].args[0][:3], ("b", None, "fingerprint"))
+
+    def test_knn_by_card_drops_query_card(self):
+        """The query card is removed from its own results and similarity is 1 - distance."""
+        self.mock_cursor.fetchone.return_value = (1,)
+        self.mock_cursor.fetchall.return_value = [("a", "Card A", 0.0), ("b", "Card B", 0.25)]
+        results = knn_by_card("a", k=1)
+        self.assertEqual(results, [("b", "Card B", 0.75)])
+
+    def test_knn_by_unknown_card(self):
+        """A card without an embedding is a KeyError, not a NULL distance per row."""
+        self.mock_cursor.fetchone.return_value = None
+        with self.assertRaises(KeyError):
+            knn_by_card("missing")
+        self.assertEqual(len(self.mock_cursor.execute.call_args_list), 1)
+
+
+class TestApplyEmbeddingsDelta(unittest.TestCase):
+    """Tests for apply_embeddings_delta()."""
+
+    def test_rebuilds_only_changed_cards(self):
+        """Inserted and updated ids are re-embedded; deletions are left to the cascade."""
+        delta = CardsDelta(inserted=["new"], updated=["changed"], deleted=["gone"])
+        with patch("database.card_embeddings.build_embeddings", return_value=2) as mock_build:
+            self.assertEqual(apply_embeddings_delta(delta), 2)
+        mock_build.assert_called_once_with(card_ids=["new", "changed"])
+
+    def test_nothing_changed(self):
+        """A delta with only deletions loads nothing."""
+        with patch("database.card_embeddings.build_embeddings") as mock_build:
+            self.assertEqual(apply_embeddings_delta(CardsDelta(deleted=["gone"])), 0)
+        mock_build.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Unit tests for the legality and color identity bitsets."""
+
+import re
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.services.card_masks import (
+    ALL_COLORS,
+    COLORS,
+    FORMATS,
+    card_masks,
+    color_mask,
+    filter_mask,
+    format_bit,
+    legality_mask,
+)
+from app.services.vector_service import SimilaritySearch
+from tests.test_vector_service import load_card_rows
+
+CARDS_SQL = Path(__file__).parents[1] / "src" / "database" / "sql" / "create_tables" / "cards.sql"
+
+
+class TestMasks(unittest.TestCase):
+    """Tests for the per-card mask functions."""
+
+    def test_legality_mask_counts_only_legal(self):
+        """'restricted', 'banned' and unknown formats set no bit."""
+        mask = legality_mask({"commander": "legal", "vintage": "restricted", "legacy": "banned", "newformat": "legal"})
+        self.assertEqual(mask, format_bit("commander"))
+        self.assertEqual(legality_mask(None), 0)
+
+    def test_color_mask(self):
+        """Each color letter maps to its own bit."""
+        self.assertEqual(color_mask("WUBRG"), ALL_COLORS)
+        self.assertEqual(color_mask(["U", "G"]), 0b10010)
+        self.assertEqual(color_mask(None), 0)
+
+    def test_format_bit_unknown(self):
+        """Unknown format names are rejected."""
+        with self.assertRaises(ValueError):
+            format_bit("freeform")
+
+    def test_card_masks(self):
+        """Batch masks match the per-card functions and use compact dtypes."""
+        cards = load_card_rows()
+        legal, colors = card_masks(cards)
+        self.assertEqual(legal.dtype, np.uint32)
+        self.assertEqual(colors.dtype, np.uint8)
+        self.assertEqual(legal.tolist(), [legality_mask(card["legalities"]) for card in cards])
+        self.assertEqual(colors.tolist(), [color_mask(card["color_identity"]) for card in cards])
+
+    def test_bit_order_matches_cards_sql(self):
+        """The generated columns in cards.sql use the same bit for every format and color."""
+        ddl = CARDS_SQL.read_text()
+        sql_formats = dict(re.findall(r"legalities ->> '(\w+)' IS NOT DISTINCT FROM 'legal'\)::INTEGER << (\d+)", ddl))
+        sql_colors = dict(re.findall(r"'(\w)' = ANY \(color_identity\), FALSE\)::INTEGER << (\d+)", ddl))
+        self.assertEqual({name: int(bit) for name, bit in sql_formats.items()}, {name: i for i, name in enumerate(FORMATS)})
+        self.assertEqual({color: int(bit) for color, bit in sql_colors.items()}, {color: i for i, color in enumerate(COLORS)})
+
+
+class TestFilterMask(unittest.TestCase):
+    """Tests for filter_mask()."""
+
+    def setUp(self):
+        self.legal = np.array([format_bit("commander"), format_bit("modern"), 0], dtype=np.uint32)
+        self.colors = np.array([color_mask("WU"), color_mask("B"), 0], dtype=np.uint8)
+
+    def test_no_filters_keeps_everything(self):
+        """Without filters every card passes."""
+        self.assertEqual(filter_mask(self.legal, self.colors).tolist(), [True, True, True])
+
+    def test_legal_in(self):
+        """Only cards with the format bit set pass."""
+        self.assertEqual(filter_mask(self.legal, self.colors, legal_in="modern").tolist(), [False, True, False])
+
+    def test_color_identity_is_subset(self):
+        """Cards pass when their identity is within the colors; colorless always passes."""
+        self.assertEqual(filter_mask(self.legal, self.colors, color_identity="WUB").tolist(), [True, True, True])
+        self.assertEqual(filter_mask(self.legal, self.colors, color_identity="W").tolist(), [False, False, True])
+
+
+class TestFilteredSearch(unittest.TestCase):
+    """Tests for SimilaritySearch.most_similar() with filters."""
+
+    def setUp(self):
+        self.cards = load_card_rows()
+        self.search = SimilaritySearch.from_cards(self.cards)
+        self.by_id = {card["id"]: card for card in self.cards}
+
+    def test_results_respect_filters(self):
+        """Every result is legal in the format and within the color identity."""
+        query = self.cards[0]["id"]
+        results = self.search.most_similar([query], k=10, legal_in="modern", color_identity="UG")[0]
+        self.assertTrue(results)
+        for card_id, _ in results:
+            card = self.by_id[card_id]
+            self.assertEqual(card["legalities"]["modern"], "legal")
+            self.assertLessEqual(set(card["color_identity"]), {"U", "G"})
+        self.assertNotIn(query, [card_id for card_id, _ in results])
+
+    def test_filtered_scores_match_unfiltered(self):
+        """Filtering removes rows but does not change the scores of the rest."""
+        query = self.cards[0]["id"]
+        unfiltered = dict(self.search.most_similar([query], k=len(self.cards))[0])
+        filtered = self.search.most_similar([query], k=len(self.cards), legal_in="pauper")[0]
+        self.assertEqual([self.by_id[card_id]["name"] for card_id, _ in filtered], ["Cultivate"])
+        for card_id, score in filtered:
+            self.assertAlmostEqual(score, unfiltered[card_id], places=5)
+
+    def test_filters_need_masks(self):
+        """An index built without masks cannot filter."""
+        search = SimilaritySearch(self.search.ids, self.search.vectors)
+        with self.assertRaises(ValueError):
+            search.most_similar([self.cards[0]["id"]], legal_in="commander")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Unit tests for the price-only refresh of card_prices."""
+
+import re
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock, call, patch
+
+from database.etl.cards.card_prices import (
+    PRICE_COLUMNS,
+    PRICE_HISTORY_INSERT_SQL,
+    PricesLoadResult,
+    history_partition,
+    iter_price_rows,
+    load_prices,
+)
+from database.etl.cards.cards_etl import CARD_PRICES_MERGE_SQL, CARD_PRICES_STAGING_SQL
+from tests.test_cards_etl import load_card_fixture
+
+PRICES_DDL = Path(__file__).resolve().parent.parent / "src" / "database" / "sql" / "create_tables" / "cards_prices.sql"
+
+
+class TestIterPriceRows(unittest.TestCase):
+    """Tests for iter_price_rows()."""
+
+    def test_rows_follow_price_columns(self):
+        """Each card becomes its id followed by the price strings."""
+        card = load_card_fixture("cards_lands.json")
+        rows = list(iter_price_rows([card]))
+        self.assertEqual(rows, [(card["id"], "0.44", None, None, "0.57", None, "0.06")])
+
+    def test_missing_prices_and_ids(self):
+        """Cards without prices get NULLs; cards without an id are skipped."""
+        rows = list(iter_price_rows([{"id": "a"}, {"name": "no id"}]))
+        self.assertEqual(rows, [("a",) + (None,) * (len(PRICE_COLUMNS) - 1)])
+
+    def test_columns_match_table(self):
+        """PRICE_COLUMNS are the leading columns of card_prices and card_price_history."""
+        ddl = PRICES_DDL.read_text()
+        for table, skip in (("card_prices", 0), ("card_price_history", 1)):
+            body = re.search(rf"CREATE TABLE IF NOT EXISTS {table} \((.*?)\n\)", ddl, re.DOTALL).group(1)
+            columns = [line.split()[0] for line in body.strip().splitlines()]
+            self.assertEqual(columns[skip:skip + len(PRICE_COLUMNS)], list(PRICE_COLUMNS))
+
+
+class TestHistoryPartition(unittest.TestCase):
+    """Tests for history_partition()."""
+
+    def test_monthly_bounds(self):
+        """Partitions cover one calendar month, including across a year end."""
+        self.assertEqual(
+            history_partition(date(2026, 10, 17)), ("card_price_history_2026_10", date(2026, 10, 1), date(2026, 11, 1))
+        )
+        self.assertEqual(history_partition(date(2026, 12, 31))[1:], (date(2026, 12, 1), date(2027, 1, 1)))
+
+
+class TestLoadPrices(unittest.TestCase):
+    """Tests for load_prices() against a mocked cursor."""
+
+    def setUp(self):
+        self.mock_cursor = MagicMock()
+        patcher = patch("database.etl.cards.card_prices.get_cursor")
+        mock_get_cursor = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_get_cursor.return_value.__enter__.return_value = self.mock_cursor
+
+    def test_copies_then_merges(self):
+        """Rows are COPYed into staging and merged; no history without a date."""
+        self.mock_cursor.rowcount = 1
+        result = load_prices(iter([("a", "1.00", None, None, None, None, None), ("b",) + (None,) * 6]))
+
+        self.assertEqual(result, PricesLoadResult(copied=2, updated=1, history=0))
+        self.assertEqual(result.unchanged, 1)
+        executed = [c.args[0] for c in self.mock_cursor.execute.call_args_list]
+        self.assertEqual(executed, [CARD_PRICES_STAGING_SQL, CARD_PRICES_MERGE_SQL])
+        self.assertEqual(self.mock_cursor.copy.return_value.__enter__.return_value.write_row.call_count, 2)
+
+    def test_history_creates_partition(self):
+        """With a history date the month's partition is created before the snapshot insert."""
+        self.mock_cursor.rowcount = 3
+        result = load_prices(iter([]), history_date=date(2026, 10, 17))
+
+        self.assertEqual(result.history, 3)
+        partition_sql = self.mock_cursor.execute.call_args_list[2].args[0].as_string(None)
+        self.assertIn('"card_price_history_2026_10" PARTITION OF card_price_history', partition_sql)
+        self.assertIn("FROM ('2026-10-01'::date) TO ('2026-11-01'::date)", partition_sql)
+        self.assertEqual(
+            self.mock_cursor.execute.call_args_list[3], call(PRICE_HISTORY_INSERT_SQL, {"price_date": date(2026, 10, 17)})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
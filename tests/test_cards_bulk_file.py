@@ -0,0 +1,138 @@
+"""Unit tests for streaming Scryfall bulk-data files."""
+
+import gzip
+import io
+import json
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from database.etl.cards.cards_bulk_file import (
+    iter_bulk_cards,
+    iter_json_array,
+    load_bulk_file,
+)
+
+SCHEMAS_DIR = Path(__file__).resolve().parent.parent / "src" / "database" / "schemas"
+
+
+def load_card_fixtures() -> list[dict]:
+    """Load all bundled Scryfall card examples."""
+    return [json.loads(path.read_text()) for path in sorted(SCHEMAS_DIR.glob("cards_*.json"))]
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """Tests for iter_json_array()."""
+
+    def test_decodes_elements_across_tiny_reads(self):
+        """Elements spanning many buffer refills decode correctly."""
+        cards = load_card_fixtures()
+        stream = io.StringIO(json.dumps(cards, indent=2))
+
+        result = list(iter_json_array(stream, read_size=7))
+
+        self.assertEqual(result, cards)
+
+    def test_numbers_split_at_buffer_boundary(self):
+        """A number cut off by the read size is not yielded truncated."""
+        stream = io.StringIO("[12345, 678]")
+        self.assertEqual(list(iter_json_array(stream, read_size=3)), [12345, 678])
+
+    def test_empty_array(self):
+        """An empty array yields nothing."""
+        self.assertEqual(list(iter_json_array(io.StringIO("  [ ]\n"))), [])
+
+    def test_rejects_non_array(self):
+        """A top-level object is rejected."""
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('{"object": "card"}')))
+
+    def test_rejects_truncated_file(self):
+        """A file cut off mid-array raises instead of silently stopping."""
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('[{"id": "1"}, {"id": "2"'), read_size=4))
+
+    def test_rejects_missing_separator(self):
+        """Elements must be separated by commas."""
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('[{"id": "1"} {"id": "2"}]')))
+
+    def test_rejects_trailing_comma(self):
+        """A ']' directly after a ',' is rejected."""
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('[1, 2,]')))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('[1,\n ]'), read_size=2))
+
+    def test_malformed_element_fails_without_reading_to_eof(self):
+        """A malformed element mid-file raises after at most one extra read."""
+        stream = io.StringIO('[{"id": "1", oops}, ' + '{"id": "2"}, ' * 10_000 + '{"id": "3"}]')
+
+        with self.assertRaises(ValueError):
+            list(iter_json_array(stream, read_size=64))
+
+        self.assertLessEqual(stream.tell(), 3 * 64)
+
+    def test_long_string_spanning_many_reads(self):
+        """A string much longer than the read size is not mistaken for malformed input."""
+        cards = [{"id": "1", "oracle_text": "x" * 1000}, {"id": "2"}]
+        stream = io.StringIO(json.dumps(cards))
+        self.assertEqual(list(iter_json_array(stream, read_size=8)), cards)
+
+
+class TestIterBulkCards(unittest.TestCase):
+    """Tests for iter_bulk_cards() against local fixture files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cards = load_card_fixtures()
+
+    def write_fixture(self, name: str, cards: list[dict], compress: bool = False) -> Path:
+        """Write cards as a bulk-data style JSON array file."""
+        path = Path(self.tmp_dir.name) / name
+        opener = gzip.open if compress else open
+        with opener(path, "wt", encoding="utf-8") as f:
+            json.dump(cards, f)
+        return path
+
+    def test_reads_plain_file(self):
+        """Cards are read from an uncompressed file in order."""
+        path = self.write_fixture("default-cards.json", self.cards)
+        self.assertEqual(list(iter_bulk_cards(path)), self.cards)
+
+    def test_reads_gzip_file(self):
+        """gzip compression is detected from the file contents."""
+        path = self.write_fixture("default-cards.json", self.cards, compress=True)
+        self.assertEqual(list(iter_bulk_cards(path)), self.cards)
+
+    def test_peak_memory_independent_of_file_size(self):
+        """Streaming a large file does not hold the file in memory."""
+        many = [dict(self.cards[i % len(self.cards)], id=str(i)) for i in range(2000)]
+        path = self.write_fixture("big.json", many)
+
+        tracemalloc.start()
+        count = sum(1 for _ in iter_bulk_cards(path, read_size=64 * 1024))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.assertEqual(count, 2000)
+        self.assertLess(peak, path.stat().st_size / 10)
+
+    def test_load_bulk_file_streams_into_loader(self):
+        """load_bulk_file() hands a lazy card iterator to the bulk loader."""
+        path = self.write_fixture("default-cards.json", self.cards)
+
+        def consume(cards, prune):
+            self.assertNotIsInstance(cards, list)
+            self.assertFalse(prune)
+            return len(list(cards))
+
+        with patch("database.etl.cards.cards_bulk_file.load_cards_from_api", side_effect=consume):
+            self.assertEqual(load_bulk_file(path), len(self.cards))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Unit tests for the cards bulk loader (COPY into staging + merge)."""
+
+import json
+import re
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from database.etl.cards.cards_etl import (
+    CARD_PRICES_MERGE_SQL,
+    CARDS_COLUMNS,
+    CARDS_MERGE_SQL,
+    CARDS_PRUNE_SQL,
+    CARDS_STAGING_SQL,
+    CARDS_TABLE_COLUMNS,
+    CardsDelta,
+    CardsLoadResult,
+    iter_card_rows,
+    load_cards,
+)
+from database.etl.schema_validation import CARDS_UPSERT_COLUMNS
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src" / "database"
+SCHEMAS_DIR = SRC_DIR / "schemas"
+UPSERT_SQL = SRC_DIR / "sql" / "upsert" / "cards_upsert.sql"
+
+
+def load_card_fixture(name: str) -> dict:
+    """Load one of the bundled Scryfall card examples."""
+    return json.loads((SCHEMAS_DIR / name).read_text())
+
+
+def insert_columns(sql_text: str) -> list[str]:
+    """Return the column list of the first INSERT INTO cards (...) clause."""
+    match = re.search(r"INSERT INTO cards \((.*?)\)", sql_text, re.DOTALL)
+    if not match:
+        raise ValueError("No INSERT INTO cards clause found")
+    return [column.strip() for column in match.group(1).split(",")]
+
+
+class TestCardsColumns(unittest.TestCase):
+    """The COPY column order must match the SQL statements."""
+
+    def test_columns_match_upsert_sql(self):
+        """CARDS_COLUMNS follows the column order of cards_upsert.sql, with prices last."""
+        self.assertEqual(list(CARDS_TABLE_COLUMNS), insert_columns(UPSERT_SQL.read_text()))
+        self.assertEqual(CARDS_COLUMNS, CARDS_TABLE_COLUMNS + ("prices",))
+
+    def test_columns_match_validation_model(self):
+        """Rows from CardsValidation come out in CARDS_COLUMNS order."""
+        self.assertEqual(CARDS_COLUMNS, CARDS_UPSERT_COLUMNS)
+
+    def test_columns_match_merge_sql(self):
+        """cards_merge.sql inserts the card columns plus the derived content_hash, never prices."""
+        self.assertEqual(list(CARDS_TABLE_COLUMNS) + ["content_hash"], insert_columns(CARDS_MERGE_SQL))
+
+    def test_merge_skips_unchanged_rows(self):
+        """Existing rows are only updated when their content hash differs."""
+        self.assertIn(
+            "WHERE cards.content_hash IS DISTINCT FROM EXCLUDED.content_hash",
+            CARDS_MERGE_SQL,
+        )
+        self.assertIn("IS DISTINCT FROM (EXCLUDED.usd,", CARD_PRICES_MERGE_SQL)
+
+
+class TestIterCardRows(unittest.TestCase):
+    """Tests for iter_card_rows()."""
+
+    def test_validates_in_batches(self):
+        """Cards are validated batch_size at a time and flattened into rows."""
+        cards = [load_card_fixture("cards_lands.json")] * 5
+        with patch(
+            "database.etl.cards.cards_etl.validate_cards_batch",
+            side_effect=lambda batch: [(card["id"],) for card in batch],
+        ) as mock_validate:
+            rows = list(iter_card_rows(iter(cards), batch_size=2))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([len(call.args[0]) for call in mock_validate.call_args_list], [2, 2, 1])
+
+    def test_skips_invalid_cards(self):
+        """A card failing validation is dropped without losing the rest of its batch."""
+        invalid = load_card_fixture("cards_sorcery.json")
+        del invalid["legalities"]
+        cards = [load_card_fixture("cards_lands.json"), invalid]
+
+        with self.assertLogs("database.etl.schema_validation", level="WARNING"):
+            rows = list(iter_card_rows(cards))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], cards[0]["id"])
+
+
+class TestLoadCards(unittest.TestCase):
+    """Tests for load_cards()."""
+
+    def test_copies_into_staging_then_merges(self):
+        """Rows go through COPY, followed by a single merge statement."""
+        mock_cursor = MagicMock()
+        # distinct staged ids, then (inserted ids, updated ids) from the merge
+        mock_cursor.fetchone.side_effect = [(2,), (["new-card"], [])]
+        mock_cursor.rowcount = 2  # card_prices rows written
+        mock_copy = mock_cursor.copy.return_value.__enter__.return_value
+        rows = list(iter_card_rows([load_card_fixture("cards_lands.json"),
+                                    load_card_fixture("cards_sorcery.json")]))
+
+        with patch("database.etl.cards.cards_etl.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+            result = load_cards(iter(rows))
+
+        self.assertEqual(
+            result,
+            CardsLoadResult(inserted=1, updated=0, unchanged=1, prices_updated=2, delta=CardsDelta(inserted=["new-card"])),
+        )
+        self.assertEqual(result.written, 1)
+        mock_get_cursor.assert_called_once()
+        executed = [call.args[0] for call in mock_cursor.execute.call_args_list]
+        self.assertEqual(executed[0], CARDS_STAGING_SQL)
+        self.assertLess(executed.index(CARDS_MERGE_SQL), executed.index(CARD_PRICES_MERGE_SQL))
+        self.assertEqual(executed[-1], CARD_PRICES_MERGE_SQL)
+        self.assertEqual(mock_copy.write_row.call_count, 2)
+        mock_copy.set_types.assert_called_once()
+        self.assertEqual(len(mock_copy.set_types.call_args.args[0]), len(CARDS_COLUMNS))
+
+    def test_prune_deletes_cards_missing_from_the_load(self):
+        """With prune=True the deleted ids from cards_prune.sql end up in the delta."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.side_effect = [(1,), ([], ["changed"])]
+        mock_cursor.fetchall.return_value = [("gone-1",), ("gone-2",)]
+
+        with patch("database.etl.cards.cards_etl.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+            result = load_cards(iter([]), prune=True)
+
+        self.assertEqual(mock_cursor.execute.call_args_list[-1].args[0], CARDS_PRUNE_SQL)
+        self.assertEqual(result.deleted, 2)
+        self.assertEqual(result.delta, CardsDelta(updated=["changed"], deleted=["gone-1", "gone-2"]))
+        self.assertEqual(result.delta.changed, ["changed"])
+        self.assertTrue(result.delta)
+        self.assertFalse(CardsDelta())
+
+    def test_without_prune_nothing_is_deleted(self):
+        """A default load never runs the prune statement."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.side_effect = [(0,), ([], [])]
+
+        with patch("database.etl.cards.cards_etl.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+            result = load_cards(iter([]))
+
+        executed = [call.args[0] for call in mock_cursor.execute.call_args_list]
+        self.assertNotIn(CARDS_PRUNE_SQL, executed)
+        self.assertFalse(result.delta)
+
+
+if __name__ == "__main__":
+    unittest.main()
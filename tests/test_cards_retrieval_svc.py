@@ -1,11 +1,20 @@
 """Unit tests for CardsRetrievalService (Scryfall API)."""
 
+import json
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock, patch
 
 import requests
 
-from database.etl.cards.cards_retrieval_svc import CardsRetrievalService
+from app.config.api_endpoints import APIEndpointsConfig
+from database.etl.cards.cards_retrieval_svc import (
+    CardsRetrievalService,
+    CollectionSummary,
+    parse_retry_after,
+)
 
 
 class TestGetCardsCollection(unittest.TestCase):
@@ -134,5 +143,286 @@ class TestGetCardsCollection(unittest.TestCase):
         self.assertIn("Accept", headers)
 
 
+def make_batch_responses(total: int, missing: set[int] = frozenset()) -> list[MagicMock]:
+    """Build one mocked collection response per 75-identifier batch."""
+    responses = []
+    for start in range(0, total, 75):
+        numbers = range(start, min(start + 75, total))
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            "object": "list",
+            "not_found": [{"set": "tdm", "collector_number": str(i)} for i in numbers if i in missing],
+            "data": [{"id": str(i), "name": f"Card {i}"} for i in numbers if i not in missing],
+        }
+        responses.append(response)
+    return responses
+
+
+class TestIterCardsCollection(unittest.TestCase):
+    """Tests for CardsRetrievalService.iter_cards_collection()."""
+
+    def setUp(self):
+        self.service = CardsRetrievalService()
+        self.identifiers = [{"set": "tdm", "collector_number": str(i)} for i in range(160)]
+
+    @patch("database.etl.cards.cards_retrieval_svc.time.sleep")
+    def test_yields_one_list_per_batch(self, _mock_sleep):
+        """Cards are yielded batch by batch, not as one accumulated list."""
+        responses = make_batch_responses(160)
+
+        with patch.object(self.service.session, "post", side_effect=responses) as mock_post:
+            iterator = self.service.iter_cards_collection(self.identifiers)
+            first = next(iterator)
+            # Only the first batch has been requested when it is handed out
+            self.assertEqual(mock_post.call_count, 1)
+            rest = list(iterator)
+
+        self.assertEqual(len(first), 75)
+        self.assertEqual([len(batch) for batch in rest], [75, 10])
+
+    @patch("database.etl.cards.cards_retrieval_svc.time.sleep")
+    def test_fills_summary(self, _mock_sleep):
+        """The summary collects counts and not-found identifiers of all batches."""
+        responses = make_batch_responses(160, missing={3, 100})
+        summary = CollectionSummary()
+
+        with patch.object(self.service.session, "post", side_effect=responses):
+            cards = [card for batch in self.service.iter_cards_collection(self.identifiers, summary) for card in batch]
+
+        self.assertEqual(len(cards), 158)
+        self.assertEqual(summary.requested, 160)
+        self.assertEqual(summary.found, 158)
+        self.assertEqual(summary.batches, 3)
+        self.assertEqual(
+            summary.not_found,
+            [{"set": "tdm", "collector_number": "3"}, {"set": "tdm", "collector_number": "100"}],
+        )
+
+    def test_concurrent_mode_yields_in_order(self):
+        """Concurrent iteration still yields batches in identifier order."""
+        service = CardsRetrievalService(max_workers=3, requests_per_second=1000)
+        responses = {
+            str(start): response
+            for start, response in zip(range(0, 160, 75), make_batch_responses(160))
+        }
+
+        def post(_url, json, timeout):  # pylint: disable=redefined-outer-name
+            del timeout
+            return responses[json["identifiers"][0]["collector_number"]]
+
+        with patch.object(service.session, "post", side_effect=post):
+            batches = list(service.iter_cards_collection(self.identifiers))
+
+        ids = [card["id"] for batch in batches for card in batch]
+        self.assertEqual(ids, [str(i) for i in range(160)])
+
+
+class TestAiterCardsCollection(unittest.IsolatedAsyncioTestCase):
+    """Tests for CardsRetrievalService.aiter_cards_collection()."""
+
+    async def test_yields_batches_in_order_with_summary(self):
+        """The async iterator yields every batch in order and fills the summary."""
+        service = CardsRetrievalService(max_workers=2, requests_per_second=1000)
+        identifiers = [{"set": "tdm", "collector_number": str(i)} for i in range(160)]
+        responses = {
+            str(start): response
+            for start, response in zip(range(0, 160, 75), make_batch_responses(160, missing={5}))
+        }
+
+        def post(_url, json, timeout):  # pylint: disable=redefined-outer-name
+            del timeout
+            return responses[json["identifiers"][0]["collector_number"]]
+
+        summary = CollectionSummary()
+        with patch.object(service.session, "post", side_effect=post):
+            batches = [batch async for batch in service.aiter_cards_collection(identifiers, summary)]
+
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(batches[0][0]["id"], "0")
+        self.assertEqual(batches[-1][-1]["id"], "159")
+        self.assertEqual(summary.found, 159)
+        self.assertEqual(summary.not_found, [{"set": "tdm", "collector_number": "5"}])
+
+    async def test_serial_mode_spaces_batches(self):
+        """Without a rate limiter, batches are fetched one at a time with a delay."""
+        service = CardsRetrievalService()
+        identifiers = [{"set": "tdm", "collector_number": str(i)} for i in range(80)]
+
+        with patch.object(service.session, "post", side_effect=make_batch_responses(80)), \
+                patch("database.etl.cards.cards_retrieval_svc.asyncio.sleep") as mock_sleep:
+            batches = [batch async for batch in service.aiter_cards_collection(identifiers)]
+
+        self.assertEqual([len(batch) for batch in batches], [75, 5])
+        mock_sleep.assert_called_once()
+
+
+class StubCollectionHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for Scryfall's POST /cards/collection endpoint.
+
+    Collector numbers starting with "x" are reported as not found. The
+    server answers the first `rate_limit_first` requests with a 429.
+    """
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer a collection request."""
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            limited = server.requests <= server.rate_limit_first
+        try:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(server.latency)
+            if limited:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            identifiers = body["identifiers"]
+            payload = {
+                "object": "list",
+                "not_found": [i for i in identifiers if i["collector_number"].startswith("x")],
+                "data": [
+                    {"object": "card", "set": i["set"], "collector_number": i["collector_number"]}
+                    for i in identifiers
+                    if not i["collector_number"].startswith("x")
+                ],
+            }
+            encoded = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep test output quiet."""
+
+
+class TestConcurrentCardsCollection(unittest.TestCase):
+    """get_cards_collection() with max_workers > 1 against a local stub server."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubCollectionHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.rate_limit_first = 0
+        self.server.latency = 0.05
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/cards/collection"
+        patcher = patch.object(APIEndpointsConfig, "CARDS_COLLECTION_ENDPOINT", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.identifiers = [
+            {"set": "tdm", "collector_number": f"x{i}" if i % 50 == 0 else str(i)}
+            for i in range(1, 301)
+        ]
+
+    def test_preserves_order_and_runs_batches_in_parallel(self):
+        """Cards come back in identifier order while batches overlap."""
+        service = CardsRetrievalService(max_workers=4, requests_per_second=1000)
+
+        result = service.get_cards_collection(self.identifiers)
+
+        expected = [i["collector_number"] for i in self.identifiers if not i["collector_number"].startswith("x")]
+        self.assertEqual([card["collector_number"] for card in result], expected)
+        self.assertEqual(self.server.requests, 4)
+        self.assertGreater(self.server.max_in_flight, 1)
+
+    def test_aggregates_not_found_across_batches(self):
+        """Not-found identifiers from every batch are reported together."""
+        service = CardsRetrievalService(max_workers=4, requests_per_second=1000)
+
+        with self.assertLogs("database.etl.cards.cards_retrieval_svc", level="WARNING") as logs:
+            service.get_cards_collection(self.identifiers)
+
+        self.assertTrue(any("6 identifier(s) were not found" in line for line in logs.output))
+
+    def test_rate_limiter_spaces_requests(self):
+        """The shared limiter caps the combined request rate of all workers."""
+        self.server.latency = 0
+        service = CardsRetrievalService(max_workers=4, requests_per_second=20)
+
+        start = time.perf_counter()
+        service.get_cards_collection(self.identifiers)
+        elapsed = time.perf_counter() - start
+
+        # 4 requests at 20/s with no burst: at least 3 gaps of 50 ms
+        self.assertGreaterEqual(elapsed, 0.15)
+
+    def test_backs_off_on_429_and_retries(self):
+        """429 responses slow the shared limiter down and the batch is retried."""
+        self.server.rate_limit_first = 2
+        service = CardsRetrievalService(max_workers=2, requests_per_second=1000)
+
+        result = service.get_cards_collection(self.identifiers)
+
+        self.assertEqual(len(result), 294)
+        self.assertEqual(self.server.requests, 6)
+        self.assertLess(service.rate_limiter.rate, 1000)
+
+    def test_serial_mode_retries_429(self):
+        """Without a rate limiter, the session's retry strategy retries a rate-limited POST."""
+        self.server.rate_limit_first = 1
+        result = CardsRetrievalService().get_cards_collection(self.identifiers[:75])  # one not found
+
+        self.assertEqual(len(result), 74)
+        self.assertEqual(self.server.requests, 2)
+
+
+class TestRateRecovery(unittest.TestCase):
+    """Only successful responses recover the shared limiter's rate."""
+
+    def setUp(self):
+        self.service = CardsRetrievalService(max_workers=2, requests_per_second=10)
+        self.service.rate_limiter.rate = 5
+        self.service.session = MagicMock()
+
+    def post(self, status_code: int) -> None:
+        """POST one batch answered with status_code."""
+        response = MagicMock(status_code=status_code, ok=status_code < 400)
+        self.service.session.post.return_value = response
+        self.service._post_with_rate_limit("url", {"identifiers": []}, 1)  # pylint: disable=protected-access
+
+    def test_server_errors_do_not_recover_rate(self):
+        """A 5xx leaves the slowed-down rate as it is."""
+        self.post(503)
+        self.assertEqual(self.service.rate_limiter.rate, 5)
+
+    def test_success_recovers_rate(self):
+        """A 2xx response recovers part of the configured rate."""
+        self.post(200)
+        self.assertGreater(self.service.rate_limiter.rate, 5)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    """Tests for parse_retry_after()."""
+
+    def test_seconds(self):
+        """Numeric values are seconds."""
+        self.assertEqual(parse_retry_after("3"), 3.0)
+
+    def test_http_date_in_past(self):
+        """An HTTP date in the past means no wait."""
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_missing_or_invalid(self):
+        """Missing or garbage values fall back to the default pause."""
+        self.assertEqual(parse_retry_after(None), parse_retry_after("soon"))
+        self.assertGreater(parse_retry_after(None), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
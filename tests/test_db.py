@@ -0,0 +1,114 @@
+"""Unit tests for the pooled connection helpers in database.db."""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from database import db
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests for get_pool() / close_pool() and the helpers built on them."""
+
+    def setUp(self):
+        db.close_pool()
+        patcher = patch("database.db.ConnectionPool")
+        self.mock_pool_cls = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(db.close_pool)
+
+    def test_pool_is_created_once(self):
+        """get_pool() reuses the same pool for every call in the process."""
+        first = db.get_pool()
+        second = db.get_pool()
+
+        self.assertIs(first, second)
+        self.mock_pool_cls.assert_called_once()
+
+    def test_pool_checks_connections_on_checkout(self):
+        """The pool is configured with a health check and the configured sizes."""
+        db.get_pool()
+
+        kwargs = self.mock_pool_cls.call_args.kwargs
+        self.assertEqual(kwargs["check"], self.mock_pool_cls.check_connection)
+        self.assertEqual(kwargs["min_size"], db.POOL_MIN_SIZE)
+        self.assertEqual(kwargs["max_size"], db.POOL_MAX_SIZE)
+        self.assertEqual(kwargs["max_idle"], db.POOL_MAX_IDLE)
+
+    def test_close_pool_closes_and_resets(self):
+        """close_pool() closes the pool and a later get_pool() opens a new one."""
+        pool = db.get_pool()
+        db.close_pool()
+
+        pool.close.assert_called_once()
+        db.get_pool()
+        self.assertEqual(self.mock_pool_cls.call_count, 2)
+
+    def test_close_pool_without_pool_is_noop(self):
+        """close_pool() is safe to call when no pool was ever opened."""
+        db.close_pool()
+        self.mock_pool_cls.assert_not_called()
+
+    def test_get_cursor_draws_from_pool(self):
+        """get_cursor() borrows a pooled connection instead of connecting."""
+        mock_conn = MagicMock()
+        pool = self.mock_pool_cls.return_value
+        pool.connection.return_value.__enter__.return_value = mock_conn
+
+        with patch("database.db.psycopg.connect") as mock_connect:
+            with db.get_cursor() as cur:
+                cur.execute("SELECT 1")
+
+        mock_connect.assert_not_called()
+        pool.connection.assert_called_once()
+        mock_conn.cursor.return_value.execute.assert_called_once_with("SELECT 1")
+        mock_conn.cursor.return_value.close.assert_called_once()
+
+
+class TestAsyncConnectionPool(unittest.TestCase):
+    """Tests for get_async_pool() / close_async_pool()."""
+
+    def setUp(self):
+        patcher = patch("database.db.AsyncConnectionPool")
+        self.mock_pool_cls = patcher.start()
+        self.addCleanup(patcher.stop)
+        async def yield_to_loop():
+            await asyncio.sleep(0)
+
+        self.mock_pool_cls.side_effect = lambda *args, **kwargs: MagicMock(
+            open=AsyncMock(side_effect=yield_to_loop), close=AsyncMock()
+        )
+
+    def test_concurrent_first_use_opens_one_pool(self):
+        """Coroutines racing on first use share a single opened pool."""
+        async def race():
+            try:
+                return await asyncio.gather(*(db.get_async_pool() for _ in range(5)))
+            finally:
+                await db.close_async_pool()
+
+        pools = asyncio.run(race())
+
+        self.mock_pool_cls.assert_called_once()
+        self.assertTrue(all(pool is pools[0] for pool in pools))
+        pools[0].open.assert_awaited_once()
+        pools[0].close.assert_awaited_once()
+
+    def test_races_in_successive_event_loops(self):
+        """Each asyncio.run() gets its own lock, so a second loop can race on first use too."""
+        async def race():
+            try:
+                return await asyncio.gather(*(db.get_async_pool() for _ in range(5)))
+            finally:
+                await asyncio.gather(db.close_async_pool(), db.close_async_pool())
+
+        first = asyncio.run(race())
+        second = asyncio.run(race())
+
+        self.assertEqual(self.mock_pool_cls.call_count, 2)
+        self.assertIsNot(first[0], second[0])
+        self.assertTrue(all(pool is second[0] for pool in second))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Unit tests for the memory-mapped embedding store."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.services.embedding_store import EmbeddingStore, quantize_int8, write_embedding_store
+from app.services.vector_service import SimilaritySearch
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    """Round trips through store files of each dtype."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_path = Path(tmp_dir.name)
+        rng = np.random.default_rng(5)
+        self.vectors = rng.normal(size=(500, 24)).astype(np.float32)
+        self.ids = [f"card-{i}" for i in range(500)]
+        self.exact = SimilaritySearch(self.ids, self.vectors)
+
+    def write_and_open(self, dtype: str) -> EmbeddingStore:
+        """Write the test vectors with dtype and map the file."""
+        path = self.tmp_path / f"cards.{dtype}.vec"
+        write_embedding_store(path, self.ids, self.vectors, dtype=dtype, fingerprint="abc123")
+        return EmbeddingStore.open(path)
+
+    def test_header_and_ids(self):
+        """Count, dim, fingerprint and ids survive the round trip."""
+        store = self.write_and_open("float16")
+        self.assertEqual((len(store), store.dim), (500, 24))
+        self.assertEqual(store.fingerprint, "abc123")
+        self.assertEqual(store.ids.tolist(), self.ids)
+        self.assertIsInstance(store.matrix, np.memmap)
+
+    def test_float32_is_lossless(self):
+        """float32 stores return the normalized input vectors unchanged."""
+        store = self.write_and_open("float32")
+        np.testing.assert_array_equal(store.vectors(), self.exact.vectors)
+
+    def test_quantized_search_matches_exact(self):
+        """float16 and int8 stores find (almost) the same neighbours as float32."""
+        for dtype in ("float16", "int8"):
+            with self.subTest(dtype=dtype):
+                store = self.write_and_open(dtype)
+                indices, _ = store.search(self.exact.vectors[:50], k=10, block_size=128)
+                exact_indices, _ = self.exact.search(self.exact.vectors[:50], k=10)
+                overlap = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(indices, exact_indices)])
+                self.assertGreater(overlap, 0.95)
+
+    def test_int8_quantization_error_is_small(self):
+        """Dequantized int8 rows stay within half a quantization step."""
+        codes, scales = quantize_int8(self.exact.vectors)
+        restored = codes.astype(np.float32) * scales[:, np.newaxis]
+        self.assertTrue(np.all(np.abs(restored - self.exact.vectors) <= scales[:, np.newaxis] / 2 + 1e-7))
+
+    def test_empty_store(self):
+        """A store without rows (e.g. from an empty cards table) opens and searches."""
+        for dtype in ("float16", "int8"):
+            with self.subTest(dtype=dtype):
+                path = self.tmp_path / f"empty.{dtype}.vec"
+                write_embedding_store(path, [], np.empty((0, 24), dtype=np.float32), dtype=dtype)
+                store = EmbeddingStore.open(path)
+                self.assertEqual((len(store), store.dim, store.ids.tolist()), (0, 24, []))
+                indices, _ = store.search(self.vectors[:2], k=5)
+                self.assertEqual(indices.shape, (2, 0))
+
+    def test_rejects_other_files(self):
+        """Opening a file that is not a store fails clearly."""
+        path = self.tmp_path / "not-a-store"
+        path.write_bytes(b"\x00" * 128)
+        with self.assertRaises(ValueError):
+            EmbeddingStore.open(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Unit tests for setup_logging() and its queue, JSON lines, rotation and sampling modes."""
+
+import json
+import logging
+import logging.handlers
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.config.logging_config import SamplingFilter, setup_logging, shutdown_logging
+
+
+class LoggingTestCase(unittest.TestCase):
+    """Runs each test with a log file in a temporary directory and restores the root logger."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp_dir.cleanup)
+        self.log_file = Path(tmp_dir.name) / "logs" / "app.log"
+
+        root = logging.getLogger()
+        saved = (root.level, list(root.handlers))
+        self.addCleanup(self.restore_root, *saved)
+        self.logger = logging.getLogger("tests.logging_config")
+
+    @staticmethod
+    def restore_root(level: int, handlers: list[logging.Handler]) -> None:
+        """Stop the listener, close the test handlers and put the original ones back."""
+        shutdown_logging()
+        root = logging.getLogger()
+        for handler in root.handlers:
+            handler.close()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    def setup(self, **kwargs) -> None:
+        """setup_logging() to the temporary file only, without environment overrides."""
+        options = {"use_queue": False, "json_lines": False, "max_bytes": 0, "sample_every": 1}
+        setup_logging(log_file=str(self.log_file), log_to_console=False, **{**options, **kwargs})
+
+    def lines(self) -> list[str]:
+        """Lines of the log file, after flushing everything queued."""
+        shutdown_logging()
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+        return self.log_file.read_text().splitlines()
+
+
+class TestSyncMode(LoggingTestCase):
+    """The default mode is unchanged: plain handlers on the root logger."""
+
+    def test_plain_file_handler(self):
+        """Records are written synchronously in the text format."""
+        self.setup()
+        self.assertEqual([type(h) for h in logging.getLogger().handlers], [logging.FileHandler])
+        self.logger.info("Batch %d: Retrieved %d cards", 1, 75)
+        self.assertTrue(self.log_file.read_text().endswith("- INFO - tests.logging_config - Batch 1: Retrieved 75 cards\n"))
+
+
+class TestQueueMode(LoggingTestCase):
+    """Tests for use_queue=True."""
+
+    def test_records_written_by_listener(self):
+        """The root logger only holds a QueueHandler; every record reaches the file in order."""
+        self.setup(use_queue=True)
+        self.assertEqual(len(logging.getLogger().handlers), 1)
+        self.assertIsInstance(logging.getLogger().handlers[0], logging.handlers.QueueHandler)
+        for batch in range(200):
+            self.logger.info("Batch %d", batch)
+        lines = self.lines()
+        self.assertEqual(len(lines), 200)
+        self.assertTrue(lines[-1].endswith("Batch 199"))
+
+    def test_arguments_merged_at_call_time(self):
+        """Mutating an argument after the call does not change the queued message."""
+        self.setup(use_queue=True)
+        cards = ["a"]
+        self.logger.info("Cards %s", cards)
+        cards.append("b")
+        self.assertTrue(self.lines()[0].endswith("Cards ['a']"))
+
+    def test_json_lines_with_exception(self):
+        """JSON lines carry level, logger, message and the formatted traceback."""
+        self.setup(use_queue=True, json_lines=True)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("Batch %d failed", 3)
+        entry = json.loads(self.lines()[0])
+        self.assertEqual((entry["level"], entry["logger"], entry["message"]), ("ERROR", "tests.logging_config", "Batch 3 failed"))
+        self.assertIn("ValueError: boom", entry["exception"])
+
+    def test_reconfigure_stops_previous_listener(self):
+        """Calling setup_logging() again flushes and replaces the running listener."""
+        self.setup(use_queue=True)
+        self.logger.info("first")
+        self.setup(use_queue=True)
+        self.logger.info("second")
+        self.assertEqual([line.rsplit(" - ", 1)[1] for line in self.lines()], ["first", "second"])
+
+    def test_rotation(self):
+        """With max_bytes the file rotates and keeps backup_count old files."""
+        self.setup(use_queue=True, max_bytes=200, backup_count=2)
+        for batch in range(50):
+            self.logger.info("Batch %d: Retrieved 75 cards", batch)
+        self.lines()
+        self.assertEqual(sorted(path.name for path in self.log_file.parent.iterdir()), ["app.log", "app.log.1", "app.log.2"])
+
+
+class TestSampling(LoggingTestCase):
+    """Tests for sample_every / SamplingFilter."""
+
+    def test_keeps_every_nth_per_message_and_all_warnings(self):
+        """Each INFO template is sampled on its own; warnings always pass."""
+        self.setup(sample_every=10)
+        for batch in range(25):
+            self.logger.info("Batch %d", batch)
+            self.logger.warning("Slow batch %d", batch)
+        self.logger.info("Retrieved %d cards total", 1875)
+        messages = [line.rsplit(" - ", 1)[1] for line in self.lines()]
+
+        self.assertEqual([m for m in messages if m.startswith("Batch")], ["Batch 0", "Batch 10", "Batch 20"])
+        self.assertEqual(sum(m.startswith("Slow") for m in messages), 25)
+        self.assertIn("Retrieved 1875 cards total", messages)
+
+    def test_rejects_non_positive_rate(self):
+        """A rate below 1 is an error."""
+        with self.assertRaises(ValueError):
+            SamplingFilter(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
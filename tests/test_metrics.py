@@ -0,0 +1,136 @@
+"""Unit tests for the in-process metrics registry and its ETL instrumentation."""
+
+import json
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from app import metrics
+from app.metrics import Histogram, MetricsRegistry
+from database.etl.schema_validation import validate_cards_batch
+from database.etl.session_manager import record_response
+from tests.test_cards_etl import load_card_fixture
+
+
+class TestHistogram(unittest.TestCase):
+    """Tests for Histogram."""
+
+    def test_buckets_are_cumulative(self):
+        """Values land in the first bucket whose bound they do not exceed; export is cumulative."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [("0.1", 2), ("1.0", 3), ("+Inf", 4)])
+        summary = histogram.summary()
+        self.assertEqual((summary["count"], summary["min"], summary["max"]), (4, 0.05, 3.0))
+        self.assertAlmostEqual(summary["mean"], 3.65 / 4)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Tests for MetricsRegistry."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.5,))
+        self.registry.enable()
+
+    def test_disabled_records_nothing(self):
+        """While disabled every call is a no-op and spans are a shared null context."""
+        self.registry.disable()
+        self.registry.increment("calls_total")
+        self.registry.observe("latency_seconds", 1.0)
+        with self.registry.span("block") as span:
+            self.assertIsNone(span)
+        self.assertIs(self.registry.span("other"), self.registry.span("block"))
+        self.assertEqual(self.registry.to_json(), {"counters": [], "histograms": []})
+
+    def test_counters_by_labels(self):
+        """Counters with different labels are separate series."""
+        self.registry.increment("cards_total", 3, source="api")
+        self.registry.increment("cards_total", 2, source="api")
+        self.registry.increment("cards_total", source="bulk")
+        self.assertEqual(self.registry.counter_value("cards_total", source="api"), 5)
+        self.assertEqual(self.registry.counter_value("cards_total", source="bulk"), 1)
+        self.assertEqual(self.registry.counter_value("cards_total"), 0)
+
+    def test_span_and_timed(self):
+        """Spans and decorated functions record <name>_seconds; failures also count errors."""
+        with self.registry.span("step", stage="a"):
+            pass
+        with self.assertRaises(ValueError), self.registry.span("step", stage="a"):
+            raise ValueError("boom")
+
+        @self.registry.timed()
+        def work(x):
+            return x * 2
+
+        self.assertEqual(work(2), 4)
+        self.assertEqual(self.registry.histogram("step_seconds", stage="a").count, 2)
+        self.assertEqual(self.registry.counter_value("step_errors_total", stage="a"), 1)
+        self.assertEqual(self.registry.histogram("work_seconds").count, 1)
+
+    def test_prometheus_format(self):
+        """Counters and histograms follow the text exposition format, with escaped labels."""
+        self.registry.increment("cards_total", 2, source='a"b')
+        self.registry.observe("request_seconds", 0.2, method="GET")
+        self.registry.observe("request_seconds", 0.7, method="GET")
+        self.assertEqual(
+            self.registry.to_prometheus().splitlines(),
+            [
+                "# TYPE mtg_cards_total counter",
+                'mtg_cards_total{source="a\\"b"} 2.0',
+                "# TYPE mtg_request_seconds histogram",
+                'mtg_request_seconds_bucket{method="GET",le="0.5"} 1',
+                'mtg_request_seconds_bucket{method="GET",le="+Inf"} 2',
+                'mtg_request_seconds_sum{method="GET"} 0.8999999999999999',
+                'mtg_request_seconds_count{method="GET"} 2',
+            ],
+        )
+
+    def test_write_by_suffix(self):
+        """write() emits JSON for .json paths and Prometheus text otherwise."""
+        self.registry.increment("cards_total")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path, prom_path = Path(tmp_dir) / "m.json", Path(tmp_dir) / "m.prom"
+            self.registry.write(json_path)
+            self.registry.write(prom_path)
+            self.assertEqual(json.loads(json_path.read_text())["counters"][0]["name"], "cards_total")
+            self.assertIn("mtg_cards_total 1.0", prom_path.read_text())
+            self.assertEqual(sorted(path.name for path in Path(tmp_dir).iterdir()), ["m.json", "m.prom"])
+
+
+class TestInstrumentation(unittest.TestCase):
+    """The ETL records into the process-wide registry when it is enabled."""
+
+    def setUp(self):
+        metrics.reset()
+        metrics.enable()
+        self.addCleanup(metrics.reset)
+        self.addCleanup(metrics.disable)
+
+    def test_http_responses(self):
+        """The session response hook records duration by method, status and cache use."""
+        response = requests.Response()
+        response.status_code = 200
+        response.elapsed = timedelta(milliseconds=30)
+        response.request = requests.Request("POST", "https://api.scryfall.com/cards/collection").prepare()
+        record_response(response)
+        histogram = metrics.REGISTRY.histogram("http_request_seconds", method="POST", status=200, cached=False)
+        self.assertEqual(histogram.count, 1)
+        self.assertAlmostEqual(histogram.total, 0.03)
+
+    def test_card_validation(self):
+        """Validated and invalid cards are counted per batch."""
+        card = load_card_fixture("cards_lands.json")
+        with patch("database.etl.schema_validation.logger"):
+            validate_cards_batch([card, {"id": "broken"}])
+        self.assertEqual(metrics.REGISTRY.counter_value("cards_validated_total"), 1)
+        self.assertEqual(metrics.REGISTRY.counter_value("cards_invalid_total"), 1)
+        self.assertEqual(metrics.REGISTRY.histogram("validate_cards_batch_seconds").count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
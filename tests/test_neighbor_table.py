@@ -0,0 +1,199 @@
+"""Unit tests for the precomputed neighbour table and its Postgres storage."""
+
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.services.neighbor_table import NeighborTable, compute_neighbors, update_neighbor_table
+from app.services.printings import OracleSimilaritySearch
+from app.services.vector_service import FEATURE_SCHEMA, SimilaritySearch
+from database.card_neighbors import (
+    NEIGHBORS_MERGE_SQL,
+    NEIGHBORS_STAGING_SQL,
+    apply_card_delta,
+    fetch_neighbors,
+    load_and_update,
+    store_neighbors,
+)
+from database.etl.cards.cards_etl import CardsDelta, CardsLoadResult
+from tests.test_printings import printing
+from tests.test_vector_service import load_card_rows
+
+
+def clustered_vectors(n: int, seed: int, dim: int = 16) -> np.ndarray:
+    """Vectors around a few shared centres, so neighbour lists overlap."""
+    rng = np.random.default_rng(seed)
+    centres = np.random.default_rng(0).normal(size=(8, dim))
+    return (centres[rng.integers(0, len(centres), n)] + rng.normal(scale=0.5, size=(n, dim))).astype(np.float32)
+
+
+class TestComputeNeighbors(unittest.TestCase):
+    """Tests for compute_neighbors() and NeighborTable."""
+
+    def setUp(self):
+        self.ids = [f"c{i}" for i in range(300)]
+        self.search = SimilaritySearch(self.ids, clustered_vectors(300, 1))
+
+    def test_matches_most_similar(self):
+        """Each row lists the same neighbours as a live query."""
+        table = NeighborTable.build(self.search, n=5, block_size=64)
+        for card_id in ("c0", "c123", "c299"):
+            expected = self.search.most_similar([card_id], k=5)[0]
+            found = table.lookup(card_id)
+            self.assertEqual([neighbor for neighbor, _ in found], [neighbor for neighbor, _ in expected])
+            np.testing.assert_allclose([score for _, score in found], [score for _, score in expected], rtol=1e-5)
+
+    def test_pool_matches_serial(self):
+        """Pool workers on the shared index produce the same table as one process."""
+        serial = compute_neighbors(self.search, 5, block_size=64)
+        pooled = compute_neighbors(self.search, 5, block_size=64, workers=2)
+        np.testing.assert_array_equal(serial[0], pooled[0])
+        np.testing.assert_array_equal(serial[1], pooled[1])
+
+    def test_small_index_is_padded(self):
+        """Rows of an index with fewer than n other cards are padded."""
+        cards = load_card_rows()
+        table = NeighborTable.build(SimilaritySearch.from_cards(cards), n=10)
+        self.assertEqual(table.neighbors.shape, (len(cards), 10))
+        self.assertTrue((table.neighbors[:, len(cards) - 1:] == -1).all())
+        self.assertEqual(len(table.lookup(cards[0]["id"])), len(cards) - 1)
+
+    def test_tombstones_must_be_compacted(self):
+        """Rows removed without compaction would appear as neighbours."""
+        self.search.remove(["c0"], compact_threshold=1.0)
+        with self.assertRaises(ValueError):
+            compute_neighbors(self.search, 5)
+
+    def test_save_and_load(self):
+        """A saved table looks up identically after loading."""
+        table = NeighborTable.build(self.search, n=5, fingerprint="abc")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "neighbors.npz"
+            table.save(path)
+            loaded = NeighborTable.load(path)
+        self.assertEqual(loaded.fingerprint, "abc")
+        self.assertEqual(loaded.lookup("c7"), table.lookup("c7"))
+
+
+class TestUpdateNeighborTable(unittest.TestCase):
+    """Tests for update_neighbor_table()."""
+
+    def test_update_matches_rebuild(self):
+        """After upserts and removals only some rows are recomputed, yet the table equals a rebuild."""
+        ids = [f"c{i}" for i in range(400)]
+        search = SimilaritySearch(ids, clustered_vectors(400, 1))
+        table = NeighborTable.build(search, n=8, block_size=64)
+
+        changed = [f"new{i}" for i in range(5)] + ids[:5]
+        search.upsert(changed, clustered_vectors(len(changed), 2))
+        search.remove(ids[10:20], compact_threshold=0.0)
+        updated, recomputed = update_neighbor_table(table, search, changed, ids[10:20], block_size=64)
+        rebuilt = NeighborTable.build(search, n=8)
+
+        self.assertLess(len(recomputed), len(search))
+        self.assertEqual(updated.ids.tolist(), rebuilt.ids.tolist())
+        np.testing.assert_array_equal(updated.neighbors, rebuilt.neighbors)
+        np.testing.assert_allclose(updated.scores, rebuilt.scores, rtol=1e-6)
+
+    def test_no_changes_recomputes_nothing(self):
+        """An unchanged index keeps every list."""
+        search = SimilaritySearch([f"c{i}" for i in range(50)], clustered_vectors(50, 3))
+        table = NeighborTable.build(search, n=5)
+        updated, recomputed = update_neighbor_table(table, search, [])
+        self.assertEqual(len(recomputed), 0)
+        np.testing.assert_array_equal(updated.neighbors, table.neighbors)
+
+
+class TestApplyCardDelta(unittest.TestCase):
+    """Updating the oracle-level table from a card load."""
+
+    def setUp(self):
+        rows = load_card_rows()
+        self.cards = [printing(row, f"{row['id']}-{year}", date(year, 1, 1)) for row in rows[:6] for year in (2015, 2020)]
+        self.extra = rows[6]
+        self.search = OracleSimilaritySearch.from_cards(self.cards)
+        self.table = NeighborTable.build(self.search.search, n=3, fingerprint=FEATURE_SCHEMA.fingerprint)
+
+    def test_update_matches_rebuild(self):
+        """A card delta gives the same lists as rebuilding from the loaded cards."""
+        reprint = printing(self.cards[0], "reprint-2030", date(2030, 1, 1))
+        errata = [dict(card, oracle_text="Draw two cards.") for card in self.cards[2:4]]
+        gone = self.cards[4:6]
+        after = [*self.cards[:2], reprint, *errata, *self.cards[6:], self.extra]
+        delta = CardsDelta(
+            inserted=["reprint-2030", self.extra["id"]],
+            updated=[card["id"] for card in errata],
+            deleted=[card["id"] for card in gone],
+        )
+
+        table, recomputed, removed = apply_card_delta(
+            self.table, self.search, delta, rows=[*self.cards[:2], reprint, *errata, self.extra]
+        )
+        rebuilt = NeighborTable.build(OracleSimilaritySearch.from_cards(after).search, n=3)
+
+        self.assertEqual(removed, [gone[0]["oracle_id"]])
+        self.assertEqual(sorted(table.ids.tolist()), sorted(rebuilt.ids.tolist()))
+        self.assertEqual(len(recomputed), len(table))
+        for key in rebuilt.ids.tolist():
+            self.assertEqual([neighbor for neighbor, _ in table.lookup(key)], [neighbor for neighbor, _ in rebuilt.lookup(key)])
+
+    def test_stale_table_is_rebuilt(self):
+        """A table from another feature schema is recomputed in full after the load."""
+        stale = NeighborTable(self.table.ids, self.table.neighbors, self.table.scores, "old-fingerprint")
+        delta = CardsDelta(deleted=[card["id"] for card in self.cards[:2]])
+        with (
+            patch("database.card_neighbors.NeighborTable.load", return_value=stale),
+            patch("database.card_neighbors.OracleSimilaritySearch.from_database", return_value=self.search),
+            patch("database.card_neighbors.load_bulk_file", return_value=CardsLoadResult(delta=delta)) as mock_load,
+            patch("app.services.printings.fetch_printing_rows", return_value=[]),
+        ):
+            table, recomputed, removed = load_and_update(Path("neighbors.npz"), Path("cards.json"), prune=True)
+
+        mock_load.assert_called_once_with(Path("cards.json"), prune=True)
+        self.assertIsNone(recomputed)
+        self.assertEqual(removed, [self.cards[0]["oracle_id"]])
+        self.assertEqual((len(table), table.fingerprint), (len(self.table) - 1, FEATURE_SCHEMA.fingerprint))
+
+
+class TestNeighborStorage(unittest.TestCase):
+    """Storing and reading neighbour lists against a mocked cursor."""
+
+    def setUp(self):
+        self.mock_cursor = MagicMock()
+        patcher = patch("database.card_neighbors.get_cursor")
+        mock_get_cursor = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_get_cursor.return_value.__enter__.return_value = self.mock_cursor
+        self.table = NeighborTable(
+            ids=np.array(["a", "b", "c"], dtype=object),
+            neighbors=np.array([[1, -1], [0, 2], [1, 0]], dtype=np.int32),
+            scores=np.array([[0.5, -np.inf], [0.5, 0.25], [0.25, 0.1]], dtype=np.float32),
+            fingerprint="fp",
+        )
+
+    def test_store_copies_then_merges(self):
+        """Rows are COPYed as arrays of oracle keys, padding dropped, then merged and pruned."""
+        copied = store_neighbors(self.table, positions=[0, 1], removed_ids=["gone"])
+
+        self.assertEqual(copied, 2)
+        executed = [call.args[0] for call in self.mock_cursor.execute.call_args_list]
+        self.assertEqual(executed[:2], [NEIGHBORS_STAGING_SQL, NEIGHBORS_MERGE_SQL])
+        self.assertIn("DELETE FROM card_neighbors", executed[2])
+        mock_copy = self.mock_cursor.copy.return_value.__enter__.return_value
+        mock_copy.set_types.assert_called_once_with(["text", "text[]", "float4[]", "text"])
+        self.assertEqual(mock_copy.write_row.call_args_list[0].args[0], ("a", ["b"], [0.5], "fp"))
+
+    def test_fetch_neighbors(self):
+        """A lookup zips the stored arrays; unknown cards give no neighbours."""
+        self.mock_cursor.fetchone.return_value = (["b", "c"], [0.5, 0.25])
+        self.assertEqual(fetch_neighbors("a", k=2), [("b", 0.5), ("c", 0.25)])
+        self.mock_cursor.fetchone.return_value = None
+        self.assertEqual(fetch_neighbors("missing"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
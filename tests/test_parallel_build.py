@@ -0,0 +1,43 @@
+"""Unit tests for the multi-core corpus vectorization."""
+
+import os
+import unittest
+
+import numpy as np
+
+from app.services.parallel_build import pool_context, transform_parallel
+from app.services.vector_service import CardVectorizer
+from tests.test_vector_service import load_card_rows
+
+
+class TestTransformParallel(unittest.TestCase):
+    """Tests for transform_parallel()."""
+
+    def setUp(self):
+        examples = load_card_rows()
+        self.cards = [dict(examples[i % len(examples)], id=f"card-{i}") for i in range(100)]
+        self.expected = CardVectorizer().transform(self.cards)
+
+    def test_pool_matches_single_process(self):
+        """Chunks written to shared memory assemble the same matrix as one transform()."""
+        matrix, stats = transform_parallel(self.cards, workers=2, chunk_size=15)
+        np.testing.assert_array_equal(matrix, self.expected)
+        self.assertEqual(stats.cards, 100)
+        self.assertEqual(sum(worker.cards for worker in stats.workers), 100)
+        self.assertEqual(sum(worker.chunks for worker in stats.workers), 7)
+        self.assertNotIn(os.getpid(), [worker.pid for worker in stats.workers])
+
+    def test_single_worker_runs_in_process(self):
+        """One worker (or a single chunk) skips the pool."""
+        matrix, stats = transform_parallel(self.cards, workers=1)
+        np.testing.assert_array_equal(matrix, self.expected)
+        self.assertEqual([worker.pid for worker in stats.workers], [os.getpid()])
+        self.assertGreater(stats.cards_per_second, 0)
+
+    def test_workers_are_not_forked(self):
+        """The pool never forks a parent that may already run database threads."""
+        self.assertIn(pool_context().get_start_method(), ("forkserver", "spawn"))
+
+
+if __name__ == "__main__":
+    unittest.main()
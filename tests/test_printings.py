@@ -0,0 +1,144 @@
+"""Unit tests for collapsing printings to one vector per oracle_id."""
+
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from app.services.printings import OracleSimilaritySearch, group_printings
+from database.etl.cards.cards_etl import CardsDelta
+from tests.test_vector_service import load_card_rows
+
+
+def printing(card: dict, card_id: str, released_at: date, digital: bool = False, promo: bool = False) -> dict:
+    """Another printing of card with its own id and printing attributes."""
+    return {**card, "id": card_id, "released_at": released_at, "digital": digital, "promo": promo}
+
+
+class TestGroupPrintings(unittest.TestCase):
+    """Tests for group_printings()."""
+
+    def setUp(self):
+        card = load_card_rows()[0]
+        self.oracle_id = card["oracle_id"]
+        self.cards = [
+            printing(card, "old", date(2010, 1, 1)),
+            printing(card, "new", date(2024, 1, 1)),
+            printing(card, "digital", date(2025, 1, 1), digital=True),
+            printing(card, "promo", date(2025, 6, 1), promo=True),
+        ]
+
+    def test_default_prefers_paper_non_promo_newest(self):
+        """Digital and promo printings rank after the newest regular printing."""
+        representatives, groups = group_printings(self.cards)
+        self.assertEqual([card["id"] for card in representatives], ["new"])
+        self.assertEqual(groups.printings[self.oracle_id], ["new", "old", "promo", "digital"])
+        self.assertEqual(groups.oracle_of["digital"], self.oracle_id)
+
+    def test_preference_is_configurable(self):
+        """With only 'newest', the latest printing wins whatever it is."""
+        _, groups = group_printings(self.cards, preference=("newest",))
+        self.assertEqual(groups.canonical(self.oracle_id), "promo")
+
+    def test_unknown_rule(self):
+        """Misspelled rules are rejected."""
+        with self.assertRaises(ValueError):
+            group_printings(self.cards, preference=("cheapest",))
+
+    def test_cards_without_oracle_id_stand_alone(self):
+        """Reversible cards (no oracle_id) are grouped by their own id."""
+        cards = [dict(self.cards[0], id="rev-1", oracle_id=None), dict(self.cards[0], id="rev-2", oracle_id=None)]
+        representatives, _ = group_printings(cards)
+        self.assertEqual(len(representatives), 2)
+
+
+class TestOracleSimilaritySearch(unittest.TestCase):
+    """Tests for OracleSimilaritySearch."""
+
+    def setUp(self):
+        rows = load_card_rows()
+        self.cards = []
+        for row in rows:
+            for year in (2015, 2020, 2025):
+                self.cards.append(printing(row, f"{row['id']}-{year}", date(year, 1, 1)))
+        self.search = OracleSimilaritySearch.from_cards(self.cards)
+
+    def test_one_vector_per_oracle_id(self):
+        """Three printings of each card collapse to a single indexed vector."""
+        self.assertEqual(len(self.search), len(self.cards) // 3)
+
+    def test_results_are_distinct_cards(self):
+        """Neither the query card's reprints nor duplicate results appear."""
+        query = self.cards[0]
+        results = self.search.most_similar([query["id"]], k=3)[0]
+        oracle_ids = [result.oracle_id for result in results]
+        self.assertEqual(len(set(oracle_ids)), 3)
+        self.assertNotIn(query["oracle_id"], oracle_ids)
+        self.assertTrue(all(result.card_id.endswith("-2025") for result in results))
+
+    def test_fan_out_to_all_printings(self):
+        """all_printings returns every printing, newest first."""
+        result = self.search.most_similar([self.cards[0]["id"]], k=1, all_printings=True)[0][0]
+        self.assertEqual([card_id[-4:] for card_id in result.printings], ["2025", "2020", "2015"])
+
+
+class TestOracleApplyDelta(unittest.TestCase):
+    """Tests for OracleSimilaritySearch.apply_delta()."""
+
+    def setUp(self):
+        rows = load_card_rows()
+        self.cards = [printing(row, f"{row['id']}-{year}", date(year, 1, 1)) for row in rows[:5] for year in (2015, 2020)]
+        self.extra = rows[5]
+        self.search = OracleSimilaritySearch.from_cards(self.cards)
+
+    def assert_matches_rebuild(self, cards: list[dict]):
+        """The updated index groups and answers like one built from scratch over cards."""
+        rebuilt = OracleSimilaritySearch.from_cards(cards)
+        self.assertEqual(self.search.groups, rebuilt.groups)
+        ids = [card["id"] for card in cards]
+        for expected, found in zip(rebuilt.most_similar(ids, k=10), self.search.most_similar(ids, k=10)):
+            self.assertEqual([(r.oracle_id, r.printings) for r in found], [(r.oracle_id, r.printings) for r in expected])
+
+    def test_regroups_affected_oracle_keys(self):
+        """New printings, rules changes, moved-out keys and new cards give the same index as a rebuild."""
+        reprint = printing(self.cards[0], "reprint-2030", date(2030, 1, 1))
+        errata = [dict(card, oracle_text="Draw two cards.") for card in self.cards[2:4]]
+        gone = self.cards[4:6]
+        after = [self.cards[0], self.cards[1], reprint, *errata, *self.cards[6:], self.extra]
+        rows = [self.cards[0], self.cards[1], reprint, *errata, self.extra]
+        delta = CardsDelta(
+            inserted=["reprint-2030", self.extra["id"]],
+            updated=[card["id"] for card in errata],
+            deleted=[card["id"] for card in gone],
+        )
+
+        keys = self.search.apply_delta(delta, rows)
+
+        self.assertEqual(keys.inserted, [self.extra["oracle_id"]])
+        self.assertEqual(keys.updated, [errata[0]["oracle_id"]])
+        self.assertEqual(keys.deleted, [gone[0]["oracle_id"]])
+        self.assertEqual(self.search.groups.canonical(reprint["oracle_id"]), "reprint-2030")
+        self.search.search.compact()
+        self.assert_matches_rebuild(after)
+
+    def test_reads_affected_printings(self):
+        """Without rows, the printings of the old and new oracle keys are read from the cards table."""
+        delta = CardsDelta(updated=[self.cards[0]["id"]], deleted=["not-indexed"])
+        with patch("app.services.printings.fetch_printing_rows", return_value=self.cards[:2]) as mock_fetch:
+            keys = self.search.apply_delta(delta)
+
+        mock_fetch.assert_called_once_with({self.cards[0]["oracle_id"]}, [self.cards[0]["id"]])
+        self.assertFalse(keys)
+
+    def test_removes_keys_without_printings(self):
+        """Deleting every printing of a card drops its oracle key and nothing else."""
+        gone = self.cards[:2]
+        keys = self.search.apply_delta(CardsDelta(deleted=[card["id"] for card in gone]), rows=[])
+
+        self.assertEqual((keys.inserted, keys.updated, keys.deleted), ([], [], [gone[0]["oracle_id"]]))
+        self.assertNotIn(gone[0]["id"], self.search.groups.oracle_of)
+        self.search.search.compact()
+        self.assert_matches_rebuild(self.cards[2:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Unit tests for the shared TokenBucket rate limiter."""
+
+import unittest
+
+from database.etl.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """Deterministic clock whose sleep() advances time instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Record the sleep and advance the fake time."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for TokenBucket."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_bucket(self, rate: float, **kwargs) -> TokenBucket:
+        """Build a bucket driven by the fake clock."""
+        return TokenBucket(rate, clock=self.clock.time, sleep=self.clock.sleep, **kwargs)
+
+    def test_first_request_does_not_wait(self):
+        """A full bucket lets the first request through immediately."""
+        bucket = self.make_bucket(10)
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_spaces_requests_at_configured_rate(self):
+        """With capacity 1, requests are spaced 1/rate seconds apart."""
+        bucket = self.make_bucket(10)
+        for _ in range(5):
+            bucket.acquire()
+        self.assertAlmostEqual(self.clock.now, 0.4)
+
+    def test_capacity_allows_burst(self):
+        """Capacity > 1 lets a burst through before throttling."""
+        bucket = self.make_bucket(10, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(self.clock.now, 0.0)
+
+    def test_penalize_pauses_and_halves_rate(self):
+        """A 429 blocks all requests for Retry-After and halves the rate."""
+        bucket = self.make_bucket(10)
+        bucket.acquire()
+        bucket.penalize(2.0)
+        bucket.acquire()
+
+        self.assertAlmostEqual(bucket.rate, 5)
+        self.assertGreaterEqual(self.clock.now, 2.0)
+
+    def test_rate_never_drops_below_min_rate(self):
+        """Repeated penalties stop at min_rate."""
+        bucket = self.make_bucket(8, min_rate=2)
+        for _ in range(10):
+            bucket.penalize(0)
+        self.assertEqual(bucket.rate, 2)
+
+    def test_success_recovers_rate_up_to_max(self):
+        """Successful requests gradually restore the configured rate."""
+        bucket = self.make_bucket(10)
+        bucket.penalize(0)
+        bucket.record_success()
+        self.assertAlmostEqual(bucket.rate, 6)
+        for _ in range(5):
+            bucket.record_success()
+        self.assertEqual(bucket.rate, 10)
+
+    def test_rejects_invalid_configuration(self):
+        """rate must be positive and capacity at least one token."""
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(10, capacity=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""Unit tests for the persistent Scryfall response cache."""
+
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+from app.config.api_endpoints import APIEndpointsConfig
+from database.etl.cards.cards_retrieval_svc import CardsRetrievalService
+from database.etl.response_cache import ResponseCache
+from database.etl.session_manager import SessionManager
+
+ETAG = '"sets-v1"'
+
+
+class StubScryfallHandler(BaseHTTPRequestHandler):
+    """Serves GET /sets with an ETag and POST /cards/collection."""
+
+    def _send_json(self, payload: dict, headers: dict[str, str] | None = None) -> None:
+        encoded = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer GET /sets, honouring If-None-Match."""
+        self.server.log.append(("GET", self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self._send_json({"object": "list", "data": [{"code": "tdm"}]}, {"ETag": ETAG})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer POST /cards/collection by echoing the identifiers as cards."""
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.log.append(("POST", None))
+        cards = [{"collector_number": i["collector_number"]} for i in body["identifiers"]]
+        self._send_json({"object": "list", "not_found": [], "data": cards})
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep test output quiet."""
+
+
+class CacheTestCase(unittest.TestCase):
+    """Starts a stub server and a cache in a temporary directory."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubScryfallHandler)
+        self.server.log = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache_path = Path(tmp_dir.name) / "responses.sqlite"
+
+    def make_cache(self, **kwargs) -> ResponseCache:
+        """Open a cache file that is closed at the end of the test."""
+        cache = ResponseCache(self.cache_path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+
+class TestCachingSession(CacheTestCase):
+    """SessionManager with a ResponseCache."""
+
+    def test_fresh_get_is_served_without_network(self):
+        """A second GET within the TTL never reaches the server."""
+        manager = SessionManager(cache=self.make_cache())
+
+        first = manager.session.get(f"{self.base_url}/sets")
+        second = manager.session.get(f"{self.base_url}/sets")
+
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(len(self.server.log), 1)
+
+    def test_expired_get_is_revalidated_with_etag(self):
+        """An expired entry sends If-None-Match and a 304 reuses the cached body."""
+        manager = SessionManager(cache=self.make_cache(ttl_seconds=0))
+
+        manager.session.get(f"{self.base_url}/sets")
+        second = manager.session.get(f"{self.base_url}/sets")
+
+        self.assertEqual(self.server.log, [("GET", None), ("GET", ETAG)])
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["data"][0]["code"], "tdm")
+
+    def test_posts_are_keyed_by_body(self):
+        """POSTs with different bodies are cached separately."""
+        manager = SessionManager(cache=self.make_cache())
+        url = f"{self.base_url}/cards/collection"
+
+        body_a = {"identifiers": [{"set": "tdm", "collector_number": "1"}]}
+        body_b = {"identifiers": [{"set": "tdm", "collector_number": "2"}]}
+        manager.session.post(url, json=body_a)
+        manager.session.post(url, json=body_b)
+        cached = manager.session.post(url, json=body_a)
+
+        self.assertEqual(len(self.server.log), 2)
+        self.assertTrue(cached.from_cache)
+        self.assertEqual(cached.json()["data"][0]["collector_number"], "1")
+
+    def test_cache_persists_across_sessions(self):
+        """Entries survive in the file for a new cache instance."""
+        SessionManager(cache=self.make_cache()).session.get(f"{self.base_url}/sets")
+        response = SessionManager(cache=self.make_cache()).session.get(f"{self.base_url}/sets")
+
+        self.assertTrue(response.from_cache)
+        self.assertEqual(len(self.server.log), 1)
+
+
+class TestResponseCacheEviction(CacheTestCase):
+    """Size-bounded LRU eviction."""
+
+    def test_evicts_least_recently_used(self):
+        """When over max_bytes, the entry used longest ago is dropped first."""
+        cache = self.make_cache(max_bytes=150)
+        manager = SessionManager(cache=cache)
+        url = f"{self.base_url}/cards/collection"
+        bodies = [{"identifiers": [{"set": "tdm", "collector_number": str(i)}]} for i in range(3)]
+
+        manager.session.post(url, json=bodies[0])
+        time.sleep(0.01)
+        manager.session.post(url, json=bodies[1])
+        time.sleep(0.01)
+        manager.session.post(url, json=bodies[0])  # hit: bodies[0] is now most recent
+        time.sleep(0.01)
+        manager.session.post(url, json=bodies[2])  # exceeds max_bytes, evicts bodies[1]
+
+        self.assertLessEqual(cache.total_bytes(), 150)
+        self.assertTrue(manager.session.post(url, json=bodies[0]).from_cache)
+        self.assertFalse(manager.session.post(url, json=bodies[1]).from_cache)
+
+
+class TestCachedCollectionRerun(CacheTestCase):
+    """Re-running a collection lookup against a warm cache."""
+
+    def test_rerun_skips_network_and_rate_limit_delay(self):
+        """A warm re-run sends no requests and does not sleep between batches."""
+        url = f"{self.base_url}/cards/collection"
+        identifiers = [{"set": "tdm", "collector_number": str(i)} for i in range(160)]
+
+        with patch.object(APIEndpointsConfig, "CARDS_COLLECTION_ENDPOINT", url):
+            CardsRetrievalService(cache=self.make_cache()).get_cards_collection(identifiers)
+            self.assertEqual(len(self.server.log), 3)
+
+            with patch("database.etl.cards.cards_retrieval_svc.time.sleep") as mock_sleep:
+                cards = CardsRetrievalService(cache=self.make_cache()).get_cards_collection(identifiers)
+
+        self.assertEqual(len(cards), 160)
+        self.assertEqual(len(self.server.log), 3)
+        mock_sleep.assert_not_called()
+
+    def test_async_rerun_skips_rate_limit_delay(self):
+        """aiter_cards_collection() skips the serial delay for cached batches, like the sync API."""
+        url = f"{self.base_url}/cards/collection"
+        identifiers = [{"set": "tdm", "collector_number": str(i)} for i in range(160)]
+
+        async def collect(service: CardsRetrievalService) -> list:
+            return [card async for batch in service.aiter_cards_collection(identifiers) for card in batch]
+
+        with patch.object(APIEndpointsConfig, "CARDS_COLLECTION_ENDPOINT", url):
+            CardsRetrievalService(cache=self.make_cache()).get_cards_collection(identifiers)
+            with patch("database.etl.cards.cards_retrieval_svc.asyncio.sleep") as mock_sleep:
+                cards = asyncio.run(collect(CardsRetrievalService(cache=self.make_cache())))
+
+        self.assertEqual(len(cards), 160)
+        self.assertEqual(len(self.server.log), 3)
+        mock_sleep.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
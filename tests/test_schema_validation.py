@@ -5,14 +5,24 @@ If a column is added/removed in SQL but not reflected in the Pydantic model (or
 these tests will fail with a clear diff of the mismatch.
 """
 
+import json
 import re
 import unittest
+from datetime import date
 from pathlib import Path
 
-from database.etl.schema_validation import CardsValidation, SetsValidation
+from database.etl.schema_validation import (
+    CARDS_DERIVED_COLUMNS,
+    CARDS_PRICE_FIELDS,
+    CARDS_UPSERT_COLUMNS,
+    CardsValidation,
+    SetsValidation,
+    validate_cards_batch,
+)
 
 # Relative to project root (tests are executed from the repo root)
 SQL_DIR = Path(__file__).resolve().parent.parent / "src" / "database" / "sql" / "create_tables"
+SCHEMAS_DIR = Path(__file__).resolve().parent.parent / "src" / "database" / "schemas"
 
 
 def parse_sql_columns(sql_path: Path) -> set[str]:
@@ -63,14 +73,15 @@ class TestSetsSchemaAlignment(unittest.TestCase):
         )
 
 
-@unittest.skip("CardsValidation model not yet implemented — add fields to enable this test")
 class TestCardsSchemaAlignment(unittest.TestCase):
     """Verify CardsValidation Pydantic fields match cards.sql columns."""
 
     def test_pydantic_fields_match_sql_columns(self):
         """Every SQL column must exist as a Pydantic field and vice versa."""
-        sql_columns = parse_sql_columns(SQL_DIR / "cards.sql")
-        pydantic_fields = set(CardsValidation.model_fields.keys())
+        # Derived columns (content_hash) are computed in SQL, not read from the API
+        sql_columns = parse_sql_columns(SQL_DIR / "cards.sql") - set(CARDS_DERIVED_COLUMNS)
+        # Prices are validated with the card but stored in card_prices
+        pydantic_fields = set(CardsValidation.model_fields.keys()) - set(CARDS_PRICE_FIELDS)
 
         self.assertEqual(
             sql_columns,
@@ -81,5 +92,53 @@ class TestCardsSchemaAlignment(unittest.TestCase):
         )
 
 
+class TestValidateCardsBatch(unittest.TestCase):
+    """Tests for the batch validation path used by the cards ETL."""
+
+    def setUp(self):
+        self.cards = [json.loads(path.read_text()) for path in sorted(SCHEMAS_DIR.glob("cards_*.json"))]
+        self.rows = [dict(zip(CARDS_UPSERT_COLUMNS, row)) for row in validate_cards_batch(self.cards)]
+
+    def test_every_fixture_validates(self):
+        """All bundled card examples produce one row each."""
+        self.assertEqual(len(self.rows), len(self.cards))
+        self.assertTrue(all(len(row) == len(CARDS_UPSERT_COLUMNS) for row in self.rows))
+
+    def test_maps_set_to_set_code(self):
+        """The Scryfall 'set' field is stored in the set_code column."""
+        self.assertEqual([row["set_code"] for row in self.rows], [card["set"] for card in self.cards])
+
+    def test_parses_release_date(self):
+        """released_at is converted to a date for the DATE column."""
+        self.assertEqual(self.rows[0]["released_at"], date.fromisoformat(self.cards[0]["released_at"]))
+
+    def test_missing_booleans_default_to_false(self):
+        """Absent NOT NULL boolean fields load as False instead of NULL."""
+        card = dict(self.cards[0])
+        del card["reserved"]
+        row = dict(zip(CARDS_UPSERT_COLUMNS, validate_cards_batch([card])[0]))
+        self.assertIs(row["reserved"], False)
+
+    def test_type_specific_fields_are_optional(self):
+        """Fields only some card types have (loyalty, power, ...) load as NULL when absent."""
+        by_type = {row["type_line"]: row for row in self.rows}
+        creature = next(row for type_line, row in by_type.items() if "Creature" in type_line)
+        self.assertIsNone(creature["loyalty"])
+        self.assertIsNotNone(creature["power"])
+
+    def test_keeps_arrays_and_json(self):
+        """TEXT[] and JSONB columns keep their list/dict values."""
+        self.assertEqual(self.rows[0]["colors"], self.cards[0]["colors"])
+        self.assertEqual(self.rows[0]["legalities"], self.cards[0]["legalities"])
+
+    def test_invalid_card_is_skipped(self):
+        """One invalid card does not reject the rest of the batch."""
+        invalid = dict(self.cards[1])
+        del invalid["name"]
+        with self.assertLogs("database.etl.schema_validation", level="WARNING"):
+            rows = validate_cards_batch([self.cards[0], invalid, self.cards[2]])
+        self.assertEqual([row[0] for row in rows], [self.cards[0]["id"], self.cards[2]["id"]])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for the sets ETL (validation and batched upsert)."""
+
+import json
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from database.etl.sets.sets_etl import (
+    SETS_UPSERT_COLUMNS,
+    SETS_UPSERT_SQL,
+    upsert_sets,
+    validate_sets,
+)
+
+SCHEMAS_DIR = Path(__file__).resolve().parent.parent / "src" / "database" / "schemas"
+
+
+def load_set_fixture() -> dict:
+    """Load the bundled Scryfall set example."""
+    return json.loads((SCHEMAS_DIR / "sets.json").read_text())
+
+
+class TestValidateSets(unittest.TestCase):
+    """Tests for validate_sets()."""
+
+    def test_returns_tuples_in_upsert_column_order(self):
+        """Each valid set becomes a tuple matching SETS_UPSERT_COLUMNS."""
+        rows = validate_sets([load_set_fixture()])
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(rows[0]), len(SETS_UPSERT_COLUMNS))
+        row = dict(zip(SETS_UPSERT_COLUMNS, rows[0]))
+        self.assertEqual(row["code"], "tdm")
+        self.assertEqual(row["name"], "Tarkir: Dragonstorm")
+        self.assertEqual(row["card_count"], 427)
+        self.assertFalse(row["digital"])
+
+    def test_skips_invalid_sets(self):
+        """Sets missing required fields are skipped, valid ones are kept."""
+        broken = {"code": "bad", "name": "Missing Fields"}
+        rows = validate_sets([broken, load_set_fixture()])
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], "tdm")
+
+    def test_placeholder_count_matches_columns(self):
+        """The upsert SQL has exactly one placeholder per upsert column."""
+        self.assertEqual(SETS_UPSERT_SQL.count("%s"), len(SETS_UPSERT_COLUMNS))
+
+
+class TestUpsertSets(unittest.TestCase):
+    """Tests for upsert_sets()."""
+
+    def test_writes_all_chunks_in_one_transaction(self):
+        """All chunks are sent through a single get_cursor() block."""
+        rows = [(f"s{i}",) for i in range(5)]
+        mock_cursor = MagicMock()
+
+        with patch("database.etl.sets.sets_etl.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+            written = upsert_sets(rows, chunk_size=2)
+
+        self.assertEqual(written, 5)
+        mock_get_cursor.assert_called_once()
+        self.assertEqual(mock_cursor.executemany.call_count, 3)
+        sent = [row for call in mock_cursor.executemany.call_args_list for row in call.args[1]]
+        self.assertEqual(sent, rows)
+
+    def test_empty_rows_skip_database(self):
+        """No connection is opened when there is nothing to write."""
+        with patch("database.etl.sets.sets_etl.get_cursor") as mock_get_cursor:
+            self.assertEqual(upsert_sets([]), 0)
+        mock_get_cursor.assert_not_called()
+
+    def test_rejects_non_positive_chunk_size(self):
+        """chunk_size must be at least 1."""
+        with self.assertRaises(ValueError):
+            upsert_sets([("tdm",)], chunk_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""Unit tests for the TF-IDF oracle text vectorizer and hybrid search."""
+
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.services.text_vectorizer import (
+    DEFAULT_TEXT_WEIGHT,
+    HybridSimilaritySearch,
+    OracleTextVectorizer,
+    number_bucket,
+    text_tokens,
+)
+from app.services.vector_service import SimilaritySearch, normalize_oracle_text
+from tests.test_vector_service import load_card_rows
+
+
+class TestTextTokens(unittest.TestCase):
+    """Tests for text normalization and tokenization."""
+
+    def test_name_and_reminder_text(self):
+        """Own name becomes ~ and reminder text is dropped."""
+        tokens = text_tokens("Flying (This creature can't be blocked.)\nWhen Bird Man enters, draw a card.", "Bird Man")
+        self.assertIn("~", tokens)
+        self.assertNotIn("blocked", tokens)
+        self.assertNotIn("bird", tokens)
+
+    def test_same_normalization_as_oracle_block(self):
+        """Apart from number bucketing, the words are those of normalize_oracle_text()."""
+        text, name = "Fire deals 2 damage divided as you choose (among targets).\nIce: draw a card.", "Fire // Ice"
+        words = [token for token in text_tokens(text, name) if " " not in token and not token.startswith("#")]
+        self.assertEqual(words, re.findall(r"[a-z~]+", normalize_oracle_text(text, name)))
+
+    def test_mana_symbols(self):
+        """Mana symbols are single tokens and generic costs are bucketed."""
+        tokens = text_tokens("{4}{G/U}, {T}: Add {C}{C}.")
+        self.assertEqual(tokens[:6], ["{#4-5}", "{g/u}", "{t}", "add", "{c}", "{c}"])
+
+    def test_numbers_are_bucketed(self):
+        """Nearby numbers share a token, including inside +N/+N."""
+        self.assertEqual(text_tokens("deals 4 damage")[:3], text_tokens("deals 5 damage")[:3])
+        self.assertIn("+#1/+#1", text_tokens("Put a +1/+1 counter on it."))
+        self.assertEqual([number_bucket(value) for value in (0, 3, 7, 20)], ["#0", "#3", "#6-9", "#10+"])
+
+    def test_bigrams(self):
+        """Adjacent words also form bigrams."""
+        self.assertEqual(text_tokens("draw a card"), ["draw", "a", "card", "draw a", "a card"])
+
+    def test_empty(self):
+        """Cards without rules text have no tokens."""
+        self.assertEqual(text_tokens(None), [])
+
+
+class TestOracleTextVectorizer(unittest.TestCase):
+    """Tests for OracleTextVectorizer."""
+
+    def setUp(self):
+        self.cards = load_card_rows()
+
+    def test_transform_rows_are_normalized(self):
+        """Rows have unit length and one column per vocabulary token."""
+        vectorizer = OracleTextVectorizer(min_df=1).fit(self.cards)
+        matrix = vectorizer.transform(self.cards)
+        self.assertEqual(matrix.shape, (len(self.cards), vectorizer.dim))
+        np.testing.assert_allclose(np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1, 1.0, rtol=1e-5)
+
+    def test_min_df_drops_rare_tokens(self):
+        """Tokens seen in fewer than min_df cards get no weight."""
+        vectorizer = OracleTextVectorizer(min_df=len(self.cards) + 1).fit(self.cards)
+        self.assertEqual(vectorizer.transform(self.cards).nnz, 0)
+
+    def test_partial_fit_matches_full_fit(self):
+        """Fitting in two steps gives every token the same IDF and keeps existing columns."""
+        full = OracleTextVectorizer().fit(self.cards)
+        incremental = OracleTextVectorizer().fit(self.cards[:3])
+        before = dict(incremental.vocabulary)
+        incremental.partial_fit(self.cards[3:])
+
+        self.assertEqual(incremental.n_documents, full.n_documents)
+        self.assertEqual(set(incremental.vocabulary), set(full.vocabulary))
+        self.assertEqual({token: incremental.vocabulary[token] for token in before}, before)
+        for token, column in full.vocabulary.items():
+            self.assertAlmostEqual(incremental.idf[incremental.vocabulary[token]], full.idf[column], places=5)
+
+    def test_unknown_tokens_are_ignored(self):
+        """Transforming text outside the vocabulary gives an empty row."""
+        vectorizer = OracleTextVectorizer(min_df=1).fit(self.cards)
+        matrix = vectorizer.transform([{"name": "X", "oracle_text": "zzz qqq"}])
+        self.assertEqual(matrix.nnz, 0)
+
+    def test_save_and_load(self):
+        """A saved vocabulary transforms cards identically after loading."""
+        vectorizer = OracleTextVectorizer().fit(self.cards)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "vocabulary.npz"
+            vectorizer.save(path)
+            loaded = OracleTextVectorizer.load(path)
+        self.assertEqual(loaded.vocabulary, vectorizer.vocabulary)
+        self.assertEqual(loaded.n_documents, vectorizer.n_documents)
+        self.assertEqual((loaded.transform(self.cards) != vectorizer.transform(self.cards)).nnz, 0)
+
+
+class TestHybridSimilaritySearch(unittest.TestCase):
+    """Tests for HybridSimilaritySearch."""
+
+    def setUp(self):
+        self.cards = load_card_rows()
+        self.query = self.cards[1]["id"]
+        self.text_vectorizer = OracleTextVectorizer(min_df=1).fit(self.cards)
+
+    def scores(self, text_weight: float, **filters) -> dict[str, float]:
+        """Hybrid scores of every other card for the query card."""
+        search = HybridSimilaritySearch.from_cards_with_text(self.cards, text_vectorizer=self.text_vectorizer, text_weight=text_weight)
+        return dict(search.most_similar([self.query], k=len(self.cards), **filters)[0])
+
+    def test_weight_zero_is_structural_search(self):
+        """With text_weight=0 the scores equal plain SimilaritySearch."""
+        expected = dict(SimilaritySearch.from_cards(self.cards).most_similar([self.query], k=len(self.cards))[0])
+        for card_id, score in self.scores(0.0).items():
+            self.assertAlmostEqual(score, expected[card_id], places=5)
+
+    def test_weight_one_is_text_cosine(self):
+        """With text_weight=1 the scores are the TF-IDF cosines."""
+        text = self.text_vectorizer.transform(self.cards)
+        cosines = (text @ text.T).toarray()[1]
+        ids = [card["id"] for card in self.cards]
+        for card_id, score in self.scores(1.0).items():
+            self.assertAlmostEqual(score, cosines[ids.index(card_id)], places=5)
+
+    def test_blend_and_filters(self):
+        """Scores blend linearly and filters still apply."""
+        structural, text, hybrid = self.scores(0.0), self.scores(1.0), self.scores(0.25)
+        for card_id, score in hybrid.items():
+            self.assertAlmostEqual(score, 0.75 * structural[card_id] + 0.25 * text[card_id], places=5)
+        filtered = self.scores(0.25, legal_in="pauper")
+        self.assertEqual([self.cards[6]["id"]], list(filtered))
+
+    def test_upsert_and_compact(self):
+        """Cards can be added with a grown vocabulary and removed, as if rebuilt."""
+        text_vectorizer = OracleTextVectorizer(min_df=1).fit(self.cards[:4])
+        search = HybridSimilaritySearch.from_cards_with_text(self.cards[:4], text_vectorizer=text_vectorizer)
+        text_vectorizer.partial_fit(self.cards[4:])
+        search.upsert_cards(self.cards[4:])
+        search.remove([self.cards[0]["id"]], compact_threshold=0.0)
+        self.assertEqual(search.text.shape, (len(self.cards) - 1, text_vectorizer.dim))
+
+        # Rows transformed before partial_fit() keep their old IDF weights
+        rebuilt = HybridSimilaritySearch.from_cards_with_text(self.cards[1:], text_vectorizer=text_vectorizer)
+        for row, card in enumerate(self.cards[1:]):
+            if row >= 3:
+                self.assertEqual((search.text[row] != rebuilt.text[row]).nnz, 0)
+            self.assertEqual(search.positions([card["id"]]).tolist(), [row])
+
+    def test_upsert_needs_text(self):
+        """Hybrid rows cannot be added without their text vectors."""
+        search = HybridSimilaritySearch.from_cards_with_text(self.cards, text_vectorizer=self.text_vectorizer)
+        with self.assertRaises(ValueError):
+            search.upsert([self.cards[0]["id"]], search.vectors[:1], search.masks)
+
+    def test_from_cards_keeps_base_signature(self):
+        """The inherited constructor fits a text vectorizer on the cards."""
+        search = HybridSimilaritySearch.from_cards(self.cards)
+        self.assertIsInstance(search.text_vectorizer, OracleTextVectorizer)
+        self.assertEqual(search.text.shape[0], len(self.cards))
+        self.assertEqual(search.text_weight, DEFAULT_TEXT_WEIGHT)
+
+    def test_invalid_weight(self):
+        """text_weight must be a share."""
+        with self.assertRaises(ValueError):
+            HybridSimilaritySearch.from_cards_with_text(self.cards, text_weight=1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+"""Unit tests for the card feature-vector engine and exact similarity search."""
+
+import json
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.services.vector_service import (
+    FEATURE_SCHEMA,
+    VECTOR_COLUMNS,
+    CardVectorizer,
+    SimilaritySearch,
+    normalize_oracle_text,
+    parse_stat,
+    split_type_line,
+    top_k,
+)
+from database.etl.cards.cards_etl import CardsDelta
+from database.etl.schema_validation import CARDS_UPSERT_COLUMNS, validate_cards_batch
+
+SCHEMAS_DIR = Path(__file__).resolve().parent.parent / "src" / "database" / "schemas"
+
+
+def load_card_rows() -> list[dict]:
+    """Load the bundled card examples as cards table rows (dicts keyed by column)."""
+    cards = [json.loads(path.read_text()) for path in sorted(SCHEMAS_DIR.glob("cards_*.json"))]
+    return [dict(zip(CARDS_UPSERT_COLUMNS, row)) for row in validate_cards_batch(cards)]
+
+
+class TestParsing(unittest.TestCase):
+    """Tests for the text helpers."""
+
+    def test_normalize_oracle_text(self):
+        """Own name becomes ~, reminder text is dropped and numbers become #."""
+        text = "Swan Song deals 3 damage. (This is reminder text.)"
+        self.assertEqual(normalize_oracle_text(text, "Swan Song"), "~ deals # damage.  ")
+
+    def test_split_type_line(self):
+        """Types and subtypes are split on the em dash for every face."""
+        types, subtypes = split_type_line("Legendary Creature — Human Wizard // Land — Forest")
+        self.assertEqual(types, ["Legendary", "Creature", "Land"])
+        self.assertEqual(subtypes, ["Human", "Wizard", "Forest"])
+
+    def test_parse_stat(self):
+        """Numeric, variable and missing stats."""
+        self.assertEqual(parse_stat("3"), 3.0)
+        self.assertEqual(parse_stat("*"), 0.0)
+        self.assertEqual(parse_stat("1+*"), 1.0)
+        self.assertIsNone(parse_stat(None))
+
+
+class TestCardVectorizer(unittest.TestCase):
+    """Tests for CardVectorizer."""
+
+    def setUp(self):
+        self.vectorizer = CardVectorizer()
+        self.rows = load_card_rows()
+
+    def test_fixed_width_unit_vectors(self):
+        """Every card maps to a float32 unit vector of the schema's width."""
+        matrix = self.vectorizer.transform(self.rows)
+        self.assertEqual(matrix.shape, (len(self.rows), FEATURE_SCHEMA.dim))
+        self.assertEqual(matrix.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-5)
+
+    def test_batch_matches_single(self):
+        """transform() over a batch equals transform_one() per card."""
+        matrix = self.vectorizer.transform(self.rows)
+        for row, card in zip(matrix, self.rows):
+            np.testing.assert_allclose(row, self.vectorizer.transform_one(card), rtol=1e-6)
+
+    def test_reproducible(self):
+        """A fresh vectorizer produces identical vectors."""
+        np.testing.assert_array_equal(
+            self.vectorizer.transform(self.rows), CardVectorizer().transform(self.rows)
+        )
+
+    def test_feature_blocks(self):
+        """Colors and card types land in their one-hot columns."""
+        offsets = FEATURE_SCHEMA.offsets
+        creature = next(card for card in self.rows if "Creature" in card["type_line"])
+        vector = self.vectorizer.transform_one(creature)
+        self.assertTrue(np.any(vector[offsets["types"]] > 0))
+        self.assertTrue(np.any(vector[offsets["stats"]] > 0))
+        self.assertEqual(np.count_nonzero(vector[offsets["colors"]]), len(creature["colors"]))
+
+    def test_empty_card_is_zero(self):
+        """A card without any features yields a zero vector instead of NaN."""
+        vector = self.vectorizer.transform_one({"name": "Blank"})
+        self.assertFalse(np.any(vector))
+
+    def test_schema_check(self):
+        """Stored fingerprints are verified against the current schema."""
+        FEATURE_SCHEMA.check(FEATURE_SCHEMA.fingerprint)
+        with self.assertRaises(ValueError):
+            FEATURE_SCHEMA.check("0000000000000000")
+
+
+class TestTopK(unittest.TestCase):
+    """Tests for top_k()."""
+
+    def test_returns_best_first(self):
+        """Each row's k best scores come back in descending order."""
+        scores = np.array([[0.1, 0.9, 0.5, 0.7], [0.8, 0.2, 0.3, 0.1]])
+        indices, best = top_k(scores, 2)
+        np.testing.assert_array_equal(indices, [[1, 3], [0, 2]])
+        np.testing.assert_allclose(best, [[0.9, 0.7], [0.8, 0.3]])
+
+    def test_k_larger_than_candidates(self):
+        """k is clipped to the number of candidates."""
+        indices, _ = top_k(np.array([[0.2, 0.4]]), 5)
+        np.testing.assert_array_equal(indices, [[1, 0]])
+
+
+class TestSimilaritySearch(unittest.TestCase):
+    """Tests for SimilaritySearch."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.vectors = rng.normal(size=(300, 16)).astype(np.float32)
+        self.ids = [f"card-{i}" for i in range(300)]
+        self.search = SimilaritySearch(self.ids, self.vectors)
+
+    def brute_force(self, positions: np.ndarray, k: int) -> np.ndarray:
+        """Reference neighbours via a full argsort."""
+        normalized = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        scores = normalized[positions] @ normalized.T
+        scores[np.arange(len(positions)), positions] = -np.inf
+        return np.argsort(-scores, axis=1)[:, :k]
+
+    def test_matches_brute_force(self):
+        """Blocked argpartition search returns the exact neighbours."""
+        positions = np.arange(300)
+        indices, _ = self.search.search(self.vectors, k=5, block_size=64, exclude=positions)
+        np.testing.assert_array_equal(indices, self.brute_force(positions, 5))
+
+    def test_most_similar_excludes_query_card(self):
+        """A batch of query cards never returns itself as a neighbour."""
+        results = self.search.most_similar(["card-0", "card-42"], k=3)
+        self.assertEqual(len(results), 2)
+        self.assertNotIn("card-0", [card_id for card_id, _ in results[0]])
+        expected = self.brute_force(np.array([42]), 3)[0]
+        self.assertEqual([card_id for card_id, _ in results[1]], [self.ids[i] for i in expected])
+
+    def test_iter_all_pairs_covers_corpus_in_blocks(self):
+        """All-pairs neighbours are produced block by block and equal the exact answer."""
+        blocks = list(self.search.iter_all_pairs(k=4, block_size=128))
+        self.assertEqual([start for start, _, _ in blocks], [0, 128, 256])
+        indices = np.vstack([block_indices for _, block_indices, _ in blocks])
+        np.testing.assert_array_equal(indices, self.brute_force(np.arange(300), 4))
+
+    def test_unknown_card_id(self):
+        """Querying a card that is not indexed raises KeyError."""
+        with self.assertRaises(KeyError):
+            self.search.most_similar(["missing"])
+
+    def test_from_database(self):
+        """The index is built from rows read from the cards table."""
+        rows = load_card_rows()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [tuple(row[column] for column in VECTOR_COLUMNS) for row in rows]
+        with patch("app.services.vector_service.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+            search = SimilaritySearch.from_database()
+
+        self.assertEqual(len(search), len(rows))
+        self.assertEqual(len(search.most_similar([rows[0]["id"]], k=2)[0]), 2)
+
+
+class TestIncrementalUpdates(unittest.TestCase):
+    """Tests for upsert(), remove(), compact() and apply_delta()."""
+
+    def setUp(self):
+        self.cards = load_card_rows()
+        self.vectorizer = CardVectorizer()
+        self.search = SimilaritySearch.from_cards(self.cards[:5], self.vectorizer)
+
+    def assert_matches_rebuild(self, search: SimilaritySearch, cards: list[dict]):
+        """An updated index answers like one built from scratch over cards."""
+        rebuilt = SimilaritySearch.from_cards(cards, self.vectorizer)
+        ids = [card["id"] for card in cards]
+        for expected, found in zip(rebuilt.most_similar(ids, k=10), search.most_similar(ids, k=10)):
+            self.assertEqual([card_id for card_id, _ in found], [card_id for card_id, _ in expected])
+            np.testing.assert_allclose([score for _, score in found], [score for _, score in expected], rtol=1e-5)
+
+    def test_upsert_appends_and_replaces(self):
+        """New ids are appended; known ids keep their row and get the new vector."""
+        changed = dict(self.cards[0], oracle_text="Draw two cards.")
+        positions = self.search.upsert_cards([changed] + self.cards[5:], self.vectorizer)
+        self.assertEqual(positions.tolist(), [0, 5, 6])
+        self.assert_matches_rebuild(self.search, [changed] + self.cards[1:])
+
+    def test_remove_tombstones_until_compaction(self):
+        """Removed cards disappear from results at once and from memory on compact()."""
+        self.assertEqual(self.search.remove([self.cards[1]["id"], "not-indexed"], compact_threshold=1.0), 1)
+        self.assertEqual((len(self.search), self.search.dead), (5, 1))
+        remaining = [self.cards[0]] + self.cards[2:5]
+        self.assert_matches_rebuild(self.search, remaining)
+        with self.assertRaises(KeyError):
+            self.search.most_similar([self.cards[1]["id"]])
+
+        self.search.compact()
+        self.assertEqual((len(self.search), self.search.dead), (4, 0))
+        self.assert_matches_rebuild(self.search, remaining)
+
+    def test_remove_compacts_past_threshold(self):
+        """remove() compacts by itself once enough rows are tombstoned."""
+        self.search.remove([self.cards[0]["id"], self.cards[1]["id"]], compact_threshold=0.3)
+        self.assertEqual((len(self.search), self.search.dead), (3, 0))
+
+    def test_removed_card_can_come_back(self):
+        """Re-inserting a removed id appends a fresh row."""
+        self.search.remove([self.cards[2]["id"]], compact_threshold=1.0)
+        self.search.upsert_cards([self.cards[2]], self.vectorizer)
+        self.assertEqual(self.search.positions([self.cards[2]["id"]]).tolist(), [5])
+        self.assert_matches_rebuild(self.search, self.cards[:5])
+
+    def test_upsert_requires_masks(self):
+        """An index with bitsets needs bitsets for new rows too."""
+        with self.assertRaises(ValueError):
+            self.search.upsert(["x"], np.ones((1, self.vectorizer.dim)))
+
+    def test_apply_delta_reads_only_changed_cards(self):
+        """apply_delta() fetches the changed ids and tombstones the deleted ones."""
+        delta = CardsDelta(inserted=[self.cards[5]["id"]], deleted=[self.cards[0]["id"]])
+        with patch("app.services.vector_service.fetch_card_rows", return_value=[self.cards[5]]) as mock_fetch:
+            self.search.apply_delta(delta, self.vectorizer)
+
+        self.assertEqual(mock_fetch.call_args.kwargs["ids"], [self.cards[5]["id"]])
+        self.assert_matches_rebuild(self.search, self.cards[1:6])
+
+
+if __name__ == "__main__":
+    unittest.main()